@@ -0,0 +1,62 @@
+# benchmarks/bench_agent_state.py
+"""
+AgentStateMemory.aggregate() latency over a fixed window as the history grows.
+
+    python -m benchmarks.bench_agent_state --rate 10 --hours 24,168,720 --window 3600
+
+Records arrive at --rate per minute from three agents; each run aggregates
+the last --window seconds. "scan_ms" is the same aggregate computed from a
+full list() pass, the cost of the previous dict-of-records store.
+"""
+from __future__ import annotations
+import argparse, json, random, time
+from datetime import datetime, timezone
+from typing import Any, Dict
+from src.memory.schema import AgentStateRecord
+from src.memory.stores import AgentStateMemory, WindowStats, _epoch
+
+AGENTS = ("research", "manager", "memory")
+
+def scan(store: AgentStateMemory, start: float, end: float) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[str, WindowStats] = {}
+    for rec in store.list():
+        if start <= _epoch(rec.timestamp) < end:
+            acc = groups.setdefault(rec.agent, WindowStats())
+            acc.count += 1
+            acc.values.append(rec.metrics["confidence"])
+    return {name: acc.summarize(end - start, (50, 90, 99)) for name, acc in groups.items()}
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(1000 * best, 3)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=10, help="records per minute")
+    parser.add_argument("--hours", default="24,168,720", help="comma-separated history lengths")
+    parser.add_argument("--window", type=float, default=3600.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = time.time()
+    report: Dict[str, Any] = {"rate_per_min": args.rate, "window_s": args.window}
+    for hours in (int(s) for s in args.hours.split(",")):
+        store = AgentStateMemory()
+        n = hours * 60 * args.rate
+        start = time.perf_counter()
+        for i in range(n):
+            t = now - hours * 3600 + i * 60 / args.rate
+            ts = datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+            store.add(AgentStateRecord(id=f"s{i}", timestamp=ts, agent=AGENTS[i % 3], task="t", result_summary="r",
+                                       metrics={"confidence": rng.random()}))
+        report[f"hours_{hours}"] = {"records": n, "load_s": round(time.perf_counter() - start, 2),
+                                    "aggregate_ms": timed(lambda: store.aggregate(window=args.window, end=now)),
+                                    "scan_ms": timed(lambda: scan(store, now - args.window, now), repeat=1)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_keyword_index.py
+"""
+Keyword search at scale: InvertedIndex-backed KnowledgeBase.search_keyword
+versus the previous linear lowercase-and-substring scan.
+
+    python -m benchmarks.bench_keyword_index --records 100000
+"""
+from __future__ import annotations
+import argparse, json, random, time
+from typing import List
+from src.memory.stores import KnowledgeBase, KnowledgeRecord
+
+VOCAB = [f"term{i}" for i in range(5000)] + ["neural", "networks", "transformer", "optimizer", "attention", "reinforcement", "learning"]
+
+def synthetic_records(n: int, seed: int = 0) -> List[KnowledgeRecord]:
+    rng = random.Random(seed)
+    recs = []
+    for i in range(n):
+        content = " ".join(rng.choice(VOCAB) for _ in range(20))
+        topic = [rng.choice(VOCAB) for _ in range(3)]
+        recs.append(KnowledgeRecord(id=f"kn_{i}", timestamp="", topic=topic, content=content, source="bench", agent="bench", confidence=0.5))
+    return recs
+
+def linear_scan(records, query: str, top_k: int = 5):
+    # the pre-index implementation of KnowledgeBase.search_keyword
+    q = query.lower()
+    out = []
+    for rec in records.values():
+        if q in rec.content.lower() or any(q in t.lower() for t in rec.topic):
+            out.append(rec)
+    return out[:top_k]
+
+def _time(fn, queries, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(queries))
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    kb = KnowledgeBase(vector_dim=64)
+    start = time.perf_counter()
+    for rec in synthetic_records(args.records):
+        kb.records[rec.id] = rec
+        kb.text.add(rec.id, (rec.content, *rec.topic))
+    build_s = time.perf_counter() - start
+
+    queries = ["neural networks", "term42", "attention", "learning term7", "reinforcement", "does-not-occur"]
+    for q in queries:
+        assert [r.id for r in kb.search_keyword(q)] == [r.id for r in linear_scan(kb.records, q)], q
+    scan_s = _time(lambda q: linear_scan(kb.records, q), queries, args.repeat)
+    index_s = _time(lambda q: kb.search_keyword(q), queries, args.repeat)
+    print(json.dumps({
+        "records": args.records,
+        "index_build_s": round(build_s, 3),
+        "linear_scan_ms_per_query": round(scan_s * 1000, 3),
+        "inverted_index_ms_per_query": round(index_s * 1000, 3),
+        "speedup": round(scan_s / index_s, 1) if index_s else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
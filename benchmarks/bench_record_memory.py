@@ -0,0 +1,97 @@
+# benchmarks/bench_record_memory.py
+"""
+Bytes per memory record: the slotted records in src/memory/schema.py versus
+the plain dataclasses they replaced.
+
+    python -m benchmarks.bench_record_memory --records 200000
+
+Records are decoded from JSON lines, as KnowledgeBase.open and the SQLite
+stores do, so every string is a fresh object. The figure is the memory still
+held once the records are built (tracemalloc), divided by the record count:
+the record objects plus the strings and dicts they keep alive.
+"""
+from __future__ import annotations
+import argparse, gc, json, random, tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+from src.memory.schema import AgentStateRecord, ConversationTurn, KnowledgeRecord
+
+# the pre-schema definitions from src/memory/stores.py
+@dataclass
+class LegacyConversationTurn:
+    id: str
+    timestamp: str
+    role: str
+    content: str
+    metadata: Dict = field(default_factory=dict)
+
+@dataclass
+class LegacyKnowledgeRecord:
+    id: str
+    timestamp: str
+    topic: List[str]
+    content: str
+    source: str
+    agent: str
+    confidence: float
+    provenance: Dict = field(default_factory=dict)
+
+@dataclass
+class LegacyAgentStateRecord:
+    id: str
+    timestamp: str
+    agent: str
+    task: str
+    result_summary: str
+    metrics: Dict = field(default_factory=dict)
+
+TOPICS = ["neural networks", "transformer", "optimizer", "reinforcement learning", "attention", "cnn", "rnn", "general"]
+
+def synthetic_lines(kind: str, n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        ts = f"2024-05-{1 + i % 28:02d}T12:{i % 60:02d}:00.000000Z"
+        words = " ".join(rng.choice(TOPICS) for _ in range(12))
+        if kind == "knowledge":
+            # most records carry no provenance, as on the research path
+            prov = {"intent": "complex_research"} if rng.random() < 0.2 else {}
+            row = {"id": f"kn_{i}", "timestamp": ts, "topic": rng.sample(TOPICS, 2), "content": words,
+                   "source": rng.choice(["research_agent", "manager_synthesis"]), "agent": rng.choice(["research", "manager"]),
+                   "confidence": round(rng.random(), 3), "provenance": prov}
+        elif kind == "turn":
+            row = {"id": f"turn_{i}", "timestamp": ts, "role": rng.choice(["user", "manager"]), "content": words, "metadata": {}}
+        else:
+            row = {"id": f"st_{i}", "timestamp": ts, "agent": rng.choice(["research", "analysis", "manager"]),
+                   "task": "research", "result_summary": words[:60], "metrics": {}}
+        lines.append(json.dumps(row))
+    return lines
+
+def bytes_per_record(factory: Callable[..., Any], lines: List[str]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(**json.loads(line)) for line in lines]
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del records
+    return held / len(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"records": args.records}
+    for kind, legacy, current in (("knowledge", LegacyKnowledgeRecord, KnowledgeRecord),
+                                  ("turn", LegacyConversationTurn, ConversationTurn),
+                                  ("agent_state", LegacyAgentStateRecord, AgentStateRecord)):
+        lines = synthetic_lines(kind, args.records)
+        before, after = bytes_per_record(legacy, lines), bytes_per_record(current, lines)
+        report[kind] = {"before_bytes": round(before, 1), "after_bytes": round(after, 1),
+                        "saved_pct": round(100 * (1 - after / before), 1)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_reload.py
+"""
+ResearchAgent.reload() cost by change size, against building the agent from scratch.
+
+    python -m benchmarks.bench_reload --docs 50000 --changes 1,100,1000,10000
+
+Each round edits `n` items of a synthetic JSONL corpus (half changed, a
+quarter removed, a quarter added), replaces the file and reloads. The
+fixed part of "reload_s" is reading and hashing the new file, linear in
+the corpus size; the rest grows with the change.
+"""
+from __future__ import annotations
+import argparse, json, os, random, tempfile, time
+from typing import Any, Dict
+from src.agents.research import ResearchAgent
+from .bench_startup import write_corpus
+from .bench_keyword_index import VOCAB
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--changes", default="1,100,1000,10000", help="comma-separated change sizes")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(path, args.docs)
+        start = time.perf_counter()
+        agent = ResearchAgent(kb_path=path)
+        report: Dict[str, Any] = {"docs": args.docs, "build_s": round(time.perf_counter() - start, 4)}
+        # the first reload also hashes the version loaded at startup
+        agent.reload(force=True)
+        for n in (int(s) for s in args.changes.split(",")):
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            picked = rng.sample(range(len(lines)), min(n, len(lines)))
+            drop = set(picked[: n // 4])
+            for i in picked[n // 4: n // 4 + max(n // 2, 1)]:
+                item = json.loads(lines[i])
+                item["summary"] += " " + rng.choice(VOCAB)
+                lines[i] = json.dumps(item)
+            lines = [line for i, line in enumerate(lines) if i not in drop]
+            lines += [json.dumps({"title": f"new {n} {j}", "summary": " ".join(rng.choice(VOCAB) for _ in range(30)), "tags": []})
+                      for j in range(n // 4)]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)
+            start = time.perf_counter()
+            counts = agent.reload()
+            report[f"changes_{n}"] = {"reload_s": round(time.perf_counter() - start, 4), **counts}
+        agent.close()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_sharded.py
+"""
+Search throughput of ShardedKnowledgeBase by shard count, against one
+in-process KnowledgeBase.
+
+    python -m benchmarks.bench_sharded --records 200000 --shards 1,2,4,8 --clients 4
+
+`--clients` threads issue search_vector (or --op hybrid) queries
+concurrently for --seconds per configuration. Speedup over the in-process
+baseline is bounded by the core count reported alongside; below one core
+per shard, the shards only add IPC cost.
+"""
+from __future__ import annotations
+import argparse, json, os, threading, time
+from typing import Any, Callable, Dict, List
+from src.memory.sharded import ShardedKnowledgeBase
+from src.memory.stores import KnowledgeBase
+from .bench_keyword_index import VOCAB, synthetic_records
+
+def throughput(search: Callable[[str], Any], queries: List[str], clients: int, seconds: float) -> Dict[str, float]:
+    counts = [0] * clients
+    stop = time.perf_counter() + seconds
+    def run(c: int) -> None:
+        i = c
+        while time.perf_counter() < stop:
+            search(queries[i % len(queries)])
+            counts[c] += 1
+            i += clients
+    threads = [threading.Thread(target=run, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {"qps": round(sum(counts) / elapsed, 1), "mean_ms": round(1000 * elapsed * clients / max(sum(counts), 1), 2)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent searching threads")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--op", choices=["vector", "hybrid"], default="vector")
+    args = parser.parse_args()
+
+    records = synthetic_records(args.records)
+    queries = [" ".join(VOCAB[(i * 7 + j) % len(VOCAB)] for j in range(3)) for i in range(64)]
+    method = "search_vector" if args.op == "vector" else "search_hybrid"
+    report: Dict[str, Any] = {"records": args.records, "op": args.op, "clients": args.clients, "cpus": os.cpu_count()}
+
+    kb = KnowledgeBase(vector_dim=args.dim)
+    for rec in records:
+        kb.add(rec)
+    report["in_process"] = throughput(getattr(kb, method), queries, args.clients, args.seconds)
+    del kb
+
+    for n in (int(s) for s in args.shards.split(",")):
+        sharded = ShardedKnowledgeBase(shards=n, vector_dim=args.dim)
+        try:
+            start = time.perf_counter()
+            for i in range(0, len(records), 5000):
+                sharded.add_many(records[i:i + 5000])
+            load_s = time.perf_counter() - start
+            result = throughput(getattr(sharded, method), queries, args.clients, args.seconds)
+        finally:
+            sharded.close()
+        result["load_s"] = round(load_s, 2)
+        result["speedup"] = round(result["qps"] / report["in_process"]["qps"], 2)
+        report[f"shards_{n}"] = result
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_sqlite_stores.py
+"""
+Insert and search throughput of the SQLite-backed KnowledgeBase.
+
+    python -m benchmarks.bench_sqlite_stores --records 1000000 --db /tmp/bench.sqlite
+"""
+from __future__ import annotations
+import argparse, json, os, tempfile, time
+from src.memory.sqlite_stores import open_sqlite_stores
+from .bench_keyword_index import synthetic_records
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=1000, help="records per transaction")
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    if os.path.exists(path):
+        os.remove(path)
+    convo, kb, state = open_sqlite_stores(path, vector_dim=args.dim)
+
+    records = synthetic_records(args.records)
+    start = time.perf_counter()
+    for i in range(0, len(records), args.batch):
+        with kb.batch():
+            for rec in records[i:i + args.batch]:
+                kb.add(rec)
+    insert_s = time.perf_counter() - start
+
+    queries = ["neural networks", "term42", "attention", "learning term7", "reinforcement"]
+    kw_queries = [queries[i % len(queries)] for i in range(args.queries)]
+    start = time.perf_counter()
+    for q in kw_queries:
+        kb.search_keyword(q, top_k=5)
+    keyword_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for q in kw_queries:
+        kb.search_vector(q, top_k=5)
+    vector_s = time.perf_counter() - start
+    kb.db.close()
+
+    start = time.perf_counter()
+    _, reopened, _ = open_sqlite_stores(path, vector_dim=args.dim)
+    reopen_s = time.perf_counter() - start
+    reopened.db.close()
+
+    print(json.dumps({
+        "records": args.records,
+        "batch": args.batch,
+        "insert_records_per_s": round(args.records / insert_s, 1),
+        "keyword_queries_per_s": round(len(kw_queries) / keyword_s, 1),
+        "vector_queries_per_s": round(len(kw_queries) / vector_s, 1),
+        "reopen_s": round(reopen_s, 3),
+        "db_bytes": os.path.getsize(path),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
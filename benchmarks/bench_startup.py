@@ -0,0 +1,107 @@
+# benchmarks/bench_startup.py
+"""
+Startup cost: module import, cold build, and warm restore from a snapshot.
+
+    python -m benchmarks.bench_startup --docs 20000 --records 20000 --out startup.json
+
+Each stage runs in a fresh interpreter so nothing is already imported or
+cached. "import" is `import src.main`; "cold" builds a Coordinator over a
+synthetic JSONL research corpus and re-adds --records knowledge records;
+"warm" builds the same Coordinator from the snapshot the cold run wrote.
+Both report the time to the first answer, and every stage its peak RSS.
+"""
+from __future__ import annotations
+import argparse, json, os, random, subprocess, sys, tempfile, time
+from typing import Any, Dict
+from .bench_keyword_index import VOCAB
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROMPT = "Research transformer architectures and summarize key trade-offs."
+
+def write_corpus(path: str, n: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            item = {"title": f"doc {i} " + " ".join(rng.choice(VOCAB) for _ in range(4)),
+                    "summary": " ".join(rng.choice(VOCAB) for _ in range(30)),
+                    "tags": [rng.choice(VOCAB) for _ in range(3)]}
+            f.write(json.dumps(item) + "\n")
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def child(stage: str, corpus: str, snapshot: str, records: int, log_dir: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if stage == "import":
+        import src.main  # noqa: F401
+        return {"import_s": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb()}
+    from src.agents.coordinator import Coordinator
+    imported = time.perf_counter()
+    cfg = {"memory_backend": "memory", "kb_dir": None, "llm_intent": False,
+           "snapshot": snapshot if stage == "warm" else None}
+    co = Coordinator(cfg=cfg, kb_path=corpus, log_dir=log_dir)
+    if stage == "cold":
+        from .bench_keyword_index import synthetic_records
+        batch = synthetic_records(records)
+        for i in range(0, len(batch), 1000):
+            with co.kb.batch():
+                for rec in batch[i:i + 1000]:
+                    co.kb.add(rec)
+    built = time.perf_counter()
+    co.handle(PROMPT)
+    answered = time.perf_counter()
+    if stage == "cold":
+        co.save_snapshot(snapshot)
+    out = {"import_s": imported - start, "build_s": built - imported, "first_answer_s": answered - start,
+           "restored": co.restored, "kb_records": len(co.kb.records), "peak_rss_mb": _peak_rss_mb()}
+    co.close()
+    return out
+
+def run_stage(stage: str, args: argparse.Namespace, corpus: str, snapshot: str, log_dir: str) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--child", stage, "--corpus", corpus,
+           "--snapshot", snapshot, "--records", str(args.records), "--log-dir", log_dir]
+    runs = []
+    for _ in range(args.repeat):
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    # the fastest run is the least disturbed by the rest of the machine
+    best = min(runs, key=lambda r: r.get("first_answer_s", r["import_s"]))
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in best.items()}
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20_000, help="research corpus items")
+    parser.add_argument("--records", type=int, default=5_000, help="knowledge records added on the cold start")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--log-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.corpus, args.snapshot, args.records, args.log_dir)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus, snapshot = os.path.join(tmp, "corpus.jsonl"), os.path.join(tmp, "snapshot.bin")
+        write_corpus(corpus, args.docs)
+        report = {"docs": args.docs, "records": args.records, "repeat": args.repeat,
+                  "import": run_stage("import", args, corpus, snapshot, tmp),
+                  "cold": run_stage("cold", args, corpus, snapshot, tmp),
+                  "warm": run_stage("warm", args, corpus, snapshot, tmp),
+                  "snapshot_mb": round(os.path.getsize(snapshot) / 2**20, 2)}
+    report["warm_speedup"] = round(report["cold"]["first_answer_s"] / max(report["warm"]["first_answer_s"], 1e-9), 2)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
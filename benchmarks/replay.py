@@ -0,0 +1,162 @@
+# benchmarks/replay.py
+"""
+End-to-end replay through Coordinator.handle with a pre-populated knowledge base.
+
+    python -m benchmarks.replay --records 100000 --repeat 20 --out bench.json
+    python -m benchmarks.replay --requests prompts.jsonl --baseline bench.json
+
+Prompts are the scenario prompts from src/main.py, or one JSONL object per
+line from --requests (its "query", "prompt", "text", "body" or "title"
+field). "cold" measures the first pass over a freshly built Coordinator;
+"warm" measures later passes after one unmeasured warm-up pass. The JSON
+report (throughput, latency percentiles, per-stage breakdown from
+core/metrics.py, peak RSS, git SHA) can be compared against an earlier run
+with --baseline; the exit status is 1 when a warm latency regressed by more
+than --tolerance (a cold run is a single pass, too few samples to gate on).
+"""
+from __future__ import annotations
+import argparse, json, math, os, platform, subprocess, sys, tempfile, time
+from typing import Any, Dict, List
+from src.agents.coordinator import Coordinator
+from src.main import SCENARIOS
+from .bench_keyword_index import synthetic_records
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESEARCH_KB = os.path.join(ROOT, "src", "data", "knowledge_base.json")
+TEXT_FIELDS = ("query", "prompt", "text", "body", "title")
+
+def load_prompts(path: str | None) -> List[str]:
+    if not path:
+        return [prompt for _, prompt in SCENARIOS]
+    prompts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            text = item if isinstance(item, str) else next((item[k] for k in TEXT_FIELDS if item.get(k)), None)
+            if text:
+                prompts.append(text)
+    return prompts
+
+def git_sha() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(ordered: List[float], q: float) -> float:
+    # nearest-rank, as in core/metrics.py
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))] if ordered else 0.0
+
+def build(args: argparse.Namespace, log_dir: str) -> Dict[str, Any]:
+    cfg = {"memory_backend": args.backend, "memory_db": os.path.join(log_dir, "memory.sqlite"),
+           "vector_index": args.index, "llm_intent": False, "kb_dir": None}
+    start = time.perf_counter()
+    co = Coordinator(cfg=cfg, kb_path=args.research_kb, log_dir=log_dir)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    records = synthetic_records(args.records, seed=args.seed)
+    for i in range(0, len(records), 1000):
+        with co.kb.batch():
+            for rec in records[i:i + 1000]:
+                co.kb.add(rec)
+    return {"co": co, "build_s": build_s, "populate_s": time.perf_counter() - start}
+
+def replay(co: Coordinator, prompts: List[str], repeat: int) -> Dict[str, Any]:
+    co.metrics.reset()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prompt in prompts:
+            t0 = time.perf_counter()
+            co.handle(prompt)
+            latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {"mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+                       **{f"p{int(q * 100)}": round(percentile(ordered, q) * 1000, 3) for q in (0.5, 0.95, 0.99)},
+                       "max": round(ordered[-1] * 1000, 3) if ordered else 0.0},
+        "stages": co.metrics.snapshot()["stages"],
+    }
+
+def regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    found = []
+    for mode, run in report["runs"].items():
+        base = baseline.get("runs", {}).get(mode)
+        if not base or mode == "cold":
+            continue
+        for key in ("p50", "p95"):
+            old, new = base["latency_ms"].get(key), run["latency_ms"].get(key)
+            if old and new > old * (1 + tolerance):
+                found.append(f"{mode} {key}: {old}ms -> {new}ms")
+        for stage, stats in run["stages"].items():
+            old = base.get("stages", {}).get(stage, {}).get("p50_ms")
+            if old and stats["p50_ms"] > old * (1 + tolerance) and stats["p50_ms"] - old > 0.05:
+                found.append(f"{mode} stage {stage} p50: {old}ms -> {stats['p50_ms']}ms")
+    return found
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1000, help="synthetic KB records loaded before replay")
+    parser.add_argument("--requests", default=None, help="JSONL prompts; defaults to the scenario prompts")
+    parser.add_argument("--repeat", type=int, default=5, help="measured passes over the prompts")
+    parser.add_argument("--start", choices=["cold", "warm", "both"], default="both")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--index", choices=["exact", "ivf"], default="exact")
+    parser.add_argument("--research-kb", default=RESEARCH_KB)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown against --baseline")
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.requests)
+    report: Dict[str, Any] = {
+        "git_sha": git_sha(), "python": platform.python_version(), "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        "prompts": len(prompts), "runs": {}, "setup": {},
+    }
+    for mode in (["cold", "warm"] if args.start == "both" else [args.start]):
+        with tempfile.TemporaryDirectory() as log_dir:
+            setup = build(args, log_dir)
+            co = setup.pop("co")
+            report["setup"][mode] = {k: round(v, 4) for k, v in setup.items()}
+            report["llm"] = co.llm is not None
+            if mode == "warm":
+                replay(co, prompts, 1)
+            report["runs"][mode] = replay(co, prompts, 1 if mode == "cold" else args.repeat)
+            co.close()
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
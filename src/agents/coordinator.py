@@ -1,88 +1,284 @@
 from __future__ import annotations
 from typing import Dict, Any, List
-import os, json
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, contextvars, functools, os, json, pickle, threading
 from ..core.message_bus import Message, MessageBus
 from ..core.planner import Planner
+from ..core.config import Config
+from ..core.metrics import Metrics, profile as run_profiled
+from ..core.intent import IntentEngine, load_engine
+from ..core.trace import TraceWriter
 from ..core.utils import now_ts, gen_id, to_json, confidence_from_counts
 from ..memory.stores import ConversationMemory, KnowledgeBase, AgentStateMemory
+from ..memory.answer_cache import SemanticAnswerCache
+from ..memory.snapshot import open_snapshot, pack_memory, source_signature, unpack_memory, write_snapshot
 from .research import ResearchAgent
 from .analysis import AnalysisAgent
 from .memory import MemoryAgent
-from src.core.llm import LLMClient
-from dotenv import load_dotenv
+from ..core.llm import LLMClient
 
-load_dotenv()
+# set by profile() for its own call only; other threads and tasks keep offloading
+_INLINE: contextvars.ContextVar[bool] = contextvars.ContextVar("coordinator_inline", default=False)
 
 
 class Coordinator:
     def __init__(self, cfg: Dict[str,Any] | None = None, kb_path: str | None = None, log_dir: str | None = None):
         self.cfg = cfg or {}
-        self.bus = MessageBus()
+        self.bus = MessageBus(queue_size=self.cfg.get("bus_queue_size", Config.BUS_QUEUE_SIZE),
+                              trace_size=self.cfg.get("bus_trace_size", Config.BUS_TRACE_SIZE),
+                              policy=self.cfg.get("bus_policy", Config.BUS_POLICY))
         self.planner = Planner()
+        rules = self.cfg.get("intent_rules", Config.INTENT_RULES)
+        self.intents = IntentEngine.from_config(rules) if isinstance(rules, dict) else load_engine(rules)
 
-        self.convo = ConversationMemory()
-        self.kb = KnowledgeBase(vector_dim=256)
-        self.agent_state = AgentStateMemory()
-        self.memory = MemoryAgent(self.convo, self.kb, self.agent_state)
+        index = self.cfg.get("vector_index", Config.VECTOR_INDEX)
+        index_opts = {"nlist": self.cfg.get("ivf_nlist", Config.IVF_NLIST), "nprobe": self.cfg.get("ivf_nprobe", Config.IVF_NPROBE)} if index == "ivf" else {}
+        self.kb_dir = self.cfg.get("kb_dir", Config.KB_DIR)
+        limits = {"dedup_threshold": self.cfg.get("kb_dedup_threshold", Config.KB_DEDUP_THRESHOLD),
+                  "max_records": self.cfg.get("kb_max_records", Config.KB_MAX_RECORDS),
+                  "ttl": self.cfg.get("kb_ttl", Config.KB_TTL),
+                  "eviction": self.cfg.get("kb_eviction", Config.KB_EVICTION)}
+        shards = self.cfg.get("kb_shards", Config.KB_SHARDS)
+        convo_opts = {"max_turns": self.cfg.get("convo_max_turns", Config.CONVO_MAX_TURNS),
+                      "summary_turns": self.cfg.get("convo_summary_turns", Config.CONVO_SUMMARY_TURNS),
+                      "max_summaries": self.cfg.get("convo_max_summaries", Config.CONVO_MAX_SUMMARIES),
+                      "max_sessions": self.cfg.get("convo_max_sessions", Config.CONVO_MAX_SESSIONS),
+                      "session_ttl": self.cfg.get("convo_session_ttl", Config.CONVO_SESSION_TTL)}
+        state_opts = {"partition_seconds": self.cfg.get("agent_state_partition", Config.AGENT_STATE_PARTITION),
+                      "raw_retention": self.cfg.get("agent_state_raw_retention", Config.AGENT_STATE_RAW_RETENTION),
+                      "retention": self.cfg.get("agent_state_retention", Config.AGENT_STATE_RETENTION)}
+        snap = open_snapshot(self.cfg.get("snapshot", Config.SNAPSHOT_PATH))
+        # parts of this coordinator restored from the snapshot
+        self.restored: List[str] = []
+        if self.cfg.get("memory_backend", Config.MEMORY_BACKEND) == "sqlite":
+            from ..memory.sqlite_stores import open_sqlite_stores
+            path = self.cfg.get("memory_db", Config.MEMORY_DB)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.convo, self.kb, self.agent_state = open_sqlite_stores(path, vector_dim=256, index=index, index_opts=index_opts,
+                                                                       cache_size=self.cfg.get("memory_cache_size", Config.MEMORY_CACHE_SIZE),
+                                                                       state_retention=state_opts["retention"],
+                                                                       state_partition=state_opts["partition_seconds"], **limits)
+            self.kb_dir = None
+        elif snap is not None and "kb.records" in snap and not self.kb_dir and not shards:
+            self.convo, self.kb, self.agent_state = unpack_memory(snap, index=index, index_opts=index_opts,
+                                                                  convo_opts=convo_opts, state_opts=state_opts, **limits)
+            self.restored.append("memory")
+        else:
+            self.convo = ConversationMemory(**convo_opts)
+            if shards > 0:
+                from ..memory.sharded import ShardedKnowledgeBase
+                self.kb = ShardedKnowledgeBase(shards=shards, vector_dim=256, index=index, index_opts=index_opts, **limits)
+                self.kb_dir = None
+            elif self.kb_dir and KnowledgeBase.exists(self.kb_dir):
+                self.kb = KnowledgeBase.open(self.kb_dir, index=index, index_opts=index_opts, **limits)
+            else:
+                self.kb = KnowledgeBase(vector_dim=256, index=index, index_opts=index_opts, **limits)
+            self.agent_state = AgentStateMemory(**state_opts)
+        recall_opts = {"fusion": self.cfg.get("recall_fusion", Config.RECALL_FUSION),
+                       "vector_weight": self.cfg.get("recall_vector_weight", Config.RECALL_VECTOR_WEIGHT),
+                       "confidence_weight": self.cfg.get("recall_confidence_weight", Config.RECALL_CONFIDENCE_WEIGHT),
+                       "half_life": self.cfg.get("recall_half_life", Config.RECALL_HALF_LIFE)}
+        self.memory = MemoryAgent(self.convo, self.kb, self.agent_state, recall_opts=recall_opts)
 
-        self.research = ResearchAgent(kb_path=kb_path)
+        prebuilt = None
+        if snap is not None and "research" in snap and snap.meta.get("research_source") == source_signature(kb_path):
+            prebuilt = snap.load("research")
+            self.restored.append("research")
+        self.research = ResearchAgent(kb_path=kb_path, prebuilt=prebuilt,
+                                      poll_interval=self.cfg.get("research_poll_interval", Config.RESEARCH_POLL_INTERVAL))
         self.analysis = AnalysisAgent()
 
+        threshold = self.cfg.get("answer_cache_threshold", Config.ANSWER_CACHE_THRESHOLD)
+        self.answer_cache = SemanticAnswerCache(self.kb, threshold=threshold, max_entries=self.cfg.get("answer_cache_size", Config.ANSWER_CACHE_SIZE)) if threshold > 0 else None
+
         self.log_dir = log_dir or os.path.abspath(os.path.join(os.getcwd(), "outputs"))
         os.makedirs(self.log_dir, exist_ok=True)
-        self.trace_path = os.path.join(self.log_dir, "trace.jsonl")
+        # pooled workers each pass their own file name; rotating one shared file from several processes loses lines
+        self.trace_path = os.path.join(self.log_dir, self.cfg.get("trace_file", "trace.jsonl"))
+        self.tracer = TraceWriter(
+            self.trace_path,
+            flush_records=self.cfg.get("trace_flush_records", Config.TRACE_FLUSH_RECORDS),
+            flush_interval=self.cfg.get("trace_flush_interval", Config.TRACE_FLUSH_INTERVAL),
+            max_bytes=self.cfg.get("trace_max_bytes", Config.TRACE_MAX_BYTES),
+            backups=self.cfg.get("trace_backups", Config.TRACE_BACKUPS),
+            compress=self.cfg.get("trace_compress", Config.TRACE_COMPRESS),
+            drop=self.cfg.get("trace_drop", Config.TRACE_DROP),
+            sample=self.cfg.get("trace_sample", Config.TRACE_SAMPLE),
+            background=self.cfg.get("trace_background", Config.TRACE_BACKGROUND),
+        )
+
+        self.llm = LLMClient() if Config.GROQ_API_KEY else None
+        self.llm_intent = self.cfg.get("llm_intent", Config.LLM_INTENT_CALL)
+
+        self.metrics = Metrics(enabled=self.cfg.get("metrics", Config.METRICS), window=self.cfg.get("metrics_window", Config.METRICS_WINDOW))
+        self.metrics.gauge("kb_records", lambda: len(self.kb.records))
+        if self.answer_cache is not None:
+            self.metrics.gauge("answer_cache_entries", lambda: len(self.answer_cache.entries))
+        if self.llm and self.llm.cache:
+            self.metrics.gauge("llm_cache_hits", lambda: self.llm.cache.hits)
+            self.metrics.gauge("llm_cache_misses", lambda: self.llm.cache.misses)
+
+        # retrieval and LLM calls run here so handle_async can overlap them
+        self._executor: ThreadPoolExecutor | None = None
+        # idle event loops for handle(); each concurrent caller takes its own
+        self._loops: List[asyncio.AbstractEventLoop] = []
+        self._loops_lock = threading.Lock()
+
+    def save_knowledge(self) -> None:
+        if self.kb_dir:
+            self.kb.save(self.kb_dir)
 
-        self.llm = LLMClient() if os.getenv("GROQ_API_KEY") else None
+    def save_snapshot(self, path: str | None = None) -> str:
+        """Write the research index and, for in-memory stores, the memory stores to a warm-start snapshot."""
+        path = path or self.cfg.get("snapshot", Config.SNAPSHOT_PATH) or os.path.join(self.log_dir, "snapshot.bin")
+        sections = {"research": pickle.dumps(self.research.snapshot_state(), protocol=pickle.HIGHEST_PROTOCOL)}
+        meta: Dict[str, Any] = {"research_source": self.research.signature}
+        if type(self.kb) is KnowledgeBase:
+            mem_sections, mem_meta = pack_memory(self.convo, self.kb, self.agent_state)
+            sections.update(mem_sections)
+            meta.update(mem_meta)
+        write_snapshot(path, sections, meta)
+        return path
 
     def _trace(self, event: str, payload: Dict[str,Any]):
-        record = {"timestamp": now_ts(), "event": event, "payload": payload}
-        with open(self.trace_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.tracer.write(event, payload)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._loops_lock:
+            loops, self._loops = self._loops, []
+        for loop in loops:
+            loop.close()
+        self.research.close()
+        # a KnowledgeBase opened from kb_dir is written back, so the next start reopens it
+        if self.cfg.get("kb_save_on_close", Config.KB_SAVE_ON_CLOSE):
+            self.save_knowledge()
+        self.bus.close()
+        self.tracer.close()
+        db = getattr(self.kb, "db", None)
+        if db is not None:
+            db.close()
+        elif hasattr(self.kb, "close"):
+            self.kb.close()
+
+    async def _offload(self, fn, *args):
+        if _INLINE.get():
+            return fn(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.cfg.get("executor_workers", 4), thread_name_prefix="coordinator")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _llm_intent(self, text: str) -> None:
+        self.metrics.inc("llm_calls")
+        plan = self.llm.classify_or_plan(text)
+        if plan:
+            self._trace("llm.intent", {"text": text, "llm_plan": plan})
 
     def classify_intent(self, text: str) -> str:
-        if self.llm:
-            plan = self.llm.classify_or_plan(text)
-            if plan:
-                self._trace("llm.intent", {"text": text, "llm_plan": plan})
-
-        t = text.lower()
-        if "what did we" in t or "earlier" in t or "remember" in t or "discuss" in t:
-            return "memory_query"
-        if "compare" in t and "recommend" in t:
-            return "compare_recommend"
-        if any(k in t for k in ["research", "analyze", "analyze their", "trade-offs", "tradeoffs", "papers", "architectures", "efficiency", "methodologies", "challenges"]):
-            if "paper" in t or "papers" in t or "recent" in t:
-                return "multi_step"
-            return "complex_research"
-        if any(k in t for k in ["neural network", "neural networks", "transformer", "optimizer", "reinforcement learning", "rl"]):
-            return "simple_query"
-        return "simple_query"
+        if self.llm and self.llm_intent:
+            self._llm_intent(text)
+        return self._rule_intent(text)
+
+    def _rule_intent(self, text: str) -> str:
+        return self.intents.classify(text)
+
+    def classify_many(self, texts: List[str]) -> List[str]:
+        return self.intents.classify_many(texts)
+
+    def _cache_answer(self, text: str, intent: str, rec) -> None:
+        if self.answer_cache is not None:
+            self.answer_cache.add(text, intent, rec.id, self.research.version)
 
     def _infer_topics(self, text: str) -> List[str]:
         words = [w for w in __import__("re").findall(r"[A-Za-z0-9_-]+", text) if len(w) > 3]
         return list(dict.fromkeys(words))[:6]
 
-    def handle_user_query(self, text: str) -> str:
-        return self.handle(text)
+    def handle_user_query(self, text: str, session_id: str | None = None) -> str:
+        return self.handle(text, session_id=session_id)
+
+    def handle(self, text: str, session_id: str | None = None) -> str:
+        # synchronous wrapper; inside a running event loop prefer awaiting handle_async
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # that loop cannot be re-entered: block this caller on a thread with its own loop
+            ctx = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="coordinator-handle") as ex:
+                return ex.submit(ctx.run, self.handle, text, session_id).result()
+        with self._loops_lock:
+            loop = self._loops.pop() if self._loops else None
+        if loop is None:
+            loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.handle_async(text, session_id=session_id))
+        finally:
+            with self._loops_lock:
+                self._loops.append(loop)
+
+    async def handle_async(self, text: str, session_id: str | None = None) -> str:
+        self.metrics.inc("requests")
+        with self.metrics.span("request") as span:
+            answer = await self._handle(text, session_id)
+        if self.metrics.enabled:
+            self._trace("request", {"text": text, "ms": span.ms})
+        return answer
 
-    def handle(self, text: str) -> str:
-        self.memory.record_turn(role="user", content=text)
-        intent = self.classify_intent(text)
+    def profile(self, text: str, session_id: str | None = None, sort: str = "cumulative", limit: int = 30):
+        """Handle one query under cProfile; returns (answer, stats text). Offloaded stages run inline so they are profiled too."""
+        token = _INLINE.set(True)
+        try:
+            return run_profiled(self.handle, text, session_id=session_id, sort=sort, limit=limit)
+        finally:
+            _INLINE.reset(token)
+
+    async def _handle(self, text: str, session_id: str | None) -> str:
+        metrics = self.metrics
+        self.memory.record_turn(role="user", content=text, session_id=session_id)
+        with metrics.span("intent"):
+            intent = self._rule_intent(text)
         self._trace("intent", {"text": text, "intent": intent})
 
-        prior_hits = self.kb.search_vector(text, top_k=1)
-        overlap = prior_hits[0][1] if prior_hits else 0.0
-        plan = self.planner.make_plan(intent, text)
+        if self.answer_cache is not None and intent != "memory_query":
+            with metrics.span("answer_cache.lookup"):
+                cached = self.answer_cache.lookup(text, intent, self.research.version)
+            if cached:
+                rec, score = cached
+                metrics.inc("answer_cache_hits")
+                provenance = {"cached": True, "record_id": rec.id, "similarity": round(score, 3), "intent": intent}
+                self._trace("answer_cache.hit", provenance)
+                self.memory.record_turn(role="manager", content=rec.content, metadata=provenance, session_id=session_id)
+                return rec.content
+
+        with metrics.span("plan"):
+            plan = self.planner.make_plan(intent, text)
         self._trace("plan", {"intent": intent, "steps":[{"agent":s.agent,"action":s.action,"payload":s.payload} for s in plan]})
         research_payload = None
         analysis_payload = None
+        overlap = 0.0
 
         try:
+            # independent work overlaps: the overlap probe, the plan's research search
+            # and the (trace-only) LLM intent call
+            search_query = next((s.payload.get("query","") for s in plan if s.agent == "research" and s.action == "search"), None)
+            jobs = [self._offload(metrics.timed("overlap_probe", self.kb.search_vector), text, 1)]
+            if search_query is not None:
+                jobs.append(self._offload(metrics.timed("research.search", self.research.search), search_query))
+            if self.llm and self.llm_intent:
+                jobs.append(self._offload(metrics.timed("llm.intent", self._llm_intent), text))
+            done = await asyncio.gather(*jobs)
+            prior_hits = done[0]
+            overlap = prior_hits[0][1] if prior_hits else 0.0
+            prefetched = done[1] if search_query is not None else None
+
             for step in plan:
                 self.bus.send(Message(sender="manager", recipient=step.agent, type=step.action, payload=step.payload))
 
                 if step.agent == "memory" and step.action == "recall":
-                    recall = self.memory.recall(step.payload["query"])
+                    recall = await self._offload(metrics.timed("memory.recall", self.memory.recall), step.payload["query"], 5, session_id)
                     self._trace("memory.recall", recall)
                     if recall["matches"]:
                         lines = []
@@ -91,49 +287,62 @@ class Coordinator:
                         answer = "Here's what I found in memory:\n" + "\n".join(lines)
                     else:
                         answer = "I couldn't find relevant memory for that query."
-                    self.memory.record_turn(role="manager", content=answer)
+                    self.memory.record_turn(role="manager", content=answer, session_id=session_id)
                     return answer
 
                 if step.agent == "research" and step.action == "search":
-                    research_payload = self.research.search(step.payload.get("query",""))
-                    self._trace("research.result", {"query": step.payload.get("query",""), "num_results": len(research_payload.get("results",[])), "confidence": research_payload.get("confidence",0.0)})
+                    query = step.payload.get("query","")
+                    if prefetched is not None and query == search_query:
+                        research_payload, prefetched = prefetched, None
+                    else:
+                        research_payload = await self._offload(metrics.timed("research.search", self.research.search), query)
+                    self._trace("research.result", {"query": query, "num_results": len(research_payload.get("results",[])), "confidence": research_payload.get("confidence",0.0)})
                     if intent == "simple_query":
                         bullets = [f"- {r.get('title')}: {r.get('summary')}" for r in research_payload["results"][:6]]
                         answer = "Main findings:\n" + "\n".join(bullets)
                         topics = self._infer_topics(text)
                         conf = confidence_from_counts(len(research_payload.get("results",[])), overlap)
-                        self.memory.store_knowledge(topic=topics, content=answer, source="research_agent", agent="research", confidence=conf, provenance={"query": text})
-                        self.memory.store_agent_state(agent="research", task=text, result_summary=answer[:300], metrics={"confidence": conf})
-                        self.memory.record_turn(role="manager", content=answer)
+                        # one batch for the turn's closing writes; nothing in it awaits
+                        with metrics.span("memory.write"), self.memory.batch():
+                            rec = self.memory.store_knowledge(topic=topics, content=answer, source="research_agent", agent="research", confidence=conf, provenance={"query": text, "intent": intent}, session_id=session_id)
+                            self._cache_answer(text, intent, rec)
+                            self.memory.store_agent_state(agent="research", task=text, result_summary=answer[:300], metrics={"confidence": conf})
+                            self.memory.record_turn(role="manager", content=answer, session_id=session_id)
                         return answer
 
                 if step.agent == "analysis" and step.action == "analyze":
                     if not research_payload:
-                        research_payload = self.research.search(text)
+                        research_payload = await self._offload(metrics.timed("research.search", self.research.search), text)
                         self._trace("research.fallback_for_analysis", {"query": text, "num_results": len(research_payload.get("results",[]))})
-                    analysis_payload = self.analysis.analyze(research_payload, step.payload.get("instructions",""))
-                    self._trace("analysis.result", analysis_payload)
+                    with metrics.span("analysis") as span:
+                        analysis_payload = self.analysis.analyze(research_payload, step.payload.get("instructions",""))
+                    self._trace("analysis.result", {**analysis_payload, "ms": span.ms} if metrics.enabled else analysis_payload)
 
             if self.llm:
-                llm_summary = self.llm.classify_or_plan(f"Synthesize answer for: {text}")
+                metrics.inc("llm_calls")
+                llm_summary = await self._offload(metrics.timed("llm.synthesis", self.llm.classify_or_plan), f"Synthesize answer for: {text}")
                 if llm_summary:
                     self._trace("llm.synthesis", {"summary": llm_summary})
-                    self.memory.record_turn(role="manager", content=llm_summary)
+                    self.memory.record_turn(role="manager", content=llm_summary, session_id=session_id)
                     return llm_summary
 
-            answer = self._synthesize(intent, text, research_payload, analysis_payload, overlap)
+            with metrics.span("synthesize"):
+                answer = self._synthesize(intent, text, research_payload, analysis_payload, overlap)
             topics = self._infer_topics(text)
             conf = confidence_from_counts(len(research_payload["results"]) if research_payload else 0, float(overlap))
-            self.memory.store_knowledge(topic=topics, content=answer, source="manager_synthesis", agent="manager", confidence=conf, provenance={"intent": intent})
-            self.memory.store_agent_state(agent="manager", task=intent, result_summary=answer[:300], metrics={"confidence": conf})
-            self.memory.record_turn(role="manager", content=answer)
+            with metrics.span("memory.write"), self.memory.batch():
+                rec = self.memory.store_knowledge(topic=topics, content=answer, source="manager_synthesis", agent="manager", confidence=conf, provenance={"intent": intent}, session_id=session_id)
+                self._cache_answer(text, intent, rec)
+                self.memory.store_agent_state(agent="manager", task=intent, result_summary=answer[:300], metrics={"confidence": conf})
+                self.memory.record_turn(role="manager", content=answer, session_id=session_id)
             return answer
 
         except Exception as e:
             err_msg = f"Error: {e}"
+            metrics.inc("errors")
             self._trace("error", {"error": str(e)})
             fallback = "Something went wrong. Try rephrasing the question or ask a simpler query."
-            self.memory.record_turn(role="manager", content=fallback)
+            self.memory.record_turn(role="manager", content=fallback, session_id=session_id)
             return fallback
 
     def _synthesize(self, intent: str, query: str, research_payload: Dict[str,Any] | None, analysis_payload: Dict[str,Any] | None, overlap: float) -> str:
@@ -1,43 +1,51 @@
 from __future__ import annotations
+import contextlib
 from typing import Dict, Any, List
-from ..memory.stores import ConversationMemory, KnowledgeBase, AgentStateMemory, KnowledgeRecord, ConversationTurn, AgentStateRecord
+from ..memory.stores import ConversationMemory, KnowledgeBase, AgentStateMemory, KnowledgeRecord, ConversationTurn, AgentStateRecord, DEFAULT_SESSION
 from ..core.utils import now_ts, gen_id, to_json
 
 class MemoryAgent:
-    def __init__(self, conversation: ConversationMemory, kb: KnowledgeBase, agent_state: AgentStateMemory):
+    def __init__(self, conversation: ConversationMemory, kb: KnowledgeBase, agent_state: AgentStateMemory,
+                 recall_opts: Dict[str,Any] | None = None):
         self.name = "memory"
         self.convo = conversation
         self.kb = kb
         self.agent_state = agent_state
+        # forwarded to KnowledgeBase.search_hybrid (fusion, vector_weight, confidence_weight, half_life)
+        self.recall_opts = recall_opts or {}
+
+    @contextlib.contextmanager
+    def batch(self):
+        # group every write of one turn (one transaction for SQLite-backed stores)
+        with self.convo.batch(), self.kb.batch(), self.agent_state.batch():
+            yield self
 
     # Conversation
-    def record_turn(self, role: str, content: str, metadata: Dict[str,Any] | None = None):
-        turn = ConversationTurn(id=gen_id("turn"), timestamp=now_ts(), role=role, content=content, metadata=metadata or {})
-        self.convo.add(turn)
+    def record_turn(self, role: str, content: str, metadata: Dict[str,Any] | None = None, session_id: str | None = None):
+        turn = ConversationTurn(id=gen_id("turn"), timestamp=now_ts(), role=role, content=content, metadata=metadata)
+        self.convo.add(turn, session_id=session_id)
         return turn
 
     # Knowledge
-    def store_knowledge(self, topic: List[str], content: str, source: str, agent: str, confidence: float, provenance: Dict[str,Any] | None = None):
-        rec = KnowledgeRecord(id=gen_id("kn"), timestamp=now_ts(), topic=topic, content=content, source=source, agent=agent, confidence=confidence, provenance=provenance or {})
-        self.kb.add(rec)
-        return rec
+    def store_knowledge(self, topic: List[str], content: str, source: str, agent: str, confidence: float, provenance: Dict[str,Any] | None = None,
+                        session_id: str | None = None):
+        # the writing session is recorded so recall() stays within it
+        provenance = {**(provenance or {}), "session_id": session_id or DEFAULT_SESSION}
+        rec = KnowledgeRecord(id=gen_id("kn"), timestamp=now_ts(), topic=topic, content=content, source=source, agent=agent, confidence=confidence, provenance=provenance)
+        # may return an existing record the new one was merged into
+        return self.kb.add(rec)
 
     # Agent state
     def store_agent_state(self, agent: str, task: str, result_summary: str, metrics: Dict[str,Any] | None = None):
-        rec = AgentStateRecord(id=gen_id("st"), timestamp=now_ts(), agent=agent, task=task, result_summary=result_summary, metrics=metrics or {})
+        rec = AgentStateRecord(id=gen_id("st"), timestamp=now_ts(), agent=agent, task=task, result_summary=result_summary, metrics=metrics)
         self.agent_state.add(rec)
         return rec
 
-    # Recall: keyword + vector
-    def recall(self, query: str) -> Dict[str,Any]:
-        vec_hits = self.kb.search_vector(query, top_k=5)
-        kw_hits = self.kb.search_keyword(query, top_k=5)
-        combined = []
-        seen = set()
-        for rec, score in vec_hits:
-            combined.append({"id": rec.id, "topic": rec.topic, "content": rec.content, "confidence": rec.confidence, "similarity": round(float(score),3), "source": rec.source})
-            seen.add(rec.id)
-        for rec in kw_hits:
-            if rec.id not in seen:
-                combined.append({"id": rec.id, "topic": rec.topic, "content": rec.content, "confidence": rec.confidence, "similarity": None, "source": rec.source})
-        return {"query": query, "matches": combined}
+    # Recall: fused keyword + vector ranking over the knowledge stored by one session
+    def recall(self, query: str, top_k: int = 5, session_id: str | None = None) -> Dict[str,Any]:
+        matches = []
+        match = {"session_id": session_id or DEFAULT_SESSION}
+        for rec, score, sim in self.kb.search_hybrid(query, top_k=top_k, match=match, **self.recall_opts):
+            matches.append({"id": rec.id, "topic": rec.topic, "content": rec.content, "confidence": rec.confidence,
+                            "similarity": round(float(sim),3), "score": round(score,4), "source": rec.source})
+        return {"query": query, "matches": matches}
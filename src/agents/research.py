@@ -1,39 +1,198 @@
 from __future__ import annotations
-from typing import Dict, Any, List
-import json, os
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import hashlib, json, os, threading
 from ..core.utils import now_ts, gen_id
+from ..memory.text_index import Bm25Index, tokenize
+from ..memory.snapshot import source_signature
+from ..data.corpus import JsonlCorpus
+
+# used when there is no corpus file, or it is empty (light)
+FALLBACK_ITEMS = [
+    {"title":"Feedforward Neural Networks (MLP)","summary":"Simple layered perceptrons; good for tabular tasks.","tags":["neural networks","mlp"]},
+    {"title":"Convolutional Neural Networks (CNN)","summary":"Weight sharing and local fields; strong for images.","tags":["neural networks","cnn"]},
+    {"title":"Recurrent Neural Networks (RNN, LSTM)","summary":"Sequence models; LSTM/GRU mitigate vanishing gradients.","tags":["neural networks","rnn","lstm"]},
+    {"title":"Transformers","summary":"Self-attention based; scalable with parallel compute.","tags":["transformer","attention"]},
+    {"title":"Adam / AdamW","summary":"Adaptive optimizers; good default for many models.","tags":["optimizer","adam","adamw"]},
+    {"title":"Gradient Descent Variants","summary":"SGD, momentum, Nesterov; simple and effective.","tags":["optimizer","sgd","momentum"]},
+    {"title":"RL Paper: Model-Based RL (2024)","summary":"Focus on sample efficiency and planning.","tags":["reinforcement learning","model-based","2024"]},
+]
+
+def _item_key(item: Dict[str, Any]) -> Any:
+    return item.get("id") or item.get("title")
+
+class _Corpus:
+    """One immutable version of the corpus: its items, their BM25 index and the doc id <-> position maps."""
+    __slots__ = ("items", "index", "signature", "docs", "where", "digests", "next_doc")
+
+    def __init__(self, items: Sequence[Dict[str, Any]], index: Bm25Index, signature: Optional[list],
+                 docs: Optional[List[int]] = None, digests: Optional[List[bytes]] = None, next_doc: Optional[int] = None) -> None:
+        self.items = items
+        self.index = index
+        self.signature = signature
+        # index doc id of each item position; None while they coincide (until the first reload)
+        self.docs = docs
+        self.where = None if docs is None else {doc: pos for pos, doc in enumerate(docs)}
+        self.digests = digests
+        self.next_doc = next_doc if next_doc is not None else (len(items) if docs is None else max(docs, default=-1) + 1)
+
+    def item(self, doc: int) -> Dict[str, Any]:
+        return self.items[doc if self.where is None else self.where[doc]]
+
+    def doc(self, pos: int) -> int:
+        return pos if self.docs is None else self.docs[pos]
 
 class ResearchAgent:
-    def __init__(self, kb_path: str | None = None) -> None:
+    """
+    BM25 search over a local corpus: a JSON array of items, or a JSONL corpus
+    read lazily from a memory map.
+
+    reload() re-reads the corpus file when its size or mtime changed (watch()
+    polls it on a thread). Items are matched to the previous version by a
+    digest of their content, and only added and removed items touch the
+    index: the new index is a layered fork of the old one. Reading and
+    hashing the file is linear in its size; index work is proportional to
+    the change (amortized, see Bm25Index). The new version is swapped in as one reference, so a search in
+    flight finishes on the version it started with. Replace the file
+    atomically (write, then rename): the previous version may still read
+    items from it.
+    """
+    def __init__(self, kb_path: str | None = None, prebuilt: Tuple[Optional[List[Dict[str, Any]]], Bm25Index, Optional[List[int]]] | None = None,
+                 poll_interval: float = 0.0) -> None:
         self.name = "research"
-        # load local KB (JSON array of items)
-        if kb_path and os.path.exists(kb_path):
-            with open(kb_path, "r", encoding="utf-8") as f:
-                self.kb = json.load(f)
+        self.kb_path = kb_path
+        # bumped whenever the corpus changes; answer caches key on it
+        self.version = 0
+        self.reload_errors = 0
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        signature = source_signature(kb_path)
+        if prebuilt is not None:
+            # from a snapshot of the same corpus; a JSONL corpus is re-mapped from its file
+            items, index, docs = prebuilt
+            self._state = _Corpus(self._load() if items is None else items, index, signature, docs)
+        else:
+            items = self._load()
+            # normalized text and BM25 statistics are built once; search() only walks postings
+            index = Bm25Index()
+            for i, item in enumerate(items):
+                index.add(i, self._item_text(item))
+            self._state = _Corpus(items, index, signature)
+        if poll_interval > 0:
+            self.watch(poll_interval)
+
+    @property
+    def kb(self) -> Sequence[Dict[str, Any]]:
+        return self._state.items
+
+    @property
+    def index(self) -> Bm25Index:
+        return self._state.index
+
+    @property
+    def signature(self) -> Optional[list]:
+        return self._state.signature
+
+    def _load(self) -> Sequence[Dict[str, Any]]:
+        path = self.kb_path
+        if path and os.path.exists(path) and path.endswith(".jsonl"):
+            items = JsonlCorpus(path)
+        elif path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
         else:
-            self.kb = []
-        # ensure fallback items (light)
-        if not self.kb:
-            self.kb = [
-                {"title":"Feedforward Neural Networks (MLP)","summary":"Simple layered perceptrons; good for tabular tasks.","tags":["neural networks","mlp"]},
-                {"title":"Convolutional Neural Networks (CNN)","summary":"Weight sharing and local fields; strong for images.","tags":["neural networks","cnn"]},
-                {"title":"Recurrent Neural Networks (RNN, LSTM)","summary":"Sequence models; LSTM/GRU mitigate vanishing gradients.","tags":["neural networks","rnn","lstm"]},
-                {"title":"Transformers","summary":"Self-attention based; scalable with parallel compute.","tags":["transformer","attention"]},
-                {"title":"Adam / AdamW","summary":"Adaptive optimizers; good default for many models.","tags":["optimizer","adam","adamw"]},
-                {"title":"Gradient Descent Variants","summary":"SGD, momentum, Nesterov; simple and effective.","tags":["optimizer","sgd","momentum"]},
-                {"title":"RL Paper: Model-Based RL (2024)","summary":"Focus on sample efficiency and planning.","tags":["reinforcement learning","model-based","2024"]},
-            ]
+            items = []
+        return items if items else list(FALLBACK_ITEMS)
+
+    @staticmethod
+    def _digests(items: Sequence[Dict[str, Any]]) -> List[bytes]:
+        if isinstance(items, JsonlCorpus):
+            return [hashlib.blake2b(items.raw(i).strip(), digest_size=16).digest() for i in range(len(items))]
+        return [hashlib.blake2b(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=16).digest()
+                for item in items]
+
+    def reload(self, force: bool = False) -> Optional[Dict[str, int]]:
+        """
+        Apply the corpus file's changes; returns counts of added, changed and
+        removed items, or None when the file is unchanged (and not `force`)
+        or missing, e.g. between an unlink and a rename.
+        """
+        with self._reload_lock:
+            old = self._state
+            if self.kb_path and not os.path.exists(self.kb_path):
+                return None
+            signature = source_signature(self.kb_path)
+            if not force and signature == old.signature:
+                return None
+            items = self._load()
+            digests = self._digests(items)
+            unmatched: Dict[bytes, List[int]] = {}
+            for pos, digest in enumerate(old.digests if old.digests is not None else self._digests(old.items)):
+                unmatched.setdefault(digest, []).append(old.doc(pos))
+            docs: List[int] = []
+            added: List[int] = []
+            next_doc = old.next_doc
+            for pos, digest in enumerate(digests):
+                same = unmatched.get(digest)
+                if same:
+                    docs.append(same.pop(0))
+                else:
+                    docs.append(next_doc)
+                    added.append(pos)
+                    next_doc += 1
+            removed = [doc for same in unmatched.values() for doc in same]
+            index = old.index
+            if added or removed:
+                index = index.fork()
+                for doc in removed:
+                    index.remove(doc)
+                for pos in added:
+                    index.add(docs[pos], self._item_text(items[pos]))
+            # one reference swap: a search sees the old corpus or the new one, never a mix
+            self._state = _Corpus(items, index, signature, docs, digests, next_doc)
+            if added or removed:
+                self.version += 1
+            # an item removed and added under the same id/title was edited
+            changed = len({_item_key(old.item(doc)) for doc in removed} & {_item_key(items[pos]) for pos in added} - {None})
+            return {"added": len(added) - changed, "changed": changed, "removed": len(removed) - changed}
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Poll the corpus file every `interval` seconds on a daemon thread until close()."""
+        if self._watcher is not None:
+            return
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except (OSError, ValueError):
+                    # e.g. a file caught mid-write; its signature was not recorded, so the next poll retries
+                    self.reload_errors += 1
+        self._watcher = threading.Thread(target=run, name="research-reload", daemon=True)
+        self._watcher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    @staticmethod
+    def _item_text(item: Dict[str, Any]) -> str:
+        return item.get("title","") + " " + item.get("summary","") + " " + " ".join(item.get("tags",[]))
 
     def search(self, query: str, top_k: int = 6) -> Dict[str, Any]:
-        q = query.lower()
-        results: List[Dict[str, Any]] = []
-        for item in self.kb:
-            text = (item.get("title","") + " " + item.get("summary","") + " " + " ".join(item.get("tags",[]))).lower()
-            # match if any meaningful token in query appears in text
-            tokens = [t for t in q.split() if len(t) > 3]
-            if any(tok in text for tok in tokens):
-                results.append(item)
+        # meaningful query tokens; each also matches indexed terms containing it
+        tokens = [t for t in tokenize(query) if len(t) > 3]
+        state = self._state
+        ranked, matched = state.index.search(tokens, top_k)
+        # full item dicts are only materialized for the top-k results
+        results: List[Dict[str, Any]] = [state.item(doc) for doc, _ in ranked]
         if not results:
             # fallback: return top items
-            results = self.kb[:top_k]
-        return {"query": query, "results": results[:top_k], "timestamp": now_ts(), "confidence": round(min(1.0, 0.5 + 0.05*len(results)),3), "agent": self.name}
+            results = state.items[:top_k]
+        return {"query": query, "results": results, "timestamp": now_ts(), "confidence": round(min(1.0, 0.5 + 0.05*(matched or len(results))),3), "agent": self.name}
+
+    def snapshot_state(self) -> Tuple[Optional[List[Dict[str, Any]]], Bm25Index, Optional[List[int]]]:
+        # a JSONL corpus is re-mapped from its file, so only the index is kept
+        state = self._state
+        return (None if isinstance(state.items, JsonlCorpus) else state.items), state.index, state.docs
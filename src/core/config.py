@@ -1,6 +1,7 @@
 """Runtime configuration toggles (skeleton)."""
 from __future__ import annotations
 import os
+from typing import Dict, List
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,5 +10,82 @@ class Config:
     APP_NAME: str = "Simple MultiAgent Chat System"
     LOG_DIR: str = os.getenv("LOG_DIR", "outputs")
     VECTOR_DIM: int = int(os.getenv("VECTOR_DIM", "256"))
+    VECTOR_INDEX: str = os.getenv("VECTOR_INDEX", "exact")  # exact | ivf
+    IVF_NLIST: int = int(os.getenv("IVF_NLIST", "64"))
+    IVF_NPROBE: int = int(os.getenv("IVF_NPROBE", "8"))
+    RESEARCH_KB: str | None = os.getenv("RESEARCH_KB")  # .json array or .jsonl corpus
+    # seconds between checks of the research corpus file for changes (0 = only on ResearchAgent.reload())
+    RESEARCH_POLL_INTERVAL: float = float(os.getenv("RESEARCH_POLL_INTERVAL", "0"))
+    # semantic answer cache: reuse an answer when a same-intent question is this similar (0 disables)
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0"))
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "10000"))
+    # per-session conversation memory: recent-turn ring size and compaction into summaries
+    CONVO_MAX_TURNS: int = int(os.getenv("CONVO_MAX_TURNS", "200"))
+    CONVO_SUMMARY_TURNS: int = int(os.getenv("CONVO_SUMMARY_TURNS", "20"))
+    CONVO_MAX_SUMMARIES: int = int(os.getenv("CONVO_MAX_SUMMARIES", "10"))
+    # sessions kept in memory: least recently written dropped beyond CONVO_MAX_SESSIONS, or after
+    # CONVO_SESSION_TTL idle seconds (0 disables either)
+    CONVO_MAX_SESSIONS: int = int(os.getenv("CONVO_MAX_SESSIONS", "10000"))
+    CONVO_SESSION_TTL: float = float(os.getenv("CONVO_SESSION_TTL", "0"))
+    # memory stores: "memory" (in-process) or "sqlite" (MEMORY_DB, WAL mode)
+    MEMORY_BACKEND: str = os.getenv("MEMORY_BACKEND", "memory")
+    MEMORY_DB: str = os.getenv("MEMORY_DB", os.path.join(LOG_DIR, "memory.sqlite"))
+    MEMORY_CACHE_SIZE: int = int(os.getenv("MEMORY_CACHE_SIZE", "4096"))
+    KB_DIR: str | None = os.getenv("KB_DIR")  # saved KnowledgeBase to open at startup, written back on close()
+    # pooled HTTP/batch workers never write KB_DIR back: several processes would overwrite each other's saves
+    KB_SAVE_ON_CLOSE: bool = os.getenv("KB_SAVE_ON_CLOSE", "1") == "1"
+    # warm-start snapshot (see memory/snapshot.py) restored at startup when present
+    SNAPSHOT_PATH: str | None = os.getenv("SNAPSHOT_PATH")
+    # knowledge base growth: merge near-duplicates at this similarity (0 disables), cap size (0 = unlimited),
+    # expire records not rewritten for KB_TTL seconds (0 = never); KB_EVICTION: lru | lowest_confidence | oldest
+    KB_DEDUP_THRESHOLD: float = float(os.getenv("KB_DEDUP_THRESHOLD", "0"))
+    KB_MAX_RECORDS: int = int(os.getenv("KB_MAX_RECORDS", "0"))
+    KB_TTL: float = float(os.getenv("KB_TTL", "0"))
+    KB_EVICTION: str = os.getenv("KB_EVICTION", "lru")
+    # KB_SHARDS > 0 hash-partitions the in-memory KnowledgeBase across that many processes
+    KB_SHARDS: int = int(os.getenv("KB_SHARDS", "0"))
+    # AgentStateMemory: time partitions of AGENT_STATE_PARTITION seconds; partitions older than
+    # AGENT_STATE_RAW_RETENTION are downsampled, older than AGENT_STATE_RETENTION dropped (0 = keep);
+    # the sqlite backend applies AGENT_STATE_RETENTION only (rows are never downsampled)
+    AGENT_STATE_PARTITION: float = float(os.getenv("AGENT_STATE_PARTITION", "3600"))
+    AGENT_STATE_RAW_RETENTION: float = float(os.getenv("AGENT_STATE_RAW_RETENTION", "0"))
+    AGENT_STATE_RETENTION: float = float(os.getenv("AGENT_STATE_RETENTION", "0"))
+    INTENT_RULES: str | None = os.getenv("INTENT_RULES")  # JSON keyword rules (see core/intent.py); built-in rules if unset
+    # MemoryAgent.recall: "rrf" or "weighted" fusion of vector and keyword hits, optionally
+    # scaled by record confidence and halved every RECALL_HALF_LIFE seconds of age (0 disables)
+    RECALL_FUSION: str = os.getenv("RECALL_FUSION", "rrf")
+    RECALL_VECTOR_WEIGHT: float = float(os.getenv("RECALL_VECTOR_WEIGHT", "0.5"))
+    RECALL_CONFIDENCE_WEIGHT: float = float(os.getenv("RECALL_CONFIDENCE_WEIGHT", "0"))
+    RECALL_HALF_LIFE: float = float(os.getenv("RECALL_HALF_LIFE", "0"))
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    USE_LLM = bool(GROQ_API_KEY)
\ No newline at end of file
+    USE_LLM = bool(GROQ_API_KEY)
+    # LLM response cache (see core/llm.py); 0 entries disables it
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "3600"))
+    LLM_CACHE_PATH: str | None = os.getenv("LLM_CACHE_PATH")  # SQLite file for persistence
+    # the LLM intent call is only traced; set to 0 to skip it
+    LLM_INTENT_CALL: bool = os.getenv("LLM_INTENT_CALL", "1") == "1"
+    # HTTP service (see services/http.py): worker processes, per-worker request queue, answer timeout
+    HTTP_HOST: str = os.getenv("HTTP_HOST", "127.0.0.1")
+    HTTP_PORT: int = int(os.getenv("HTTP_PORT", "8080"))
+    HTTP_WORKERS: int = int(os.getenv("HTTP_WORKERS", str(os.cpu_count() or 1)))
+    HTTP_QUEUE_SIZE: int = int(os.getenv("HTTP_QUEUE_SIZE", "64"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "30"))
+    # message bus (see core/message_bus.py): per-recipient queue bound, trace ring size, full-queue policy
+    BUS_QUEUE_SIZE: int = int(os.getenv("BUS_QUEUE_SIZE", "1024"))
+    BUS_TRACE_SIZE: int = int(os.getenv("BUS_TRACE_SIZE", "1024"))
+    BUS_POLICY: str = os.getenv("BUS_POLICY", "drop_oldest")  # drop_oldest | drop_newest | block | error
+    # per-stage latency histograms and counters (see core/metrics.py)
+    METRICS: bool = os.getenv("METRICS", "1") == "1"
+    METRICS_WINDOW: int = int(os.getenv("METRICS_WINDOW", "2048"))  # samples kept per stage for quantiles
+    # trace sink (see core/trace.py)
+    TRACE_FLUSH_RECORDS: int = int(os.getenv("TRACE_FLUSH_RECORDS", "64"))
+    TRACE_FLUSH_INTERVAL: float = float(os.getenv("TRACE_FLUSH_INTERVAL", "1.0"))
+    # flush, rotate and compress on a background thread rather than in the request's write()
+    TRACE_BACKGROUND: bool = os.getenv("TRACE_BACKGROUND", "1") == "1"
+    TRACE_MAX_BYTES: int = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+    TRACE_BACKUPS: int = int(os.getenv("TRACE_BACKUPS", "3"))
+    TRACE_COMPRESS: bool = os.getenv("TRACE_COMPRESS", "1") == "1"
+    TRACE_DROP: List[str] = [e for e in os.getenv("TRACE_DROP", "").split(",") if e]
+    # e.g. TRACE_SAMPLE="analysis.result=0.1,llm.intent=0.5"
+    TRACE_SAMPLE: Dict[str, float] = {k: float(v) for k, v in (kv.split("=", 1) for kv in os.getenv("TRACE_SAMPLE", "").split(",") if "=" in kv)}
\ No newline at end of file
@@ -0,0 +1,117 @@
+# src/core/intent.py
+"""
+Keyword intent rules compiled into one regex scan.
+
+A rule names an intent and a list of keyword groups; it matches when every
+group has at least one keyword somewhere in the lowercased query (a plain
+substring test, as before). Rules are tried by descending priority, then
+file order; the first match wins, otherwise the default intent.
+
+Rules can be loaded from JSON (Config.INTENT_RULES):
+
+    {"default": "simple_query",
+     "rules": [{"intent": "compare_recommend", "all": [["compare"], ["recommend"]]},
+               {"intent": "memory_query", "any": ["earlier", "remember"], "priority": 10}]}
+"""
+from __future__ import annotations
+import json, re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+RESEARCH_KEYWORDS = ["research", "analyze", "analyze their", "trade-offs", "tradeoffs", "papers", "architectures",
+                     "efficiency", "methodologies", "challenges"]
+
+# the rules Coordinator._rule_intent used to hard-code, in the same order
+DEFAULT_RULES: Dict[str, Any] = {
+    "default": "simple_query",
+    "rules": [
+        {"intent": "memory_query", "any": ["what did we", "earlier", "remember", "discuss"]},
+        {"intent": "compare_recommend", "all": [["compare"], ["recommend"]]},
+        {"intent": "multi_step", "all": [RESEARCH_KEYWORDS, ["paper", "papers", "recent"]]},
+        {"intent": "complex_research", "any": RESEARCH_KEYWORDS},
+    ],
+}
+
+def _trie_regex(keywords: Iterable[str]) -> str:
+    # a prefix tree spelled as a regex: each position branches on one character instead of
+    # retrying every keyword, and optional tails are greedy, so the longest keyword wins
+    trie: Dict[str, Any] = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+class IntentEngine:
+    """
+    All keywords form one prefix-tree regex behind a lookahead, so every start
+    position is tried once and the match there is the longest keyword starting
+    at it. Each keyword carries a bitmask of the rule groups it
+    satisfies, including those of every shorter keyword it contains ("papers"
+    also counts as "paper"), so one pass over the query yields every group hit.
+    """
+    def __init__(self, rules: Sequence[Dict[str, Any]], default: str = "simple_query") -> None:
+        self.default = default
+        ordered = sorted(enumerate(rules), key=lambda ir: (-ir[1].get("priority", 0), ir[0]))
+        self.rules: List[Tuple[str, int]] = []
+        masks: Dict[str, int] = {}
+        bit = 0
+        for _, rule in ordered:
+            groups = rule["all"] if "all" in rule else [rule["any"]]
+            need = 0
+            for group in groups:
+                for kw in group:
+                    kw = kw.lower()
+                    masks[kw] = masks.get(kw, 0) | (1 << bit)
+                need |= 1 << bit
+                bit += 1
+            self.rules.append((rule["intent"], need))
+        # substring closure: a keyword implies every keyword it contains
+        self._masks = {kw: 0 for kw in masks}
+        for kw in masks:
+            for other, mask in masks.items():
+                if other in kw:
+                    self._masks[kw] |= mask
+        self._pattern = re.compile("(?=(" + _trie_regex(masks) + "))") if masks else None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any] | None = None) -> "IntentEngine":
+        config = config or DEFAULT_RULES
+        return cls(config["rules"], default=config.get("default", "simple_query"))
+
+    @classmethod
+    def from_file(cls, path: str) -> "IntentEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def matched(self, text: str) -> int:
+        if self._pattern is None:
+            return 0
+        hit = 0
+        masks = self._masks
+        for kw in self._pattern.findall(text.lower()):
+            hit |= masks[kw]
+        return hit
+
+    def classify(self, text: str) -> str:
+        hit = self.matched(text)
+        for intent, need in self.rules:
+            if hit & need == need:
+                return intent
+        return self.default
+
+    def classify_many(self, texts: Iterable[str]) -> List[str]:
+        classify = self.classify
+        return [classify(t) for t in texts]
+
+def load_engine(path: Optional[str] = None) -> IntentEngine:
+    return IntentEngine.from_file(path) if path else IntentEngine.from_config()
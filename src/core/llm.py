@@ -1,29 +1,129 @@
+from __future__ import annotations
+import hashlib, json, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from .config import Config
 
-try:
-    from groq import Groq
-except ImportError:
-    Groq = None
+class ResponseCache:
+    """
+    LRU cache of LLM completions keyed on (model, messages, max_tokens), with a
+    TTL and optional SQLite persistence so restarts and sibling processes reuse
+    earlier answers. Thread-safe; counts hits and misses.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: str | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, created REAL NOT NULL, value TEXT NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created)")
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        raw = json.dumps([model, messages, max_tokens], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _fresh(self, created: float) -> bool:
+        return self.ttl <= 0 or time.time() - created < self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT created, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is not None and self._fresh(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, value: str) -> None:
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO llm_cache (key, created, value) VALUES (?, ?, ?)", (key, *entry))
+                self._prune(entry[0])
+                self._db.commit()
+
+    def _prune(self, now: float) -> None:
+        # the table is bounded like the in-memory LRU: expired rows and all but the newest max_entries go
+        if self.ttl > 0:
+            self._db.execute("DELETE FROM llm_cache WHERE created <= ?", (now - self.ttl,))
+        self._db.execute("DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                         (max(self.max_entries, 0),))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
 
 class LLMClient:
-    def __init__(self):
-        self.enabled = Config.USE_LLM and Groq is not None
-        if self.enabled:
-            self.client = Groq(api_key=Config.GROQ_API_KEY)
+    MODEL = "mixtral-8x7b-32768"  # Groq free-tier model
+
+    def __init__(self, cache: ResponseCache | None = None):
+        self.enabled = False
+        if Config.USE_LLM:
+            # the SDK is only imported when a key is configured
+            try:
+                from groq import Groq
+            except ImportError:
+                Groq = None
+            if Groq is not None:
+                self.client = Groq(api_key=Config.GROQ_API_KEY)
+                self.enabled = True
+        if cache is None and Config.LLM_CACHE_SIZE > 0:
+            cache = ResponseCache(max_entries=Config.LLM_CACHE_SIZE, ttl=Config.LLM_CACHE_TTL, path=Config.LLM_CACHE_PATH)
+        self.cache = cache
 
     def classify_or_plan(self, query: str) -> str:
         if not self.enabled:
             return None
 
+        messages = [
+            {"role": "system", "content": "You are a task planner for a multi-agent system."},
+            {"role": "user", "content": query}
+        ]
+        max_tokens = 100
+        key = ResponseCache.key(self.MODEL, messages, max_tokens) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         try:
             resp = self.client.chat.completions.create(
-                model="mixtral-8x7b-32768",  # Groq free-tier model
-                messages=[
-                    {"role": "system", "content": "You are a task planner for a multi-agent system."},
-                    {"role": "user", "content": query}
-                ],
-                max_tokens=100,
+                model=self.MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
             )
-            return resp.choices[0].message.content
+            content = resp.choices[0].message.content
         except Exception:
-            return None
\ No newline at end of file
+            return None
+        if key and content:
+            self.cache.put(key, content)
+        return content
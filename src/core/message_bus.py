@@ -1,22 +1,166 @@
 # src/core/message_bus.py
+"""
+In-process message bus: per-recipient bounded queues, subscriber callbacks and
+a fixed-size trace of recent messages.
+
+A message is handed to every callback subscribed to its recipient (or to
+"*"), then queued if the recipient has a queue. Queues are opened by
+`open()`, `receive()` or `consume()`; a message to a recipient with neither
+a subscriber nor a queue is only traced. When a queue is full the bus's
+policy applies: "drop_oldest" (default), "drop_newest", "block" (waits up
+to `block_timeout`, then raises BusFull) or "error" (raises BusFull).
+"""
 from __future__ import annotations
+import threading
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+POLICIES = ("drop_oldest", "drop_newest", "block", "error")
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     sender: str
     recipient: str
     type: str
     payload: Dict[str, Any] = field(default_factory=dict)
 
+class BusFull(Exception):
+    pass
+
+class _Queue:
+    __slots__ = ("items", "not_empty", "not_full")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.items: Deque[Message] = deque()
+        self.not_empty = threading.Condition(lock)
+        self.not_full = threading.Condition(lock)
+
 class MessageBus:
-    def __init__(self) -> None:
-        self.trace: List[Message] = []
+    def __init__(self, queue_size: int = 1024, trace_size: int = 1024, policy: str = "drop_oldest",
+                 block_timeout: float = 1.0) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        # trace_size 0 disables the trace
+        self.trace: Deque[Message] = deque(maxlen=trace_size)
+        self.trace_size = trace_size
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self._subscribers: Dict[str, List[Callable[[Message], None]]] = {}
+        self._queues: Dict[str, _Queue] = {}
+        self._lock = threading.Lock()
+        self._consumers: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def subscribe(self, recipient: str, callback: Callable[[Message], None]) -> None:
+        """Call `callback` synchronously for each message to `recipient` ("*" for all)."""
+        with self._lock:
+            self._subscribers.setdefault(recipient, []).append(callback)
+
+    def unsubscribe(self, recipient: str, callback: Callable[[Message], None]) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(recipient, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def open(self, recipient: str) -> None:
+        with self._lock:
+            self._open(recipient)
+
+    def _open(self, recipient: str) -> _Queue:
+        q = self._queues.get(recipient)
+        if q is None:
+            q = self._queues[recipient] = _Queue(self._lock)
+        return q
 
     def send(self, msg: Message) -> None:
-        # capture the message; for this prototype agents are called synchronously
-        self.trace.append(msg)
+        with self._lock:
+            self.sent += 1
+            if self.trace_size:
+                self.trace.append(msg)
+            callbacks = self._subscribers.get(msg.recipient, []) + self._subscribers.get("*", [])
+            q = self._queues.get(msg.recipient)
+            if q is not None:
+                self._enqueue(q, msg)
+        for callback in callbacks:
+            callback(msg)
+
+    def _enqueue(self, q: _Queue, msg: Message) -> None:
+        # called with the lock held
+        if len(q.items) >= self.queue_size:
+            if self.policy == "drop_oldest":
+                q.items.popleft()
+                self.dropped += 1
+            elif self.policy == "drop_newest":
+                self.dropped += 1
+                return
+            elif self.policy == "error" or not q.not_full.wait_for(lambda: len(q.items) < self.queue_size, self.block_timeout):
+                self.dropped += 1
+                raise BusFull(f"queue for {msg.recipient} is full ({self.queue_size})")
+        q.items.append(msg)
+        q.not_empty.notify()
+
+    def receive(self, recipient: str, timeout: float | None = None) -> Optional[Message]:
+        """Next queued message for `recipient`, waiting up to `timeout` seconds (None waits forever)."""
+        with self._lock:
+            q = self._open(recipient)
+            if not q.not_empty.wait_for(lambda: q.items or self._stop.is_set(), timeout) or not q.items:
+                return None
+            msg = q.items.popleft()
+            q.not_full.notify()
+            return msg
+
+    def drain(self, recipient: str) -> List[Message]:
+        with self._lock:
+            q = self._queues.get(recipient)
+            if q is None:
+                return []
+            items = list(q.items)
+            q.items.clear()
+            q.not_full.notify_all()
+            return items
+
+    def pending(self, recipient: str) -> int:
+        q = self._queues.get(recipient)
+        return len(q.items) if q is not None else 0
+
+    def consume(self, recipient: str, handler: Callable[[Message], None]) -> threading.Thread:
+        """Run `handler` on a daemon thread for every message queued for `recipient` until close()."""
+        self.open(recipient)
+        def run() -> None:
+            while not self._stop.is_set():
+                msg = self.receive(recipient, timeout=0.5)
+                if msg is None:
+                    continue
+                try:
+                    handler(msg)
+                except Exception:
+                    # one bad message must not stop the consumer
+                    with self._lock:
+                        self.errors += 1
+        thread = threading.Thread(target=run, name=f"bus-{recipient}", daemon=True)
+        self._consumers.append(thread)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            for q in self._queues.values():
+                q.not_empty.notify_all()
+        for thread in self._consumers:
+            thread.join()
+        self._consumers.clear()
 
     def dump(self) -> List[Message]:
-        return list(self.trace)
+        with self._lock:
+            return list(self.trace)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"sent": self.sent, "dropped": self.dropped, "errors": self.errors, "traced": len(self.trace),
+                    "queued": {name: len(q.items) for name, q in self._queues.items()}}
@@ -0,0 +1,187 @@
+# src/core/metrics.py
+"""
+In-process latency histograms, counters and gauges for the Coordinator pipeline.
+
+    metrics = Metrics()
+    with metrics.span("research.search"):
+        ...
+    metrics.inc("llm_calls")
+    metrics.prometheus()   # Prometheus text exposition format
+    metrics.snapshot()     # JSON-serializable dict
+
+A disabled registry hands out one shared no-op span and returns early from
+every recording call, so instrumented code costs an attribute check.
+"""
+from __future__ import annotations
+import cProfile, functools, io, math, pstats, re, threading, time
+from array import array
+from typing import Any, Callable, Dict, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    """Count and sum of every observation; quantiles over the last `window` of them."""
+    def __init__(self, window: int = 2048) -> None:
+        self.window = window
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples = array("d")
+
+    def observe(self, value: float) -> None:
+        if len(self._samples) < self.window:
+            self._samples.append(value)
+        else:
+            self._samples[self.count % self.window] = value
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantiles(self, qs=QUANTILES) -> Dict[float, float]:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {q: 0.0 for q in qs}
+        # nearest-rank
+        return {q: ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))] for q in qs}
+
+class Span:
+    __slots__ = ("metrics", "name", "start", "elapsed")
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.name, self.elapsed)
+
+    @property
+    def ms(self) -> float:
+        return round(self.elapsed * 1000, 3)
+
+class _NullSpan:
+    __slots__ = ()
+    elapsed = 0.0
+    ms = 0.0
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+def _prom_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+class Metrics:
+    """
+    Thread-safe registry. Stage durations go to histograms (seconds), events
+    to monotonically increasing counters; gauges are set directly or read from
+    a callback when a snapshot is taken (e.g. the knowledge base size).
+    """
+    def __init__(self, enabled: bool = True, window: int = 2048, prefix: str = "machat_") -> None:
+        self.enabled = enabled
+        self.window = window
+        self.prefix = prefix
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self._callbacks: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def timed(self, name: str, fn: Callable) -> Callable:
+        """`fn` wrapped in a span; `fn` itself when disabled."""
+        if not self.enabled:
+            return fn
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(self.window)
+            hist.observe(seconds)
+
+    def inc(self, name: str, n: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float | Callable[[], float]) -> None:
+        if callable(value):
+            self._callbacks[name] = value
+        else:
+            self.gauges[name] = value
+
+    def _gauges(self) -> Dict[str, float]:
+        out = dict(self.gauges)
+        for name, fn in self._callbacks.items():
+            try:
+                out[name] = float(fn())
+            except Exception:
+                continue
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {}
+            for name, hist in self.histograms.items():
+                qs = hist.quantiles()
+                stages[name] = {"count": hist.count, "mean_ms": round(hist.sum / hist.count * 1000, 3) if hist.count else 0.0,
+                                "max_ms": round(hist.max * 1000, 3),
+                                **{f"p{int(q * 100)}_ms": round(v * 1000, 3) for q, v in qs.items()}}
+            counters = dict(self.counters)
+        return {"stages": stages, "counters": counters, "gauges": self._gauges()}
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, hist in sorted(self.histograms.items()):
+                metric = f"{self.prefix}{_prom_name(name)}_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for q, v in hist.quantiles().items():
+                    lines.append(f'{metric}{{quantile="{q}"}} {v:.6f}')
+                lines.append(f"{metric}_sum {hist.sum:.6f}")
+                lines.append(f"{metric}_count {hist.count}")
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            metric = f"{self.prefix}{_prom_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        for name, value in sorted(self._gauges().items()):
+            metric = f"{self.prefix}{_prom_name(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+def profile(fn: Callable, *args, sort: str = "cumulative", limit: int = 30, **kwargs) -> Tuple[Any, str]:
+    """Run `fn` under cProfile; returns its result and the formatted stats."""
+    prof = cProfile.Profile()
+    result = prof.runcall(fn, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
@@ -0,0 +1,135 @@
+# src/core/trace.py
+"""Buffered JSONL trace sink with size-based rotation."""
+from __future__ import annotations
+import atexit, gzip, json, os, random, shutil, threading, time, weakref
+from typing import Any, Dict, Iterable, List, Optional
+from .utils import now_ts
+
+# writers still open at exit are closed then; one dropped earlier flushes when collected
+_open_writers: "weakref.WeakSet[TraceWriter]" = weakref.WeakSet()
+
+@atexit.register
+def _flush_all() -> None:
+    for writer in list(_open_writers):
+        writer.close()
+
+def _background(ref: "weakref.ref[TraceWriter]", stop: threading.Event, wake: threading.Event, interval: float) -> None:
+    # holds the writer weakly, so an unclosed writer can still be collected
+    while not stop.is_set():
+        wake.wait(interval)
+        wake.clear()
+        writer = ref()
+        if writer is None:
+            return
+        writer.flush()
+        del writer
+
+class TraceWriter:
+    """
+    Collects trace records in memory and appends them to `path` in batches:
+    when `flush_records` are pending or `flush_interval` seconds have passed
+    since the last flush, and at close/exit. With `background`, a thread does
+    every flush (and so rotation and compression), off the writing thread;
+    without it, the write() that crosses a threshold flushes inline.
+    Files are rotated once they exceed `max_bytes` (0 disables rotation),
+    keeping `backups` old files, gzip-compressed if `compress` is set.
+    Events listed in `drop` are discarded; `sample` maps an event name to the
+    fraction of its records that is kept.
+    """
+    def __init__(self, path: str, flush_records: int = 64, flush_interval: float = 1.0,
+                 max_bytes: int = 0, backups: int = 3, compress: bool = False,
+                 drop: Iterable[str] | None = None, sample: Dict[str, float] | None = None,
+                 background: bool = True) -> None:
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.compress = compress
+        self.drop = set(drop or ())
+        self.sample = dict(sample or {})
+        self.dropped = 0
+        self._buf: List[str] = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=_background, args=(weakref.ref(self), self._stop, self._wake, flush_interval),
+                                            name="trace-writer", daemon=True)
+            self._thread.start()
+        _open_writers.add(self)
+
+    def write(self, event: str, payload: Dict[str, Any]) -> None:
+        if event in self.drop or (event in self.sample and random.random() >= self.sample[event]):
+            self.dropped += 1
+            return
+        # serialize now so later mutation of the payload cannot change the record
+        line = json.dumps({"timestamp": now_ts(), "event": event, "payload": payload}, ensure_ascii=False)
+        with self._lock:
+            self._buf.append(line)
+            pending = len(self._buf)
+        if self._closed:
+            self.flush()
+        elif pending >= self.flush_records or time.monotonic() - self._last_flush >= self.flush_interval:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def flush(self) -> None:
+        # _lock only guards the buffer swap, so write() never waits on file I/O or
+        # rotation; _io_lock is taken first so concurrent flushes append in order
+        with self._io_lock:
+            with self._lock:
+                lines, self._buf = self._buf, []
+                self._last_flush = time.monotonic()
+            if not lines:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+
+    def _backup(self, n: int) -> str:
+        return f"{self.path}.{n}" + (".gz" if self.compress else "")
+
+    def _rotate(self) -> None:
+        # trace.jsonl -> trace.jsonl.1[.gz] -> ... -> trace.jsonl.<backups>[.gz]
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(self._backup(n)):
+                os.replace(self._backup(n), self._backup(n + 1))
+        if self.compress:
+            with open(self.path, "rb") as src, gzip.open(self._backup(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self._backup(1))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        _open_writers.discard(self)
+
+    def __del__(self) -> None:
+        # an unclosed writer that is collected still writes out its buffer
+        try:
+            if not self._closed:
+                self._stop.set()
+                self._wake.set()
+                self.flush()
+        except Exception:
+            pass
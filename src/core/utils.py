@@ -10,6 +10,17 @@ def now_ts() -> str:
 def gen_id(prefix: str) -> str:
     return f"{prefix}_{uuid.uuid4().hex[:10]}"
 
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK64 = (1 << 64) - 1
+
+def fnv1a_64(text: str, seed: int = 0) -> int:
+    # stable across processes, unlike the salted built-in hash()
+    h = (_FNV_OFFSET ^ seed) & _MASK64
+    for b in text.encode("utf-8"):
+        h = ((h ^ b) * _FNV_PRIME) & _MASK64
+    return h
+
 def to_json(obj: Any) -> str:
     try:
         return json.dumps(obj, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,127 @@
+# src/data/corpus.py
+"""
+JSONL research corpora: one item per line, fetched lazily from a memory map.
+
+Convert an existing JSON array corpus with:
+
+    python -m src.data.corpus knowledge_base.json knowledge_base.jsonl
+"""
+from __future__ import annotations
+import argparse, json, mmap, os
+from array import array
+from typing import Any, Dict, Iterator, List
+
+class JsonlCorpus:
+    """
+    Read-only sequence over a JSONL file. Only the line offsets are held in
+    memory; items are parsed from the mapped file when indexed or iterated.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._f = open(path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = array("Q")
+        self._scan()
+
+    def _scan(self) -> None:
+        mm, pos, end = self._mm, 0, len(self._mm)
+        while pos < end:
+            nl = mm.find(b"\n", pos)
+            stop = end if nl == -1 else nl
+            if mm[pos:stop].strip():
+                self.offsets.append(pos)
+            pos = stop + 1
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def raw(self, i: int) -> bytes:
+        pos = self.offsets[i]
+        nl = self._mm.find(b"\n", pos)
+        return self._mm[pos:nl if nl != -1 else len(self._mm)]
+
+    def _load(self, pos: int) -> Dict[str, Any]:
+        nl = self._mm.find(b"\n", pos)
+        return json.loads(self._mm[pos:nl if nl != -1 else len(self._mm)])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._load(pos) for pos in self.offsets[i]]
+        return self._load(self.offsets[i])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for pos in self.offsets:
+            yield self._load(pos)
+
+    def __bool__(self) -> bool:
+        return len(self.offsets) > 0
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._f.close()
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the elements of the JSON array in `path` one at a time. The file is
+    read in `chunk_size` pieces, so only the element being decoded (plus one
+    chunk) is resident, never the whole array.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof, want = "", 0, False, chunk_size
+
+        def fill() -> None:
+            nonlocal buf, pos, eof
+            data = f.read(want)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+
+        while "[" not in buf:
+            fill()
+            if eof:
+                raise ValueError(f"{path}: not a JSON array")
+        pos = buf.index("[") + 1
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                fill()
+                if eof:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # an element running to the end of the buffer may be cut short (e.g. a number)
+            if end is None or (end == len(buf) and not eof):
+                # an element larger than the buffer: read more per retry, so decoding stays linear
+                want = max(want, 2 * (len(buf) - pos))
+                fill()
+                continue
+            want = chunk_size
+            pos = end
+            yield item
+
+def convert_json_to_jsonl(src: str, dst: str) -> int:
+    count = 0
+    tmp = dst + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        for item in iter_json_array(src):
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp, dst)
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a JSON array corpus to JSONL.")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    args = parser.parse_args()
+    print(f"Wrote {convert_json_to_jsonl(args.src, args.dst)} items to {args.dst}")
@@ -1,10 +1,17 @@
 # src/main.py
 from __future__ import annotations
-import argparse, os
+import argparse, os, sys
 from .services.app import build_coordinator
-from dotenv import load_dotenv
+from .core.config import Config
 
-load_dotenv()
+# (output file, prompt); also replayed by benchmarks/replay.py
+SCENARIOS = [
+    ("simple_query.txt", "What are the main types of neural networks?"),
+    ("complex_query.txt", "Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs."),
+    ("memory_test.txt", "What did we discuss about neural networks earlier?"),
+    ("multi_step.txt", "Find recent papers on reinforcement learning, analyze their methodologies, and identify common challenges."),
+    ("collaborative.txt", "Compare two machine-learning approaches and recommend which is better for our use case."),
+]
 
 def run_cli() -> None:
     co = build_coordinator()
@@ -25,25 +32,68 @@ def run_scenarios() -> None:
     co = build_coordinator()
     outputs_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "outputs"))
     os.makedirs(outputs_dir, exist_ok=True)
-    scenarios = [
-        ("simple_query.txt", "What are the main types of neural networks?"),
-        ("complex_query.txt", "Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs."),
-        ("memory_test.txt", "What did we discuss about neural networks earlier?"),
-        ("multi_step.txt", "Find recent papers on reinforcement learning, analyze their methodologies, and identify common challenges."),
-        ("collaborative.txt", "Compare two machine-learning approaches and recommend which is better for our use case."),
-    ]
-    for fname, prompt in scenarios:
+    for fname, prompt in SCENARIOS:
         ans = co.handle_user_query(prompt)
         path = os.path.join(outputs_dir, fname)
         with open(path, "w", encoding="utf-8") as f:
             f.write(f"User: {prompt}\n\nManager:\n{ans}\n")
     print(f"Wrote outputs to: {outputs_dir}")
 
+def run_snapshot(args: argparse.Namespace) -> None:
+    co = build_coordinator()
+    try:
+        path = co.save_snapshot(args.snapshot)
+    finally:
+        co.close()
+    print(f"Wrote snapshot to: {path}", file=sys.stderr)
+
+def run_batch_mode(args: argparse.Namespace) -> None:
+    # the service modules (and their multiprocessing setup) load only for their mode
+    from .services.batch import run_batch
+    inp = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = run_batch(inp, out, workers=args.workers or os.cpu_count() or 1, chunk_size=args.chunk_size, max_inflight=args.max_inflight)
+    finally:
+        for f in (inp, out):
+            if f not in (sys.stdin, sys.stdout):
+                f.close()
+    print(f"Answered {count} queries", file=sys.stderr)
+
+def run_serve(args: argparse.Namespace) -> None:
+    from .services.http import ChatService
+    workers = args.workers or Config.HTTP_WORKERS
+    service = ChatService(host=args.host, port=args.port, workers=workers, queue_size=args.queue_size, timeout=args.timeout)
+    host, port = service.address
+    print(f"Serving on http://{host}:{port} with {workers} workers", file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=["cli","scenarios"], default="cli")
+    parser.add_argument("--mode", choices=["cli","scenarios","batch","serve","snapshot"], default="cli")
+    parser.add_argument("--input", default="-", help="batch: JSONL queries (- for stdin)")
+    parser.add_argument("--output", default="-", help="batch: JSONL answers (- for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="batch/serve: worker processes (default: CPU count / HTTP_WORKERS)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="batch: queries sent to a worker at a time")
+    parser.add_argument("--max-inflight", type=int, default=None, help="batch: queued chunks (default 2 x workers)")
+    parser.add_argument("--host", default=Config.HTTP_HOST, help="serve: bind address")
+    parser.add_argument("--port", type=int, default=Config.HTTP_PORT, help="serve: port")
+    parser.add_argument("--queue-size", type=int, default=Config.HTTP_QUEUE_SIZE, help="serve: outstanding requests per worker before 503")
+    parser.add_argument("--timeout", type=float, default=Config.HTTP_TIMEOUT, help="serve: seconds before 504")
+    parser.add_argument("--snapshot", default=None, help="snapshot: file to write (default SNAPSHOT_PATH or outputs/snapshot.bin)")
     args = parser.parse_args()
     if args.mode == "cli":
         run_cli()
+    elif args.mode == "batch":
+        run_batch_mode(args)
+    elif args.mode == "serve":
+        run_serve(args)
+    elif args.mode == "snapshot":
+        run_snapshot(args)
     else:
         run_scenarios()
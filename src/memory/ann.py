@@ -0,0 +1,114 @@
+# src/memory/ann.py
+from __future__ import annotations
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class IVFIndex:
+    """
+    Inverted-file ANN index for SimpleVectorStore.
+    A spherical k-means quantizer splits the stored vectors into `nlist` cells;
+    a query only scores the rows of its `nprobe` closest cells. Raising nprobe
+    trades latency for recall (nprobe == nlist is an exact scan).
+    Until the store holds `train_min` vectors the index stays untrained and
+    searches fall back to the exact scan.
+    """
+    def __init__(self, nlist: int = 64, nprobe: int = 8, train_min: int | None = None, iters: int = 10, seed: int = 0) -> None:
+        if np is None:
+            raise ImportError("IVFIndex requires numpy")
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min if train_min is not None else nlist * 16
+        self.iters = iters
+        self.seed = seed
+        self.store = None
+        self.centroids = None
+        self.cells: List[Dict[str, None]] = []
+        self.assign: Dict[str, int] = {}
+        self.trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def attach(self, store) -> None:
+        self.store = store
+
+    def _kmeans(self, data):
+        rng = np.random.default_rng(self.seed)
+        k = min(self.nlist, len(data))
+        cent = data[rng.choice(len(data), k, replace=False)].copy()
+        for _ in range(self.iters):
+            labels = np.argmax(data @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, labels, data)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            if empty.any():
+                # reseed empty cells from random points instead of letting them die
+                sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            cent = sums / np.maximum(norms, 1e-12)[:, None]
+        return cent.astype(np.float32)
+
+    def train(self) -> None:
+        mat = self.store.matrix()
+        if not len(mat):
+            return
+        sample = mat
+        cap = self.nlist * 256
+        if len(mat) > cap:
+            rows = np.random.default_rng(self.seed).choice(len(mat), cap, replace=False)
+            sample = mat[rows]
+        self.centroids = self._kmeans(sample)
+        self.cells = [dict() for _ in range(len(self.centroids))]
+        self.assign = {}
+        labels = np.argmax(mat @ self.centroids.T, axis=1)
+        for key, cell in zip(self.store.ids, labels.tolist()):
+            self.cells[cell][key] = None
+            self.assign[key] = cell
+        self.trained_size = len(mat)
+
+    def add(self, key: str, vec) -> None:
+        if not self.trained:
+            if len(self.store) >= self.train_min:
+                self.train()
+            return
+        if len(self.store) >= 4 * self.trained_size:
+            # the corpus has drifted far from the training sample; re-cluster everything
+            self.train()
+            return
+        self.remove(key)
+        cell = int(np.argmax(self.centroids @ vec))
+        self.cells[cell][key] = None
+        self.assign[key] = cell
+
+    def remove(self, key: str) -> None:
+        cell = self.assign.pop(key, None)
+        if cell is not None:
+            self.cells[cell].pop(key, None)
+
+    def candidates(self, qv, nprobe: int | None = None) -> Optional[object]:
+        """Matrix rows worth scoring for `qv`, or None to request an exact scan."""
+        if not self.trained:
+            return None
+        probe = min(nprobe or self.nprobe, len(self.centroids))
+        if probe >= len(self.centroids):
+            return None
+        sims = self.centroids @ qv
+        cells = np.argpartition(-sims, probe - 1)[:probe]
+        rows = self.store.rows
+        cand = [rows[k] for c in cells.tolist() for k in self.cells[c]]
+        return np.sort(np.fromiter(cand, dtype=np.int64, count=len(cand)))
+
+def build_index(kind: str | None, **opts):
+    """Factory used by KnowledgeBase; returns None for the exact scan."""
+    if kind in (None, "", "exact"):
+        return None
+    if kind == "ivf":
+        # without numpy the store has no matrix to index; stay on the exact scan
+        return IVFIndex(**opts) if np is not None else None
+    raise ValueError(f"unknown vector index: {kind}")
@@ -0,0 +1,79 @@
+# src/memory/answer_cache.py
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .vector_store import SimpleVectorStore
+from .stores import KnowledgeBase, KnowledgeRecord
+
+class SemanticAnswerCache:
+    """
+    Maps previously answered questions to the KnowledgeRecord holding the answer.
+    A new question reuses that answer when its embedding is at least `threshold`
+    similar to a cached question of the same intent and the research corpus
+    version has not changed since. Entries whose record left the KB are skipped.
+    Thread-safe: concurrent requests look up and add under one lock.
+    """
+    def __init__(self, kb: KnowledgeBase, threshold: float = 0.92, max_entries: int = 10000, candidates: int = 3) -> None:
+        self.kb = kb
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.candidates = candidates
+        self.questions = SimpleVectorStore(dim=kb.vector_dim)
+        # question key -> (intent, record id, corpus version), oldest first
+        self.entries: "OrderedDict[str, Tuple[str, str, Any]]" = OrderedDict()
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # the question store swaps rows on remove, so searches and writes must not interleave
+        self._lock = threading.Lock()
+
+    def add(self, question: str, intent: str, rec_id: str, version: Any) -> None:
+        with self._lock:
+            key = f"q{self._next}"
+            self._next += 1
+            self.questions.add(key, question)
+            self.entries[key] = (intent, rec_id, version)
+            while len(self.entries) > self.max_entries:
+                old, _ = self.entries.popitem(last=False)
+                self.questions.remove(old)
+
+    def _drop(self, key: str) -> None:
+        self.entries.pop(key, None)
+        self.questions.remove(key)
+
+    def lookup(self, question: str, intent: str, version: Any) -> Optional[Tuple[KnowledgeRecord, float]]:
+        with self._lock:
+            hits = []
+            for key, score in self.questions.search(question, top_k=self.candidates):
+                if score < self.threshold:
+                    break
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] == intent:
+                    hits.append((key, score, entry[1], entry[2]))
+        # the KB is read outside the lock: a writer may hold the KB's lock while it adds here
+        for key, score, rec_id, cached_version in hits:
+            rec = self.kb.get(rec_id) if cached_version == version else None
+            with self._lock:
+                if rec is None:
+                    self.invalidations += 1
+                    self._drop(key)
+                    continue
+                self.hits += 1
+            return rec, score
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.questions = SimpleVectorStore(dim=self.questions.dim)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "entries": len(self.entries), "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -1,32 +1,120 @@
-"""Dataclasses for memory records (skeleton)."""
+"""
+Memory records, shared by every store.
+
+Records are slotted (no per-instance __dict__). Topics are kept as tuples of
+interned strings, so a topic repeated across records is stored once, and
+the low-cardinality fields (role, source, agent) are interned the same way.
+The metadata / provenance / metrics dict is created on first access: the
+record holds None until something is written to it.
+"""
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Dict, Any, List
-
-@dataclass
-class ConversationTurn:
-    id: str
-    timestamp: str
-    role: str
-    content: str
-    metadata: Dict[str, Any] = field(default_factory=dict)
-
-@dataclass
-class KnowledgeRecord:
-    id: str
-    timestamp: str
-    topic: List[str]
-    content: str
-    source: str
-    agent: str
-    confidence: float
-    provenance: Dict[str, Any] = field(default_factory=dict)
-
-@dataclass
-class AgentStateRecord:
-    id: str
-    timestamp: str
-    agent: str
-    task: str
-    result_summary: str
-    metrics: Dict[str, Any] = field(default_factory=dict)
+import sys
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+def intern_topics(topics: Iterable[str] | None) -> Tuple[str, ...]:
+    return tuple(_intern(t) for t in topics or ())
+
+class _Record:
+    __slots__ = ()
+    # constructor fields in order; the lazily created dict is the last one
+    _fields: Tuple[str, ...] = ()
+
+    def _values(self) -> Tuple[Any, ...]:
+        # the lazy dict is read from its slot, so comparing or printing never creates it
+        return tuple(getattr(self, f) for f in self._fields[:-1]) + (getattr(self, self.__slots__[-1]) or {},)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = dict(zip(self._fields, self._values()))
+        if "topic" in out:
+            out["topic"] = list(out["topic"])
+        return out
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # mutable, like the dataclasses these replace
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(" + ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self._values())) + ")"
+
+class ConversationTurn(_Record):
+    __slots__ = ("id", "timestamp", "role", "content", "_metadata")
+    _fields = ("id", "timestamp", "role", "content", "metadata")
+
+    def __init__(self, id: str, timestamp: str, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.id = id
+        self.timestamp = timestamp
+        self.role = _intern(role)  # user | manager | agent | summary
+        self.content = content
+        self._metadata = metadata or None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Optional[Dict[str, Any]]) -> None:
+        self._metadata = value
+
+class KnowledgeRecord(_Record):
+    __slots__ = ("id", "timestamp", "_topic", "content", "source", "agent", "confidence", "_provenance")
+    _fields = ("id", "timestamp", "topic", "content", "source", "agent", "confidence", "provenance")
+
+    def __init__(self, id: str, timestamp: str, topic: Iterable[str], content: str, source: str, agent: str,
+                 confidence: float, provenance: Optional[Dict[str, Any]] = None) -> None:
+        self.id = id
+        self.timestamp = timestamp
+        self._topic = intern_topics(topic)
+        self.content = content
+        self.source = _intern(source)
+        self.agent = _intern(agent)
+        self.confidence = confidence
+        self._provenance = provenance or None
+
+    @property
+    def topic(self) -> Tuple[str, ...]:
+        return self._topic
+
+    @topic.setter
+    def topic(self, value: Iterable[str]) -> None:
+        self._topic = intern_topics(value)
+
+    @property
+    def provenance(self) -> Dict[str, Any]:
+        if self._provenance is None:
+            self._provenance = {}
+        return self._provenance
+
+    @provenance.setter
+    def provenance(self, value: Optional[Dict[str, Any]]) -> None:
+        self._provenance = value
+
+class AgentStateRecord(_Record):
+    __slots__ = ("id", "timestamp", "agent", "task", "result_summary", "_metrics")
+    _fields = ("id", "timestamp", "agent", "task", "result_summary", "metrics")
+
+    def __init__(self, id: str, timestamp: str, agent: str, task: str, result_summary: str,
+                 metrics: Optional[Dict[str, Any]] = None) -> None:
+        self.id = id
+        self.timestamp = timestamp
+        self.agent = _intern(agent)
+        self.task = task
+        self.result_summary = result_summary
+        self._metrics = metrics or None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        if self._metrics is None:
+            self._metrics = {}
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: Optional[Dict[str, Any]]) -> None:
+        self._metrics = value
@@ -0,0 +1,376 @@
+# src/memory/sharded.py
+"""
+A KnowledgeBase hash-partitioned across worker processes.
+
+Each shard process owns an ordinary KnowledgeBase. Record ids are placed on
+a consistent-hash ring (`vnodes` points per shard), so adding or
+removing a shard only moves the records that change owner. Searches are
+scattered to every shard at once and the per-shard top-k lists merged;
+hybrid search gathers each shard's candidates and fuses them with
+rank_hybrid. Weighted fusion then ranks as a single KnowledgeBase would; RRF
+can differ, since keyword hits are unranked and concatenated in shard order,
+so their ranks are not the ones one store would give.
+
+add_shard() and remove_shard() run while searches continue: records are
+copied to their new owner before the ring switches and only then dropped
+from the old one (results are de-duplicated by id in between). Writes wait
+for a rebalance to finish. Growth limits (dedup, TTL, max_records) apply per
+shard.
+
+A failing call raises RuntimeError only after every shard's reply has been
+read. A shard whose process dies is restarted empty under the same id, and
+the call that found it raises; stats() counts restarts per shard.
+"""
+from __future__ import annotations
+import bisect, contextlib, heapq, itertools, multiprocessing as mp, signal, threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from ..core.utils import fnv1a_64
+from .schema import KnowledgeRecord
+from .stores import KnowledgeBase, _epoch, rank_hybrid
+
+_MASK64 = (1 << 64) - 1
+
+def ring_hash(key: str) -> int:
+    # FNV-1a clusters keys that differ only in their last characters ("k1", "k2", ...);
+    # the murmur3 finalizer spreads them over the ring
+    h = fnv1a_64(key)
+    h = ((h ^ (h >> 33)) * 0xff51afd7ed558ccd) & _MASK64
+    h = ((h ^ (h >> 33)) * 0xc4ceb9fe1a85ec53) & _MASK64
+    return h ^ (h >> 33)
+
+class HashRing:
+    def __init__(self, shard_ids: Sequence[int] = (), vnodes: int = 64) -> None:
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, int]] = []
+        for shard_id in shard_ids:
+            self.add(shard_id)
+
+    def add(self, shard_id: int) -> None:
+        self._points.extend((ring_hash(f"shard-{shard_id}-{v}"), shard_id) for v in range(self.vnodes))
+        self._points.sort()
+
+    def remove(self, shard_id: int) -> None:
+        self._points = [p for p in self._points if p[1] != shard_id]
+
+    def copy(self) -> "HashRing":
+        ring = HashRing(vnodes=self.vnodes)
+        ring._points = list(self._points)
+        return ring
+
+    def owner(self, key: str) -> int:
+        if not self._points:
+            raise LookupError("hash ring is empty")
+        i = bisect.bisect(self._points, (ring_hash(key), -1))
+        return self._points[i % len(self._points)][1]
+
+def _export(kb: KnowledgeBase, ring: HashRing, shard_id: int) -> List[Tuple[KnowledgeRecord, Optional[float]]]:
+    return [(rec, kb._written.get(rec.id)) for rec in kb.records.values() if ring.owner(rec.id) != shard_id]
+
+def _import(kb: KnowledgeBase, items: List[Tuple[KnowledgeRecord, Optional[float]]]) -> int:
+    # moved records keep their last-write time, so TTL and recency survive a rebalance
+    for rec, _ in items:
+        kb._store(rec)
+        kb._scope(rec.id, rec.provenance)
+    kb._track_all((rec.id, rec.confidence, _epoch(rec.timestamp) if written is None else written) for rec, written in items)
+    return len(items)
+
+def _drop(kb: KnowledgeBase, ids: List[str]) -> int:
+    return sum(kb.remove(rec_id) is not None for rec_id in ids)
+
+_OPS = {
+    "add": lambda kb, recs: [kb.add(rec) for rec in recs],
+    "get": lambda kb, rec_id: kb.get(rec_id),
+    "remove": lambda kb, rec_id: kb.remove(rec_id),
+    "ids": lambda kb: list(kb.records),
+    "count": lambda kb: len(kb.records),
+    "search_vector": lambda kb, query, top_k: kb.search_vector(query, top_k),
+    "search_keyword": lambda kb, query, top_k: kb.search_keyword(query, top_k),
+    "hybrid_candidates": lambda kb, query, pool, match: kb._hybrid_candidates(query, pool, match),
+    "touch": lambda kb, ids: kb._mark_used(ids),
+    "expire": lambda kb: kb.expire(),
+    "stats": lambda kb: {"records": len(kb.records), "merged": kb.merged, "evicted": kb.evicted},
+    "export": _export,
+    "import": _import,
+    "drop": _drop,
+}
+
+def _shard_main(conn, vector_dim: int, index: Optional[str], index_opts: Dict, limits: Dict[str, Any]) -> None:
+    # Ctrl-C reaches the whole process group; the owner closes shards
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    kb = KnowledgeBase(vector_dim=vector_dim, index=index, index_opts=index_opts, **limits)
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        op, args = msg
+        try:
+            reply = ("ok", _OPS[op](kb, *args))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except Exception as e:
+            conn.send(("error", f"unpicklable reply: {type(e).__name__}: {e}"))
+    conn.close()
+
+class _Shard:
+    def __init__(self, shard_id: int, vector_dim: int, index: Optional[str], index_opts: Dict, limits: Dict[str, Any]) -> None:
+        self.id = shard_id
+        self._spec = (vector_dim, index, index_opts, limits)
+        self.restarts = 0
+        self._spawn()
+        self.lock = threading.Lock()
+
+    def _spawn(self) -> None:
+        self.conn, child = mp.Pipe()
+        self.proc = mp.Process(target=_shard_main, args=(child, *self._spec), name=f"kb-shard-{self.id}", daemon=True)
+        self.proc.start()
+        child.close()
+
+    def _restart(self) -> Tuple[str, str]:
+        # a dead shard is replaced by an empty one under the same id, so the ring is unchanged
+        self.proc.join(timeout=1)
+        code = self.proc.exitcode
+        self.conn.close()
+        self._spawn()
+        self.restarts += 1
+        return "error", f"process exited (code {code}); restarted empty, its records are lost"
+
+    def send(self, op: str, *args: Any) -> Optional[Tuple[str, str]]:
+        """Send a request; returns None, or the error reply that stands in for its answer."""
+        try:
+            self.conn.send((op, args))
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            return self._restart()
+        except Exception as e:
+            # not picklable: nothing was written, so no reply is owed
+            return "error", f"{type(e).__name__}: {e}"
+        return None
+
+    def reply(self) -> Tuple[str, Any]:
+        try:
+            return self.conn.recv()
+        except (EOFError, ConnectionResetError, OSError):
+            return self._restart()
+
+    def exchange(self, op: str, *args: Any) -> Tuple[str, Any]:
+        # caller holds self.lock
+        return self.send(op, *args) or self.reply()
+
+    def call(self, op: str, *args: Any) -> Any:
+        with self.lock:
+            return _unwrap([self], [self.exchange(op, *args)])[0]
+
+    def close(self) -> None:
+        with self.lock:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.proc.join(timeout=5)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.conn.close()
+
+def _unwrap(shards: Sequence[_Shard], replies: Sequence[Tuple[str, Any]]) -> List[Any]:
+    # every reply has been read by now, so no pipe is left holding a stale one
+    for shard, (status, value) in zip(shards, replies):
+        if status != "ok":
+            raise RuntimeError(f"shard {shard.id}: {value}")
+    return [value for _, value in replies]
+
+class _ShardedRecords(Mapping):
+    """Read-only mapping view over every shard's records (each access is a round trip)."""
+    def __init__(self, kb: "ShardedKnowledgeBase") -> None:
+        self._kb = kb
+
+    def __getitem__(self, rec_id: str) -> KnowledgeRecord:
+        rec = self._kb.get(rec_id)
+        if rec is None:
+            raise KeyError(rec_id)
+        return rec
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(itertools.chain.from_iterable(self._kb._scatter("ids"))))
+
+    def __len__(self) -> int:
+        return len(self._kb)
+
+class ShardedKnowledgeBase:
+    def __init__(self, shards: int = 2, vector_dim: int = 256, index: str | None = None, index_opts: Dict | None = None,
+                 vnodes: int = 64, **limits: Any) -> None:
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.vector_dim = vector_dim
+        self._spec = (vector_dim, index, index_opts or {}, limits)
+        self._next_id = itertools.count()
+        self._shards: Dict[int, _Shard] = {}
+        for _ in range(shards):
+            shard = self._start_shard()
+            self._shards[shard.id] = shard
+        self.ring = HashRing(self._shards, vnodes=vnodes)
+        # held by writers and by rebalancing; readers never take it
+        self._write_lock = threading.RLock()
+        self.records = _ShardedRecords(self)
+
+    def _start_shard(self) -> _Shard:
+        return _Shard(next(self._next_id), *self._spec)
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return list(self._shards)
+
+    def _scatter(self, op: str, *args: Any, shards: Sequence[_Shard] | None = None) -> List[Any]:
+        # send to every shard before reading any reply, so they work in parallel;
+        # locks are taken in shard-id order, so concurrent scatters cannot deadlock
+        targets = sorted(shards or list(self._shards.values()), key=lambda s: s.id)
+        with contextlib.ExitStack() as stack:
+            for shard in targets:
+                stack.enter_context(shard.lock)
+            failed = [shard.send(op, *args) for shard in targets]
+            return _unwrap(targets, [f or shard.reply() for shard, f in zip(targets, failed)])
+
+    def _owner(self, rec_id: str) -> _Shard:
+        return self._shards[self.ring.owner(rec_id)]
+
+    def __len__(self) -> int:
+        return sum(self._scatter("count"))
+
+    def batch(self):
+        return contextlib.nullcontext()
+
+    def add(self, rec: KnowledgeRecord) -> KnowledgeRecord:
+        """Store `rec` on its shard; returns the record that holds it (a copy, from the shard process)."""
+        with self._write_lock:
+            return self._owner(rec.id).call("add", [rec])[0]
+
+    def add_many(self, recs: Sequence[KnowledgeRecord]) -> int:
+        by_shard: Dict[int, List[KnowledgeRecord]] = {}
+        with self._write_lock:
+            for rec in recs:
+                by_shard.setdefault(self.ring.owner(rec.id), []).append(rec)
+            targets = [self._shards[i] for i in by_shard]
+            with contextlib.ExitStack() as stack:
+                for shard in sorted(targets, key=lambda s: s.id):
+                    stack.enter_context(shard.lock)
+                failed = [shard.send("add", by_shard[shard.id]) for shard in targets]
+                replies = _unwrap(targets, [f or shard.reply() for shard, f in zip(targets, failed)])
+                return sum(len(added) for added in replies)
+
+    def get(self, rec_id: str) -> Optional[KnowledgeRecord]:
+        return self._owner(rec_id).call("get", rec_id)
+
+    def remove(self, rec_id: str) -> Optional[KnowledgeRecord]:
+        with self._write_lock:
+            return self._owner(rec_id).call("remove", rec_id)
+
+    def expire(self) -> int:
+        with self._write_lock:
+            return sum(self._scatter("expire"))
+
+    def stats(self) -> Dict[str, Any]:
+        per_shard = dict(zip(sorted(self._shards), self._scatter("stats")))
+        for shard_id, shard_stats in per_shard.items():
+            shard_stats["restarts"] = self._shards[shard_id].restarts
+        totals = {k: sum(s[k] for s in per_shard.values()) for k in ("records", "merged", "evicted")}
+        return {**totals, "shards": per_shard}
+
+    @property
+    def merged(self) -> int:
+        return self.stats()["merged"]
+
+    @property
+    def evicted(self) -> int:
+        return self.stats()["evicted"]
+
+    def _touch(self, ids: Sequence[str]) -> None:
+        by_shard: Dict[int, List[str]] = {}
+        for rec_id in ids:
+            by_shard.setdefault(self.ring.owner(rec_id), []).append(rec_id)
+        for shard_id, shard_ids in by_shard.items():
+            self._shards[shard_id].call("touch", shard_ids)
+
+    def search_vector(self, query: str, top_k: int = 5) -> List[Tuple[KnowledgeRecord, float]]:
+        hits = itertools.chain.from_iterable(self._scatter("search_vector", query, top_k))
+        # during a rebalance a record can briefly live on two shards
+        unique = {rec.id: (rec, score) for rec, score in hits}
+        return heapq.nlargest(top_k, unique.values(), key=lambda hit: hit[1])
+
+    def search_keyword(self, query: str, top_k: int = 5) -> List[KnowledgeRecord]:
+        # keyword matches are unranked; shards are taken in id order
+        out = list({rec.id: rec for recs in self._scatter("search_keyword", query, top_k) for rec in recs}.values())
+        return out[:top_k]
+
+    def search_hybrid(self, query: str, top_k: int = 5, fusion: str = "rrf", vector_weight: float = 0.5,
+                      confidence_weight: float = 0.0, half_life: float = 0.0, rrf_k: int = 60,
+                      pool: int | None = None, match: Dict[str, Any] | None = None) -> List[Tuple[KnowledgeRecord, float, float]]:
+        """Same contract as KnowledgeBase.search_hybrid."""
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"unknown fusion: {fusion}")
+        if top_k <= 0:
+            return []
+        pool = pool or max(4 * top_k, 20)
+        vec_hits: List[Tuple[str, float]] = []
+        kw_list: List[str] = []
+        candidates: Dict[str, Tuple[KnowledgeRecord, float, Optional[float]]] = {}
+        for shard_hits, shard_kw, shard_candidates in self._scatter("hybrid_candidates", query, pool, match):
+            vec_hits.extend(shard_hits)
+            kw_list.extend(shard_kw)
+            candidates.update(shard_candidates)
+        vec_hits = heapq.nlargest(pool, dict(vec_hits).items(), key=lambda hit: hit[1])
+        top = rank_hybrid(vec_hits, list(dict.fromkeys(kw_list))[:pool], candidates, top_k, fusion,
+                          vector_weight, confidence_weight, half_life, rrf_k)
+        self._touch([rec.id for rec, _, _ in top])
+        return top
+
+    # Rebalancing
+    def _move(self, new_ring: HashRing, sources: Sequence[_Shard]) -> int:
+        # copy every record whose owner changes to that owner, switch rings, then drop the originals
+        moved: Dict[int, List[str]] = {}
+        for source in sources:
+            by_dest: Dict[int, List[Tuple[KnowledgeRecord, Optional[float]]]] = {}
+            for rec, written in source.call("export", new_ring, source.id):
+                by_dest.setdefault(new_ring.owner(rec.id), []).append((rec, written))
+            for dest, items in by_dest.items():
+                self._shards[dest].call("import", items)
+                moved.setdefault(source.id, []).extend(rec.id for rec, _ in items)
+        self.ring = new_ring
+        for source in sources:
+            if moved.get(source.id):
+                source.call("drop", moved[source.id])
+        return sum(len(ids) for ids in moved.values())
+
+    def add_shard(self) -> int:
+        """Start one more shard and move its share of the records to it; returns the new shard id."""
+        with self._write_lock:
+            shard = self._start_shard()
+            # empty until records arrive, so searches can include it right away
+            self._shards[shard.id] = shard
+            new_ring = self.ring.copy()
+            new_ring.add(shard.id)
+            self._move(new_ring, [s for s in self._shards.values() if s is not shard])
+            return shard.id
+
+    def remove_shard(self, shard_id: int) -> int:
+        """Move a shard's records to the remaining shards and stop it; returns how many moved."""
+        with self._write_lock:
+            if shard_id not in self._shards:
+                raise KeyError(shard_id)
+            if len(self._shards) == 1:
+                raise ValueError("cannot remove the last shard")
+            new_ring = self.ring.copy()
+            new_ring.remove(shard_id)
+            shard = self._shards[shard_id]
+            moved = self._move(new_ring, [shard])
+            del self._shards[shard_id]
+            shard.close()
+            return moved
+
+    def close(self) -> None:
+        for shard in list(self._shards.values()):
+            shard.close()
+        self._shards.clear()
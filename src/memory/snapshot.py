@@ -0,0 +1,130 @@
+# src/memory/snapshot.py
+"""
+Warm-start snapshots: built indexes and in-memory stores in one binary file.
+
+Layout (little-endian):
+
+    b"MACHSNAP" | u32 format version | u32 header length | JSON header | sections
+
+The header maps each section name to its (offset, length) relative to the
+first section, which starts 8-byte aligned; every section is aligned too, so
+the float32 vector matrix is used straight from the memory-mapped file.
+Python objects (records, keyword indexes, conversation sessions) are pickled:
+only load snapshots this process, or one you trust, wrote.
+"""
+from __future__ import annotations
+import json, mmap, os, pickle, struct, time
+from typing import Any, Dict, Optional, Tuple
+from .stores import ConversationMemory, KnowledgeBase, AgentStateMemory, _epoch
+from .vector_store import SimpleVectorStore, _tmp_path, np
+from .ann import build_index
+
+MAGIC = b"MACHSNAP"
+SNAPSHOT_VERSION = 7
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 8
+
+class SnapshotError(ValueError):
+    pass
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def write_snapshot(path: str, sections: Dict[str, bytes], meta: Dict[str, Any] | None = None) -> None:
+    layout, offset = {}, 0
+    for name, data in sections.items():
+        layout[name] = [offset, len(data)]
+        offset = _aligned(offset + len(data))
+    header = json.dumps({**(meta or {}), "created": time.time(), "sections": layout}).encode("utf-8")
+    start = _aligned(_PREFIX.size + len(header))
+    tmp = _tmp_path(path)
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            f.seek(start + layout[name][0])
+            f.write(data)
+    os.replace(tmp, path)
+
+class Snapshot:
+    """A snapshot file mapped read-only; sections are zero-copy memoryviews."""
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _PREFIX.size:
+            raise SnapshotError(f"{path}: not a snapshot")
+        magic, version, header_len = _PREFIX.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"{path}: snapshot format {version}, expected {SNAPSHOT_VERSION}")
+        self.meta = json.loads(self._mm[_PREFIX.size:_PREFIX.size + header_len])
+        self._start = _aligned(_PREFIX.size + header_len)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.meta["sections"]
+
+    def section(self, name: str) -> memoryview:
+        offset, length = self.meta["sections"][name]
+        return memoryview(self._mm)[self._start + offset:self._start + offset + length]
+
+    def load(self, name: str) -> Any:
+        return pickle.loads(self.section(name))
+
+def open_snapshot(path: str | None) -> Optional[Snapshot]:
+    """The snapshot at `path`, or None when there is none or it cannot be used."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return Snapshot(path)
+    except (SnapshotError, ValueError, OSError):
+        return None
+
+def _dump(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+def source_signature(path: str | None) -> Optional[list]:
+    # a research section is only reused while its corpus file is unchanged
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+def pack_memory(convo: ConversationMemory, kb: KnowledgeBase, agent_state: AgentStateMemory) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+    with kb._lock:
+        sections = {
+            "convo": _dump(convo),
+            "agent_state": _dump(agent_state),
+            "kb.records": _dump(list(kb.records.values())),
+            "kb.text": _dump(kb.text),
+            "kb.ids": _dump(list(kb.vs.ids)),
+            "kb.vectors": kb.vs.to_bytes(),
+        }
+        meta = {"kb": {"dim": kb.vs.dim, "seed": kb.vs.seed, "count": len(kb.vs.ids)}}
+    return sections, meta
+
+def unpack_memory(snap: Snapshot, index: str | None = None, index_opts: Dict | None = None,
+                  convo_opts: Dict | None = None, state_opts: Dict | None = None,
+                  **limits: Any) -> Tuple[ConversationMemory, KnowledgeBase, AgentStateMemory]:
+    """Restore the memory stores; the current options (`convo_opts`, `state_opts`, `limits`) replace the pickled ones."""
+    info = snap.meta["kb"]
+    dim, n = info["dim"], info["count"]
+    kb = KnowledgeBase(vector_dim=dim, **limits)
+    raw = snap.section("kb.vectors")
+    if np is not None:
+        mat = np.frombuffer(raw, dtype="<f4", count=n * dim).reshape(n, dim) if n else None
+    else:
+        from array import array
+        mat = array("f", raw.tobytes())
+    kb.vs = SimpleVectorStore.from_matrix(snap.load("kb.ids"), mat, dim, seed=info["seed"],
+                                          index=build_index(index, **(index_opts or {})), mapped=np is not None and n > 0)
+    kb.text = snap.load("kb.text")
+    for rec in snap.load("kb.records"):
+        kb.records[rec.id] = rec
+        kb._scope(rec.id, rec.provenance)
+    kb._track_all((rec.id, rec.confidence, _epoch(rec.timestamp)) for rec in kb.records.values())
+    convo, agent_state = snap.load("convo"), snap.load("agent_state")
+    convo.configure(**(convo_opts or {}))
+    agent_state.configure(**(state_opts or {}))
+    return convo, kb, agent_state
@@ -0,0 +1,382 @@
+# src/memory/sqlite_stores.py
+"""
+SQLite-backed versions of the memory stores, sharing one WAL-mode database.
+
+Writes made inside `SqliteDatabase.transaction()` (MemoryAgent.batch() opens
+one for the closing writes of a Coordinator turn) are committed together, or
+rolled back together on error; keyword search goes
+through FTS5 trigram indexes, which answer the same case-insensitive
+substring queries as the in-memory stores.
+"""
+from __future__ import annotations
+import contextlib, json, os, sqlite3, threading, time
+from datetime import datetime, timezone
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from .stores import _epoch, ConversationMemory, KnowledgeBase, AgentStateMemory, ConversationTurn, KnowledgeRecord, AgentStateRecord, DEFAULT_SESSION, WindowStats
+from .vector_store import SimpleVectorStore, _tmp_path
+from .ann import build_index
+
+class SqliteDatabase:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.lock = threading.RLock()
+        self._depth = 0
+        self.fts = self._has_trigram()
+
+    def _has_trigram(self) -> bool:
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts_probe USING fts5(x, tokenize='trigram')")
+            self.conn.execute("DROP TABLE temp._fts_probe")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    @contextlib.contextmanager
+    def transaction(self):
+        # the lock is held throughout, so only the owning thread nests (as savepoints) and
+        # other threads wait for the commit; never hold a transaction across an await
+        with self.lock:
+            depth = self._depth
+            self.conn.execute("BEGIN" if depth == 0 else f"SAVEPOINT sp{depth}")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                # some errors already roll the whole transaction back
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK" if depth == 0 else f"ROLLBACK TO sp{depth}")
+                    if depth:
+                        self.conn.execute(f"RELEASE sp{depth}")
+                raise
+            else:
+                try:
+                    self.conn.execute("COMMIT" if depth == 0 else f"RELEASE sp{depth}")
+                except sqlite3.Error:
+                    if depth == 0 and self.conn.in_transaction:
+                        self.conn.execute("ROLLBACK")
+                    raise
+            finally:
+                self._depth -= 1
+
+    def execute(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        # statement and fetch both under the lock; executor threads share the connection
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def insert(self, sql: str, params: Tuple = ()) -> int:
+        with self.lock:
+            return self.conn.execute(sql, params).lastrowid
+
+    def write(self, statements: List[Tuple[str, Tuple]]) -> None:
+        # one implicit transaction unless a batch is already open
+        with self.transaction():
+            for sql, params in statements:
+                self.conn.execute(sql, params)
+
+    def close(self) -> None:
+        self.conn.close()
+
+def _phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+def _like(query: str) -> str:
+    return "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+class SqliteConversationMemory(ConversationMemory):
+    """Durable turns keyed by session; nothing is cached in memory, so no compaction is needed."""
+    def __init__(self, db: SqliteDatabase) -> None:
+        self.db = db
+        self._lock = db.lock
+        self.db.execute("CREATE TABLE IF NOT EXISTS turns (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL, timestamp TEXT, role TEXT, content TEXT, metadata TEXT)")
+        if "session_id" not in {r[1] for r in self.db.execute("PRAGMA table_info(turns)")}:
+            self.db.execute(f"ALTER TABLE turns ADD COLUMN session_id TEXT NOT NULL DEFAULT '{DEFAULT_SESSION}'")
+        self.db.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, seq)")
+        if db.fts:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(content, tokenize='trigram')")
+
+    def batch(self):
+        return self.db.transaction()
+
+    @property
+    def turns(self) -> List[ConversationTurn]:
+        return self.history()
+
+    def add(self, turn: ConversationTurn, session_id: str | None = None) -> None:
+        with self.db.transaction():
+            seq = self.db.insert("INSERT INTO turns (id, timestamp, role, content, metadata, session_id) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (turn.id, turn.timestamp, turn.role, turn.content, json.dumps(turn.metadata, ensure_ascii=False), session_id or DEFAULT_SESSION))
+            if self.db.fts:
+                self.db.execute("INSERT INTO turns_fts (rowid, content) VALUES (?, ?)", (seq, turn.content))
+
+    @staticmethod
+    def _turn(row) -> ConversationTurn:
+        return ConversationTurn(id=row[0], timestamp=row[1], role=row[2], content=row[3], metadata=json.loads(row[4] or "{}"))
+
+    def history(self, session_id: str | None = None) -> List[ConversationTurn]:
+        rows = self.db.execute("SELECT id, timestamp, role, content, metadata FROM turns WHERE session_id = ? ORDER BY seq", (session_id or DEFAULT_SESSION,))
+        return [self._turn(r) for r in rows]
+
+    def summaries(self, session_id: str | None = None) -> List[ConversationTurn]:
+        return []
+
+    def search(self, keyword: str, top_k: int | None = None, session_id: str | None = None) -> List[ConversationTurn]:
+        limit = -1 if top_k is None else top_k
+        where, params = ("AND t.session_id = ?", (session_id,)) if session_id else ("", ())
+        if self.db.fts and len(keyword) >= 3:
+            sql = ("SELECT t.id, t.timestamp, t.role, t.content, t.metadata FROM turns_fts f JOIN turns t ON t.seq = f.rowid "
+                   f"WHERE turns_fts MATCH ? {where} ORDER BY f.rowid LIMIT ?")
+            rows = self.db.execute(sql, (_phrase(keyword), *params, limit))
+        else:
+            rows = self.db.execute("SELECT t.id, t.timestamp, t.role, t.content, t.metadata FROM turns t "
+                                   f"WHERE t.content LIKE ? ESCAPE '\\' {where} ORDER BY t.seq LIMIT ?", (_like(keyword), *params, limit))
+        return [self._turn(r) for r in rows]
+
+class _RecordsView(Mapping):
+    """Read-only mapping over the knowledge table so `kb.records` keeps working."""
+    def __init__(self, kb: "SqliteKnowledgeBase") -> None:
+        self.kb = kb
+
+    def __getitem__(self, rec_id: str) -> KnowledgeRecord:
+        rec = self.kb.get(rec_id)
+        if rec is None:
+            raise KeyError(rec_id)
+        return rec
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([r[0] for r in self.kb.db.execute("SELECT id FROM knowledge ORDER BY seq")])
+
+    def __len__(self) -> int:
+        return self.kb.db.execute("SELECT COUNT(*) FROM knowledge")[0][0]
+
+class SqliteKnowledgeBase(KnowledgeBase):
+    """
+    Records live in SQLite with their embeddings, so opening never re-embeds;
+    only the float32 vector matrix and an LRU of hot records stay in memory.
+    """
+    _COLUMNS = "id, timestamp, topic, content, source, agent, confidence, provenance"
+
+    def __init__(self, db: SqliteDatabase, vector_dim: int = 256, index: str | None = None,
+                 index_opts: Dict | None = None, cache_size: int = 4096, **limits: Any) -> None:
+        self.db = db
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, KnowledgeRecord]" = OrderedDict()
+        self._lock = db.lock
+        # keyword search runs in SQLite (_keyword_ids); no in-memory InvertedIndex
+        self.text = None
+        self.db.execute("CREATE TABLE IF NOT EXISTS knowledge (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, timestamp TEXT, topic TEXT, "
+                        "content TEXT, source TEXT, agent TEXT, confidence REAL, provenance TEXT, embedding BLOB)")
+        if db.fts:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(content, topics, tokenize='trigram')")
+        self.vs = SimpleVectorStore(dim=vector_dim, index=build_index(index, **(index_opts or {})))
+        self._init_growth(**limits)
+        written = []
+        for rec_id, blob, ts, confidence, prov in self.db.execute("SELECT id, embedding, timestamp, confidence, provenance FROM knowledge ORDER BY seq"):
+            self.vs.add_vector(rec_id, array("f", blob))
+            written.append((rec_id, confidence, _epoch(ts)))
+            self._scope(rec_id, json.loads(prov or "{}"))
+        self._track_all(written)
+
+    @property
+    def records(self) -> Mapping[str, KnowledgeRecord]:
+        return _RecordsView(self)
+
+    def batch(self):
+        return self.db.transaction()
+
+    def _remember(self, rec: KnowledgeRecord) -> None:
+        self._cache[rec.id] = rec
+        self._cache.move_to_end(rec.id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def add(self, rec: KnowledgeRecord) -> KnowledgeRecord:
+        with self.db.transaction():
+            return super().add(rec)
+
+    def _store(self, rec: KnowledgeRecord) -> None:
+        with self.db.transaction():
+            self.vs.add(rec.id, rec.content + " " + " ".join(rec.topic))
+            blob = array("f", self.vs.vector(rec.id)).tobytes()
+            self.db.execute(f"INSERT INTO knowledge ({self._COLUMNS}, embedding) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                            "ON CONFLICT(id) DO UPDATE SET timestamp=excluded.timestamp, topic=excluded.topic, content=excluded.content, "
+                            "source=excluded.source, agent=excluded.agent, confidence=excluded.confidence, provenance=excluded.provenance, embedding=excluded.embedding",
+                            (rec.id, rec.timestamp, json.dumps(rec.topic, ensure_ascii=False), rec.content, rec.source, rec.agent,
+                             rec.confidence, json.dumps(rec.provenance, ensure_ascii=False), blob))
+            if self.db.fts:
+                seq = self.db.execute("SELECT seq FROM knowledge WHERE id = ?", (rec.id,))[0][0]
+                self.db.execute("DELETE FROM knowledge_fts WHERE rowid = ?", (seq,))
+                self.db.execute("INSERT INTO knowledge_fts (rowid, content, topics) VALUES (?, ?, ?)", (seq, rec.content, "\n".join(rec.topic)))
+            self._remember(rec)
+
+    def _update(self, rec: KnowledgeRecord) -> None:
+        self.db.execute("UPDATE knowledge SET timestamp = ?, confidence = ?, provenance = ? WHERE id = ?",
+                        (rec.timestamp, rec.confidence, json.dumps(rec.provenance, ensure_ascii=False), rec.id))
+        self._remember(rec)
+
+    def _insertion_order(self) -> Iterator[str]:
+        return (r[0] for r in self.db.execute("SELECT id FROM knowledge ORDER BY seq LIMIT 2"))
+
+    @staticmethod
+    def _record(row) -> KnowledgeRecord:
+        return KnowledgeRecord(id=row[0], timestamp=row[1], topic=json.loads(row[2]), content=row[3], source=row[4],
+                               agent=row[5], confidence=row[6], provenance=json.loads(row[7] or "{}"))
+
+    def get(self, rec_id: str) -> Optional[KnowledgeRecord]:
+        with self._lock:
+            rec = self._cache.get(rec_id)
+            if rec is not None:
+                self._cache.move_to_end(rec_id)
+                return rec
+            rows = self.db.execute(f"SELECT {self._COLUMNS} FROM knowledge WHERE id = ?", (rec_id,))
+            if not rows:
+                return None
+            rec = self._record(rows[0])
+            self._remember(rec)
+            return rec
+
+    def remove(self, rec_id: str) -> Optional[KnowledgeRecord]:
+        with self.db.transaction():
+            rec = self.get(rec_id)
+            if rec is None:
+                return None
+            seq = self.db.execute("SELECT seq FROM knowledge WHERE id = ?", (rec_id,))[0][0]
+            self.db.execute("DELETE FROM knowledge WHERE id = ?", (rec_id,))
+            if self.db.fts:
+                self.db.execute("DELETE FROM knowledge_fts WHERE rowid = ?", (seq,))
+            self.vs.remove(rec_id)
+            self._cache.pop(rec_id, None)
+            self._forget(rec_id)
+            return rec
+
+    def _keyword_ids(self, query: str, top_k: int, ids: Sequence[str] | None = None) -> List[str]:
+        if top_k <= 0 or (ids is not None and not ids):
+            return []
+        # `ids` restricts the matches to those records, looked up through the id index
+        scope, args = ("", ()) if ids is None else (" AND k.id IN (SELECT value FROM json_each(?))", (json.dumps(list(ids)),))
+        if self.db.fts and len(query) >= 3:
+            sql = f"SELECT k.id FROM knowledge_fts f JOIN knowledge k ON k.seq = f.rowid WHERE knowledge_fts MATCH ?{scope} ORDER BY f.rowid LIMIT ?"
+            rows = self.db.execute(sql, (_phrase(query), *args, top_k))
+        else:
+            # topics are matched one by one, not as their JSON encoding
+            like = _like(query)
+            rows = self.db.execute("SELECT id FROM knowledge k WHERE (content LIKE ? ESCAPE '\\' "
+                                   f"OR EXISTS (SELECT 1 FROM json_each(k.topic) WHERE value LIKE ? ESCAPE '\\')){scope} ORDER BY seq LIMIT ?",
+                                   (like, like, *args, top_k))
+        return [r[0] for r in rows]
+
+    # Writes are already durable; save() exports to the KnowledgeBase directory
+    # format, and open()/exists() take a database file instead of a directory.
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        tmp = _tmp_path(os.path.join(path, "records.jsonl"))
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in self.db.execute(f"SELECT {self._COLUMNS} FROM knowledge ORDER BY seq"):
+                    f.write(json.dumps(self._record(row).to_dict(), ensure_ascii=False) + "\n")
+            self.vs.save(path)
+            os.replace(tmp, os.path.join(path, "records.jsonl"))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(path)
+
+    @classmethod
+    def open(cls, path: str, index: str | None = None, index_opts: Dict | None = None, vector_dim: int = 256, **limits) -> "SqliteKnowledgeBase":
+        return cls(SqliteDatabase(path), vector_dim=vector_dim, index=index, index_opts=index_opts, **limits)
+
+def _iso(t: float) -> str:
+    # the now_ts() format, so ISO timestamps compare as strings
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+class SqliteAgentStateMemory(AgentStateMemory):
+    """
+    Agent state rows in SQLite. aggregate() reads only the window's rows
+    through the timestamp index; compact() deletes rows older than
+    `retention` seconds, and runs from add() once per `partition_seconds`.
+    Rows are never downsampled, so there is no raw_retention here.
+    """
+    def __init__(self, db: SqliteDatabase, retention: float = 0.0, partition_seconds: float = 3600.0) -> None:
+        self.db = db
+        self.retention = retention
+        self.partition_seconds = partition_seconds
+        self._compacted: int | None = None
+        self.db.execute("CREATE TABLE IF NOT EXISTS agent_state (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, timestamp TEXT, "
+                        "agent TEXT, task TEXT, result_summary TEXT, metrics TEXT)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS agent_state_ts ON agent_state (timestamp)")
+
+    def batch(self):
+        return self.db.transaction()
+
+    def add(self, rec: AgentStateRecord) -> None:
+        # compact at most once per partition, as the in-memory store does when one opens
+        key = int(time.time() // self.partition_seconds)
+        if self.retention and key != self._compacted:
+            self._compacted = key
+            self.compact()
+        self.db.write([("INSERT OR REPLACE INTO agent_state (id, timestamp, agent, task, result_summary, metrics) VALUES (?, ?, ?, ?, ?, ?)",
+                        (rec.id, rec.timestamp, rec.agent, rec.task, rec.result_summary, json.dumps(rec.metrics, ensure_ascii=False)))])
+
+    def list(self, start: float | None = None, end: float | None = None) -> List[AgentStateRecord]:
+        sql = "SELECT id, timestamp, agent, task, result_summary, metrics FROM agent_state"
+        where = [("timestamp >= ?", start), ("timestamp < ?", end)]
+        params = tuple(_iso(t) for _, t in where if t is not None)
+        if params:
+            sql += " WHERE " + " AND ".join(cond for cond, t in where if t is not None)
+        rows = self.db.execute(sql + " ORDER BY seq", params)
+        return [AgentStateRecord(id=r[0], timestamp=r[1], agent=r[2], task=r[3], result_summary=r[4], metrics=json.loads(r[5] or "{}")) for r in rows]
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT count(*) FROM agent_state")[0][0]
+
+    def compact(self, now: float | None = None) -> None:
+        if self.retention:
+            now = time.time() if now is None else now
+            self.db.write([("DELETE FROM agent_state WHERE timestamp < ?", (_iso(now - self.retention),))])
+
+    def aggregate(self, metric: str = "confidence", window: float | None = None, start: float | None = None,
+                  end: float | None = None, agent: str | None = None,
+                  percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[str, Any]]:
+        end = time.time() if end is None else end
+        if window is not None:
+            start = end - window
+        if start is None:
+            first = self.db.execute("SELECT min(timestamp) FROM agent_state")[0][0]
+            start = _epoch(first) if first else end
+        sql = ("SELECT agent, json_extract(metrics, '$.\"' || ? || '\"') FROM agent_state "
+               "WHERE timestamp >= ? AND timestamp < ?" + (" AND agent = ?" if agent is not None else ""))
+        params = (metric, _iso(start), _iso(end)) + ((agent,) if agent is not None else ())
+        groups: Dict[str, WindowStats] = {}
+        for name, value in self.db.execute(sql, params):
+            acc = groups.setdefault(name, WindowStats())
+            acc.count += 1
+            if isinstance(value, (int, float)):
+                acc.values.append(float(value))
+        return {name: acc.summarize(end - start, percentiles) for name, acc in groups.items()}
+
+def open_sqlite_stores(path: str, vector_dim: int = 256, index: str | None = None, index_opts: Dict | None = None,
+                       cache_size: int = 4096, state_retention: float = 0.0, state_partition: float = 3600.0,
+                       **limits: Any) -> Tuple[SqliteConversationMemory, SqliteKnowledgeBase, SqliteAgentStateMemory]:
+    db = SqliteDatabase(path)
+    return (SqliteConversationMemory(db),
+            SqliteKnowledgeBase(db, vector_dim=vector_dim, index=index, index_opts=index_opts, cache_size=cache_size, **limits),
+            SqliteAgentStateMemory(db, retention=state_retention, partition_seconds=state_partition))
+
+def migrate_to_sqlite(path: str, convo: ConversationMemory, kb: KnowledgeBase, agent_state: AgentStateMemory,
+                      **opts: Any) -> Tuple[SqliteConversationMemory, SqliteKnowledgeBase, SqliteAgentStateMemory]:
+    """Copy in-memory stores into a SQLite database in a single transaction."""
+    s_convo, s_kb, s_state = open_sqlite_stores(path, vector_dim=kb.vs.dim, **opts)
+    with s_kb.db.transaction():
+        for sid in convo.sessions:
+            # compacted summaries come first, as they cover the oldest turns
+            for turn in [*convo.summaries(sid), *convo.history(sid)]:
+                s_convo.add(turn, session_id=sid)
+        for rec in kb.records.values():
+            s_kb.add(rec)
+        for rec in agent_state.list():
+            s_state.add(rec)
+    return s_convo, s_kb, s_state
@@ -1,74 +1,500 @@
 # src/memory/stores.py
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
-from .vector_store import SimpleVectorStore
-import time
-
-@dataclass
-class ConversationTurn:
-    id: str
-    timestamp: str
-    role: str  # user | manager | agent
-    content: str
-    metadata: Dict = field(default_factory=dict)
-
-@dataclass
-class KnowledgeRecord:
-    id: str
-    timestamp: str
-    topic: List[str]
-    content: str
-    source: str
-    agent: str
-    confidence: float
-    provenance: Dict = field(default_factory=dict)
-
-@dataclass
-class AgentStateRecord:
-    id: str
-    timestamp: str
-    agent: str
-    task: str
-    result_summary: str
-    metrics: Dict = field(default_factory=dict)
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+from .schema import ConversationTurn, KnowledgeRecord, AgentStateRecord
+from .vector_store import SimpleVectorStore, _tmp_path
+from .ann import build_index
+from .text_index import InvertedIndex
+import bisect, contextlib, heapq, json, math, os, threading, time
+
+DEFAULT_SESSION = "default"
+
+class HistoryView(Sequence):
+    """
+    Read-only view over a session's recent turns; indexing does not copy,
+    iteration walks a copy taken under the memory's lock, as writers may
+    append meanwhile.
+    """
+    def __init__(self, turns: Deque[ConversationTurn], lock: Any = None) -> None:
+        self._turns = turns
+        self._lock = lock if lock is not None else contextlib.nullcontext()
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __getitem__(self, i):
+        with self._lock:
+            if isinstance(i, slice):
+                return [self._turns[j] for j in range(*i.indices(len(self._turns)))]
+            return self._turns[i]
+
+    def __iter__(self) -> Iterator[ConversationTurn]:
+        with self._lock:
+            return iter(list(self._turns))
+
+class _Session:
+    def __init__(self, max_turns: int, max_summaries: int) -> None:
+        self.turns: Deque[ConversationTurn] = deque()
+        self.summaries: Deque[ConversationTurn] = deque()
+        self.pending: List[ConversationTurn] = []
+        self.text = InvertedIndex()
+        # indexed turns ("t<pos>") and summaries ("s<pos of first covered turn>")
+        self.items: Dict[str, ConversationTurn] = {}
+        self.count = 0
+        self.max_turns = max_turns
+        self.max_summaries = max_summaries
+        self.written = time.time()
 
 class ConversationMemory:
-    def __init__(self) -> None:
-        self.turns: List[ConversationTurn] = []
+    """
+    Conversation turns grouped by session. Each session keeps a bounded ring of
+    recent turns; turns falling out of it are compacted into searchable
+    "summary" turns, and the oldest summaries are merged, so a session's
+    footprint stays constant however long it runs.
+
+    Sessions are created by their first turn only; reads of an unknown id are
+    empty. Opening a session beyond `max_sessions` drops the least recently
+    written one, and sessions idle for `session_ttl` seconds are dropped
+    then too (0 disables either). Thread-safe.
+    """
+    def __init__(self, max_turns: int = 200, summary_turns: int = 20, max_summaries: int = 10, summary_chars: int = 1000,
+                 max_sessions: int = 10000, session_ttl: float = 0.0) -> None:
+        self.max_turns = max_turns
+        self.summary_turns = summary_turns
+        self.max_summaries = max_summaries
+        self.summary_chars = summary_chars
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        # least recently written first
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k != "_lock"}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _session(self, session_id: str | None) -> Optional[_Session]:
+        return self.sessions.get(session_id or DEFAULT_SESSION)
+
+    def _writable(self, session_id: str | None) -> _Session:
+        sid = session_id or DEFAULT_SESSION
+        sess = self.sessions.get(sid)
+        if sess is None:
+            self._evict_sessions()
+            sess = self.sessions[sid] = _Session(self.max_turns, self.max_summaries)
+        else:
+            self.sessions.move_to_end(sid)
+        sess.written = time.time()
+        return sess
+
+    def _evict_sessions(self) -> None:
+        if self.session_ttl:
+            cutoff = time.time() - self.session_ttl
+            while self.sessions and next(iter(self.sessions.values())).written < cutoff:
+                self.sessions.popitem(last=False)
+        while self.max_sessions and len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    @property
+    def turns(self) -> HistoryView:
+        return self.history()
+
+    def add(self, turn: ConversationTurn, session_id: str | None = None) -> None:
+        with self._lock:
+            sess = self._writable(session_id)
+            self._index(sess, f"t{sess.count}", turn)
+            sess.count += 1
+            sess.turns.append(turn)
+            self._trim(sess)
+
+    def _trim(self, sess: _Session) -> None:
+        # turns leaving the ring stay indexed until _compact replaces them with their summary
+        while len(sess.turns) > self.max_turns:
+            sess.pending.append(sess.turns.popleft())
+            if len(sess.pending) >= self.summary_turns:
+                self._compact(sess)
+
+    def configure(self, **opts: Any) -> None:
+        """Apply new limits (any __init__ option) to a restored memory, trimming sessions that exceed them."""
+        for name in opts:
+            if name.startswith("_") or name == "sessions" or not hasattr(self, name):
+                raise TypeError(f"unknown option: {name}")
+        with self._lock:
+            for name, value in opts.items():
+                setattr(self, name, value)
+            for sess in self.sessions.values():
+                self._trim(sess)
+                while len(sess.summaries) > max(self.max_summaries, 1):
+                    self._fold(sess)
+            if self.session_ttl:
+                cutoff = time.time() - self.session_ttl
+                while self.sessions and next(iter(self.sessions.values())).written < cutoff:
+                    self.sessions.popitem(last=False)
+            while self.max_sessions and len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+    def _summarize(self, turns: List[ConversationTurn], first_pos: int) -> ConversationTurn:
+        text = "\n".join(t.content if t.role == "summary" else f"{t.role}: {t.content[:160]}" for t in turns)
+        if len(text) > self.summary_chars:
+            text = text[:self.summary_chars].rsplit(" ", 1)[0] + "..."
+        covered = sum(t.metadata.get("turns", 1) if t.role == "summary" else 1 for t in turns)
+        return ConversationTurn(id=f"sum_{turns[0].id}", timestamp=turns[-1].timestamp, role="summary", content=text,
+                                metadata={"turns": covered, "from": turns[0].timestamp, "to": turns[-1].timestamp, "pos": first_pos})
+
+    def _index(self, sess: _Session, key: str, turn: ConversationTurn) -> None:
+        sess.items[key] = turn
+        sess.text.add(key, (turn.content,))
+
+    def _unindex(self, sess: _Session, key: str) -> None:
+        sess.items.pop(key, None)
+        sess.text.remove(key)
+
+    def _compact(self, sess: _Session) -> None:
+        first_pos = sess.count - len(sess.turns) - len(sess.pending)
+        summary = self._summarize(sess.pending, first_pos)
+        for pos in range(first_pos, first_pos + len(sess.pending)):
+            self._unindex(sess, f"t{pos}")
+        sess.pending = []
+        sess.summaries.append(summary)
+        self._index(sess, f"s{first_pos}", summary)
+        if len(sess.summaries) > self.max_summaries:
+            self._fold(sess)
 
-    def add(self, turn: ConversationTurn) -> None:
-        self.turns.append(turn)
+    def _fold(self, sess: _Session) -> None:
+        # fold the two oldest summaries together to keep the session bounded
+        if len(sess.summaries) >= 2:
+            a, b = sess.summaries.popleft(), sess.summaries.popleft()
+            self._unindex(sess, f"s{a.metadata['pos']}")
+            self._unindex(sess, f"s{b.metadata['pos']}")
+            merged = self._summarize([a, b], a.metadata["pos"])
+            sess.summaries.appendleft(merged)
+            self._index(sess, f"s{merged.metadata['pos']}", merged)
 
-    def history(self) -> List[ConversationTurn]:
-        return list(self.turns)
+    def batch(self):
+        # in-memory writes need no grouping; SQLite-backed stores open a transaction
+        return contextlib.nullcontext()
 
-    def search(self, keyword: str) -> List[ConversationTurn]:
-        key = keyword.lower()
-        return [t for t in self.turns if key in t.content.lower()]
+    def history(self, session_id: str | None = None) -> HistoryView:
+        with self._lock:
+            sess = self._session(session_id)
+            return HistoryView(sess.turns if sess is not None else deque(), self._lock)
+
+    def summaries(self, session_id: str | None = None) -> List[ConversationTurn]:
+        with self._lock:
+            sess = self._session(session_id)
+            return list(sess.summaries) if sess is not None else []
+
+    def search(self, keyword: str, top_k: int | None = None, session_id: str | None = None) -> List[ConversationTurn]:
+        """Matching summaries and recent (or not yet summarized) turns, oldest first; all sessions unless one is given."""
+        with self._lock:
+            if session_id:
+                sess = self._session(session_id)
+                sessions = [sess] if sess is not None else []
+            else:
+                sessions = list(self.sessions.values())
+            out: List[ConversationTurn] = []
+            for sess in sessions:
+                keys = sorted(sess.text.search(keyword), key=lambda k: int(k[1:]))
+                out.extend(sess.items[k] for k in keys)
+                if top_k is not None and len(out) >= top_k:
+                    break
+            return out if top_k is None else out[:top_k]
+
+def _epoch(ts: str) -> float:
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+def record_sessions(prov: Dict[str, Any]) -> List[str]:
+    """Every session that wrote into a record: its own, and those of all records merged into it."""
+    sessions = prov.get("sessions")
+    if sessions is None:
+        sessions = [prov["session_id"]] if prov.get("session_id") is not None else []
+    return sessions
+
+def provenance_matches(rec: KnowledgeRecord, match: Dict[str, Any] | None) -> bool:
+    """
+    True when `rec`'s provenance, or that of a record merged into it, has every
+    item of `match`; "session_id" is checked against record_sessions, which
+    outlives the truncated merge history.
+    """
+    if not match:
+        return True
+    prov = rec.provenance
+    if "session_id" in match:
+        if match["session_id"] not in record_sessions(prov):
+            return False
+        match = {k: v for k, v in match.items() if k != "session_id"}
+        if not match:
+            return True
+    return any(all(p.get(k) == v for k, v in match.items()) for p in (prov, *prov.get("merged_from", ())))
+
+def rank_hybrid(vec_hits: List[Tuple[str, float]], kw_list: List[str], candidates: Dict[str, Tuple[KnowledgeRecord, float, Optional[float]]],
+                top_k: int, fusion: str = "rrf", vector_weight: float = 0.5, confidence_weight: float = 0.0,
+                half_life: float = 0.0, rrf_k: int = 60) -> List[Tuple[KnowledgeRecord, float, float]]:
+    """Fuse ranked vector hits and keyword matches; see KnowledgeBase.search_hybrid."""
+    now = time.time()
+    vec_rank = {rec_id: rank for rank, (rec_id, _) in enumerate(vec_hits)}
+    kw_ids = set(kw_list)
+    scored = []
+    for rec_id in dict.fromkeys([rec_id for rec_id, _ in vec_hits] + kw_list):
+        if rec_id not in candidates:
+            continue
+        rec, sim, written = candidates[rec_id]
+        if fusion == "rrf":
+            score = vector_weight / (rrf_k + vec_rank[rec_id] + 1) if rec_id in vec_rank else 0.0
+            if rec_id in kw_ids:
+                score += (1 - vector_weight) / (rrf_k + 1)
+        else:
+            score = vector_weight * sim + (1 - vector_weight) * (rec_id in kw_ids)
+        if confidence_weight:
+            score *= 1 - confidence_weight + confidence_weight * rec.confidence
+        if half_life and written is not None:
+            score *= 0.5 ** (max(now - written, 0.0) / half_life)
+        scored.append((score, rec, sim))
+    top = heapq.nlargest(top_k, scored, key=lambda x: x[0])
+    return [(rec, score, sim) for score, rec, sim in top]
 
 class KnowledgeBase:
-    def __init__(self, vector_dim: int = 256) -> None:
+    """
+    Knowledge records with vector and keyword indexes.
+
+    Growth control (all off by default): an incoming record whose embedding is
+    at least `dedup_threshold` similar to an existing one is merged into it
+    (confidence, timestamp and provenance updated) instead of being stored;
+    records whose timestamp (the last write, a merge carries it forward) is
+    more than `ttl` seconds old expire on the next add; beyond `max_records` the
+    `eviction` policy picks victims: "lru" (least recently written or
+    recalled), "lowest_confidence" or "oldest" (insertion order).
+    """
+    EVICTION_POLICIES = ("lru", "lowest_confidence", "oldest")
+
+    def __init__(self, vector_dim: int = 256, index: str | None = None, index_opts: Dict | None = None,
+                 dedup_threshold: float = 0.0, max_records: int = 0, ttl: float = 0.0, eviction: str = "lru") -> None:
         self.records: Dict[str, KnowledgeRecord] = {}
-        self.vs = SimpleVectorStore(dim=vector_dim)
+        self.vs = SimpleVectorStore(dim=vector_dim, index=build_index(index, **(index_opts or {})))
+        self.text = InvertedIndex()
+        # searches may run on executor threads (Coordinator.handle_async) while turns write
+        self._lock = threading.RLock()
+        self._init_growth(dedup_threshold, max_records, ttl, eviction)
+
+    @property
+    def vector_dim(self) -> int:
+        return self.vs.dim
+
+    def _init_growth(self, dedup_threshold: float = 0.0, max_records: int = 0, ttl: float = 0.0, eviction: str = "lru") -> None:
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy: {eviction}")
+        self.dedup_threshold = dedup_threshold
+        self.max_records = max_records
+        self.ttl = ttl
+        self.eviction = eviction
+        self.merged = 0
+        self.evicted = 0
+        # id -> last write time; id -> None, least recently used first (lru)
+        self._written: Dict[str, float] = {}
+        self._used: "OrderedDict[str, None]" = OrderedDict()
+        # (write time, id) min-heap (TTL) and (confidence, tiebreak, id) min-heap (lowest_confidence),
+        # both with lazy deletion
+        self._expiry: List[Tuple[float, str]] = []
+        self._by_conf: List[Tuple[float, int, str]] = []
+        self._tiebreak = 0
+        # session -> ids of the records it wrote into, and the reverse (recall scope)
+        self._by_session: Dict[str, Dict[str, None]] = {}
+        self._sessions: Dict[str, List[str]] = {}
 
-    def add(self, rec: KnowledgeRecord) -> None:
+    def _track(self, rec_id: str, confidence: float, written: float) -> None:
+        # `written` is the record timestamp, live or reopened, so both see one clock
+        self._written[rec_id] = written
+        self._used[rec_id] = None
+        self._used.move_to_end(rec_id)
+        if self.ttl:
+            heapq.heappush(self._expiry, (written, rec_id))
+        if self.eviction == "lowest_confidence" and self.max_records:
+            heapq.heappush(self._by_conf, (confidence, self._tiebreak, rec_id))
+            self._tiebreak += 1
+        self._compact_heaps()
+
+    def _track_all(self, entries: Iterable[Tuple[str, float, float]]) -> None:
+        """Track reopened or moved (id, confidence, written) entries, oldest write first, as a live store would have."""
+        for rec_id, confidence, written in sorted(entries, key=lambda e: e[2]):
+            self._track(rec_id, confidence, written)
+
+    def _compact_heaps(self) -> None:
+        # rebuilt once stale entries outnumber live ones, so re-writes cannot grow them without bound
+        live = len(self._used)
+        if len(self._expiry) > 2 * live + 64:
+            self._expiry = [(written, rec_id) for rec_id, written in self._written.items()]
+            heapq.heapify(self._expiry)
+        if len(self._by_conf) > 2 * live + 64:
+            latest: Dict[str, Tuple[float, int, str]] = {}
+            for entry in self._by_conf:
+                if entry[2] in self._used and entry[1] > latest.get(entry[2], (0.0, -1, ""))[1]:
+                    latest[entry[2]] = entry
+            self._by_conf = list(latest.values())
+            heapq.heapify(self._by_conf)
+
+    def _scope(self, rec_id: str, prov: Dict[str, Any]) -> None:
+        sessions = record_sessions(prov)
+        if not sessions:
+            return
+        self._sessions[rec_id] = list(sessions)
+        for sid in sessions:
+            self._by_session.setdefault(sid, {})[rec_id] = None
+
+    def _unscope(self, rec_id: str) -> None:
+        for sid in self._sessions.pop(rec_id, ()):
+            ids = self._by_session.get(sid)
+            if ids is not None:
+                ids.pop(rec_id, None)
+                if not ids:
+                    del self._by_session[sid]
+
+    def _forget(self, rec_id: str) -> None:
+        self._written.pop(rec_id, None)
+        self._used.pop(rec_id, None)
+        self._unscope(rec_id)
+
+    def _mark_used(self, rec_ids: Iterable[str]) -> None:
+        for rec_id in rec_ids:
+            if rec_id in self._used:
+                self._used.move_to_end(rec_id)
+
+    def _store(self, rec: KnowledgeRecord) -> None:
         self.records[rec.id] = rec
         self.vs.add(rec.id, rec.content + " " + " ".join(rec.topic))
+        self.text.add(rec.id, (rec.content, *rec.topic))
+
+    def _update(self, rec: KnowledgeRecord) -> None:
+        # in-memory records are mutated in place; content (and so the indexes) is unchanged
+        pass
+
+    def _near_duplicate(self, rec: KnowledgeRecord) -> Optional[KnowledgeRecord]:
+        hits = self.vs.search(rec.content + " " + " ".join(rec.topic), top_k=1)
+        if hits and hits[0][0] != rec.id and hits[0][1] >= self.dedup_threshold:
+            return self.get(hits[0][0])
+        return None
+
+    def _merge(self, into: KnowledgeRecord, rec: KnowledgeRecord) -> None:
+        into.confidence = max(into.confidence, rec.confidence)
+        into.timestamp = rec.timestamp
+        prov = into.provenance
+        prov["merged_count"] = prov.get("merged_count", 0) + 1
+        prov["merged_from"] = (prov.get("merged_from", []) + [{"id": rec.id, "source": rec.source, **rec.provenance}])[-5:]
+        # the full set of writing sessions, unlike merged_from, is kept
+        sessions = list(dict.fromkeys(record_sessions(prov) + record_sessions(rec.provenance)))
+        if sessions:
+            prov["sessions"] = sessions
+
+    def add(self, rec: KnowledgeRecord) -> KnowledgeRecord:
+        """Store `rec`, or merge it into a near-duplicate; returns the record that holds it."""
+        with self._lock:
+            # every write expires, merges included; before storing, so a record is never expired by its own insert
+            self.expire()
+            if self.dedup_threshold > 0:
+                dup = self._near_duplicate(rec)
+                if dup is not None:
+                    self._merge(dup, rec)
+                    self._update(dup)
+                    self._track(dup.id, dup.confidence, _epoch(dup.timestamp))
+                    self._scope(dup.id, dup.provenance)
+                    self.merged += 1
+                    return dup
+            self._store(rec)
+            self._track(rec.id, rec.confidence, _epoch(rec.timestamp))
+            self._scope(rec.id, rec.provenance)
+            self._enforce_limits(protect=rec.id)
+            return rec
+
+    def expire(self, now: float | None = None) -> int:
+        """Drop records not written within `ttl` seconds; returns how many were removed."""
+        if not self.ttl:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.ttl
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < cutoff:
+                written, rec_id = heapq.heappop(self._expiry)
+                if self._written.get(rec_id) != written:
+                    continue  # stale entry: removed, or re-written since
+                self.remove(rec_id)
+                removed += 1
+        self.evicted += removed
+        return removed
+
+    def _victim(self, protect: str | None) -> Optional[str]:
+        # `protect` is the record being written: it is never evicted by its own insert
+        if self.eviction == "lru":
+            return next((rec_id for rec_id in self._used if rec_id != protect), None)
+        if self.eviction == "oldest":
+            return next((rec_id for rec_id in self._insertion_order() if rec_id != protect), None)
+        held = None
+        try:
+            while self._by_conf:
+                entry = heapq.heappop(self._by_conf)
+                conf, _, rec_id = entry
+                rec = self.get(rec_id) if rec_id in self._used else None
+                if rec is None or rec.confidence != conf:
+                    continue  # stale entry: removed, or re-pushed with a newer confidence
+                if rec_id == protect:
+                    held = entry
+                    continue
+                return rec_id
+            return None
+        finally:
+            if held is not None:
+                heapq.heappush(self._by_conf, held)
+
+    def _insertion_order(self) -> Iterable[str]:
+        return iter(self.records)
+
+    def _size(self) -> int:
+        return len(self._used)
+
+    def _enforce_limits(self, protect: str | None = None) -> None:
+        while self.max_records and self._size() > self.max_records:
+            victim = self._victim(protect)
+            if victim is None:
+                break
+            self.remove(victim)
+            self.evicted += 1
+
+    def batch(self):
+        return contextlib.nullcontext()
 
     def get(self, rec_id: str) -> Optional[KnowledgeRecord]:
         return self.records.get(rec_id)
 
+    def remove(self, rec_id: str) -> Optional[KnowledgeRecord]:
+        with self._lock:
+            rec = self.records.pop(rec_id, None)
+            if rec:
+                self.vs.remove(rec_id)
+                self.text.remove(rec_id)
+            self._forget(rec_id)
+            return rec
+
+    def _keyword_ids(self, query: str, top_k: int, ids: Sequence[str] | None = None) -> List[str]:
+        # `ids` restricts the matches to those records
+        return self.text.search(query, top_k=top_k, keys=ids)
+
     def search_keyword(self, query: str, top_k: int = 5) -> List[KnowledgeRecord]:
-        q = query.lower()
-        out = []
-        for rec in self.records.values():
-            if q in rec.content.lower() or any(q in t.lower() for t in rec.topic):
-                out.append(rec)
-        return out[:top_k]
+        with self._lock:
+            ids = self._keyword_ids(query, top_k)
+            self._mark_used(ids)
+            return [rec for rec in (self.get(rec_id) for rec_id in ids) if rec]
 
     def search_vector(self, query: str, top_k: int = 5) -> List[Tuple[KnowledgeRecord, float]]:
-        hits = self.vs.search(query, top_k=top_k)
+        with self._lock:
+            hits = self.vs.search(query, top_k=top_k)
+            self._mark_used(rec_id for rec_id, _ in hits)
         out = []
         for rec_id, score in hits:
             rec = self.records.get(rec_id)
@@ -76,12 +502,344 @@ class KnowledgeBase:
                 out.append((rec, score))
         return out
 
-class AgentStateMemory:
+    def search_hybrid(self, query: str, top_k: int = 5, fusion: str = "rrf", vector_weight: float = 0.5,
+                      confidence_weight: float = 0.0, half_life: float = 0.0, rrf_k: int = 60,
+                      pool: int | None = None, match: Dict[str, Any] | None = None) -> List[Tuple[KnowledgeRecord, float, float]]:
+        """
+        Fused vector + keyword retrieval; returns (record, score, similarity), best first.
+        With `match`, only records whose provenance has those items (see
+        provenance_matches) are candidates, e.g. {"session_id": ...}; a
+        session's records are looked up in a per-session id index and scored
+        before the pool is taken, so other sessions cannot crowd them out.
+
+        Candidates are the top `pool` vector hits with positive similarity plus
+        up to `pool` keyword matches, both taken from the indexes. "rrf" fuses them by reciprocal
+        rank, "weighted" by vector_weight * similarity + (1 - vector_weight) for
+        a keyword match; keyword matches are unranked, so each counts as rank 1.
+        Scores are then scaled by confidence (`confidence_weight` in [0, 1]) and
+        halved every `half_life` seconds since the record was last written.
+        """
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"unknown fusion: {fusion}")
+        if top_k <= 0:
+            return []
+        pool = pool or max(4 * top_k, 20)
+        with self._lock:
+            vec_hits, kw_list, candidates = self._hybrid_candidates(query, pool, match)
+            top = rank_hybrid(vec_hits, kw_list, candidates, top_k, fusion, vector_weight, confidence_weight, half_life, rrf_k)
+            self._mark_used(rec.id for rec, _, _ in top)
+        return top
+
+    def _hybrid_candidates(self, query: str, pool: int, match: Dict[str, Any] | None = None) -> Tuple[List[Tuple[str, float]], List[str], Dict[str, Tuple[KnowledgeRecord, float, Optional[float]]]]:
+        # (vector hits, keyword ids, id -> (record, similarity, last write)) for rank_hybrid
+        # a zero-similarity vector hit shares no token with the query; it is not evidence
+        scope = None
+        if match and "session_id" in match:
+            # only the session's own records are ranked, however many others share the KB
+            scope = list(self._by_session.get(match["session_id"], ()))
+            sims = zip(scope, self.vs.similarity(query, scope))
+            vec_hits = heapq.nlargest(pool, ((rec_id, sim) for rec_id, sim in sims if sim > 0), key=lambda hit: hit[1])
+        else:
+            vec_hits = [(rec_id, sim) for rec_id, sim in self.vs.search(query, top_k=pool) if sim > 0]
+        similarity = dict(vec_hits)
+        kw_list = self._keyword_ids(query, pool, scope)
+        extra = [rec_id for rec_id in kw_list if rec_id not in similarity]
+        similarity.update(zip(extra, self.vs.similarity(query, extra)))
+        candidates = {}
+        for rec_id, sim in similarity.items():
+            rec = self.get(rec_id)
+            if rec is not None and provenance_matches(rec, match):
+                candidates[rec_id] = (rec, sim, self._written.get(rec_id))
+        if match:
+            # filtered-out records take no rank either
+            vec_hits = [hit for hit in vec_hits if hit[0] in candidates]
+            kw_list = [rec_id for rec_id in kw_list if rec_id in candidates]
+        return vec_hits, kw_list, candidates
+
+    # Persistence: records as JSONL next to the memory-mappable vector index,
+    # so reopening never re-embeds.
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        tmp = _tmp_path(os.path.join(path, "records.jsonl"))
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for rec in self.records.values():
+                    f.write(json.dumps(rec.to_dict(), ensure_ascii=False) + "\n")
+            self.vs.save(path)
+            os.replace(tmp, os.path.join(path, "records.jsonl"))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "records.jsonl")) and SimpleVectorStore.exists(path)
+
+    @classmethod
+    def open(cls, path: str, index: str | None = None, index_opts: Dict | None = None, mmap: bool = True, **limits) -> "KnowledgeBase":
+        vs = SimpleVectorStore.open(path, mmap=mmap, index=build_index(index, **(index_opts or {})))
+        kb = cls(vector_dim=vs.dim, **limits)
+        kb.vs = vs
+        with open(os.path.join(path, "records.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = KnowledgeRecord(**json.loads(line))
+                    kb.records[rec.id] = rec
+                    kb.text.add(rec.id, (rec.content, *rec.topic))
+                    kb._scope(rec.id, rec.provenance)
+        kb._track_all((rec.id, rec.confidence, _epoch(rec.timestamp)) for rec in kb.records.values())
+        return kb
+
+class WindowStats:
+    """One agent's records in a query window: raw metric values plus downsampled summaries."""
+    __slots__ = ("count", "values", "points", "total", "n")
+
     def __init__(self) -> None:
-        self.records: Dict[str, AgentStateRecord] = {}
+        self.count = 0
+        self.values: List[float] = []
+        # (value, weight) percentile points and exact sum/count from downsampled partitions
+        self.points: List[Tuple[float, float]] = []
+        self.total = 0.0
+        self.n = 0
+
+    def summarize(self, span: float, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"count": self.count, "rate": self.count / span if span > 0 else 0.0}
+        n = len(self.values) + self.n
+        if not n:
+            return stats
+        if self.points:
+            ordered = sorted([(v, 1.0) for v in self.values] + self.points)
+        else:
+            ordered = [(v, 1.0) for v in sorted(self.values)]
+        stats.update(samples=n, mean=(math.fsum(self.values) + self.total) / n, min=ordered[0][0], max=ordered[-1][0])
+        # nearest rank over the combined weights
+        for q in percentiles:
+            need, acc = q / 100 * n, 0.0
+            for v, w in ordered:
+                acc += w
+                if acc >= need - 1e-9:
+                    break
+            stats[f"p{q:g}"] = v
+        return stats
+
+class _Partition:
+    """
+    Records whose timestamp falls in [start, start + partition_seconds).
+    Columns: per agent, the record times; per (agent, metric), times and
+    values, all array-backed and kept in time order. Downsampling drops
+    the records and columns, keeping per-agent counts and, per (agent,
+    metric), count/sum/min/max and 101 percentile points.
+    """
+    __slots__ = ("start", "records", "times", "series", "counts", "summary")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.records: List[AgentStateRecord] = []
+        self.times: Dict[str, array] = {}
+        self.series: Dict[Tuple[str, str], Tuple[array, array]] = {}
+        self.counts: Optional[Dict[str, int]] = None
+        self.summary: Optional[Dict[Tuple[str, str], Tuple[int, float, array]]] = None
+
+    @staticmethod
+    def _put(ts: array, t: float, values: Optional[array] = None, v: float = 0.0) -> None:
+        # out-of-order records are rare; they are inserted in place
+        i = len(ts) if not ts or t >= ts[-1] else bisect.bisect_right(ts, t)
+        ts.insert(i, t)
+        if values is not None:
+            values.insert(i, v)
+
+    def add(self, t: float, rec: AgentStateRecord) -> None:
+        self.records.append(rec)
+        self._put(self.times.setdefault(rec.agent, array("d")), t)
+        for name, value in (rec._metrics or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                ts, values = self.series.setdefault((rec.agent, name), (array("d"), array("d")))
+                self._put(ts, t, values, float(value))
+
+    def merge_summary(self, other: "_Partition") -> None:
+        # both downsampled; merged percentile points are approximate, like their sources
+        for agent, count in other.counts.items():
+            self.counts[agent] = self.counts.get(agent, 0) + count
+        for key, (n, total, points) in other.summary.items():
+            if key not in self.summary:
+                self.summary[key] = (n, total, points)
+                continue
+            n0, total0, points0 = self.summary[key]
+            weighted = sorted([(v, n0 / len(points0)) for v in points0] + [(v, n / len(points)) for v in points])
+            merged, acc, i = array("d"), 0.0, 0
+            for q in range(101):
+                need = q / 100 * (n0 + n)
+                while i < len(weighted) - 1 and acc + weighted[i][1] < need - 1e-9:
+                    acc += weighted[i][1]
+                    i += 1
+                merged.append(weighted[i][0])
+            self.summary[key] = (n0 + n, total0 + total, merged)
+
+    def downsample(self) -> None:
+        if self.summary is not None:
+            return
+        self.counts = {agent: len(ts) for agent, ts in self.times.items()}
+        self.summary = {}
+        for key, (_, values) in self.series.items():
+            ordered = sorted(values)
+            n = len(ordered)
+            points = array("d", (ordered[min(n - 1, max(0, math.ceil(q / 100 * n) - 1))] for q in range(101)))
+            self.summary[key] = (n, math.fsum(ordered), points)
+        self.records, self.times, self.series = [], {}, {}
+
+class AgentStateMemory:
+    """
+    Append-only agent-state records in time partitions of `partition_seconds`,
+    with array-backed metric columns for aggregate queries. aggregate() only
+    visits the partitions overlapping its window, and bisects the columns of
+    the two at its edges, so its cost follows the window, not the history.
+
+    Partitions older than `raw_retention` seconds are downsampled (records
+    dropped; counts and percentile points kept, and counted whole by any
+    window that overlaps them); partitions older than `retention` are
+    dropped. 0 disables either.
+    """
+    def __init__(self, partition_seconds: float = 3600.0, raw_retention: float = 0.0, retention: float = 0.0) -> None:
+        self.partition_seconds = partition_seconds
+        self.raw_retention = raw_retention
+        self.retention = retention
+        self._partitions: Dict[int, _Partition] = {}
+        # partition numbers, ascending
+        self._keys: List[int] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k != "_lock"}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def batch(self):
+        return contextlib.nullcontext()
 
     def add(self, rec: AgentStateRecord) -> None:
-        self.records[rec.id] = rec
+        with self._lock:
+            if self._place(rec):
+                self._compact()
+
+    def _place(self, rec: AgentStateRecord) -> bool:
+        # returns whether a new partition was opened
+        t = _epoch(rec.timestamp)
+        key = int(t // self.partition_seconds)
+        part = self._partitions.get(key)
+        opened = part is None
+        if opened:
+            part = self._partitions[key] = _Partition(key * self.partition_seconds)
+            bisect.insort(self._keys, key)
+        if part.summary is not None:
+            # a late record for a downsampled partition is only counted
+            part.counts[rec.agent] = part.counts.get(rec.agent, 0) + 1
+        else:
+            part.add(t, rec)
+        return opened
+
+    def configure(self, partition_seconds: float | None = None, raw_retention: float | None = None,
+                  retention: float | None = None) -> None:
+        """
+        Apply new options to a restored store, then compact. A new partition
+        size re-partitions the raw records; downsampled partitions landing in
+        one new partition have their summaries merged.
+        """
+        with self._lock:
+            if raw_retention is not None:
+                self.raw_retention = raw_retention
+            if retention is not None:
+                self.retention = retention
+            if partition_seconds is not None and partition_seconds != self.partition_seconds:
+                old = [self._partitions[k] for k in self._keys]
+                self.partition_seconds = partition_seconds
+                self._partitions, self._keys = {}, []
+                for part in old:
+                    if part.summary is None:
+                        continue
+                    key = int(part.start // partition_seconds)
+                    into = self._partitions.get(key)
+                    if into is None:
+                        part.start = key * partition_seconds
+                        self._partitions[key] = part
+                        bisect.insort(self._keys, key)
+                    else:
+                        into.merge_summary(part)
+                for part in old:
+                    for rec in part.records:
+                        self._place(rec)
+            self._compact()
+
+    def __len__(self) -> int:
+        return sum(len(self._partitions[k].records) for k in self._keys)
+
+    def list(self, start: float | None = None, end: float | None = None) -> List[AgentStateRecord]:
+        """Raw records in partition order, optionally limited to [start, end)."""
+        with self._lock:
+            recs = [rec for key in self._window_keys(start, end) for rec in self._partitions[key].records]
+        if start is None and end is None:
+            return recs
+        lo, hi = -math.inf if start is None else start, math.inf if end is None else end
+        return [rec for rec in recs if lo <= _epoch(rec.timestamp) < hi]
+
+    def _window_keys(self, start: float | None, end: float | None) -> List[int]:
+        lo = 0 if start is None else bisect.bisect_left(self._keys, int(start // self.partition_seconds))
+        hi = len(self._keys) if end is None else bisect.bisect_right(self._keys, int(end // self.partition_seconds))
+        return self._keys[lo:hi]
+
+    def compact(self, now: float | None = None) -> None:
+        """Apply retention and downsampling; also runs whenever a new partition opens."""
+        with self._lock:
+            self._compact(now)
+
+    def _compact(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        size = self.partition_seconds
+        if self.retention:
+            cut = bisect.bisect_left(self._keys, int((now - self.retention) // size))
+            for key in self._keys[:cut]:
+                del self._partitions[key]
+            del self._keys[:cut]
+        if self.raw_retention:
+            for key in self._keys:
+                if (key + 1) * size > now - self.raw_retention:
+                    break
+                self._partitions[key].downsample()
 
-    def list(self) -> List[AgentStateRecord]:
-        return list(self.records.values())
+    def aggregate(self, metric: str = "confidence", window: float | None = None, start: float | None = None,
+                  end: float | None = None, agent: str | None = None,
+                  percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-agent record count and rate (per second), and mean/min/max/percentiles
+        of `metric`, over [start, end) or the last `window` seconds.
+        """
+        end = time.time() if end is None else end
+        if window is not None:
+            start = end - window
+        groups: Dict[str, WindowStats] = {}
+        with self._lock:
+            keys = self._window_keys(start, end)
+            if start is None:
+                start = keys[0] * self.partition_seconds if keys else end
+            for key in keys:
+                part = self._partitions[key]
+                if part.summary is not None:
+                    for name, count in part.counts.items():
+                        if agent is None or name == agent:
+                            groups.setdefault(name, WindowStats()).count += count
+                    for (name, m), (n, total, qs) in part.summary.items():
+                        if m == metric and name in groups:
+                            acc = groups[name]
+                            acc.points.extend((v, n / len(qs)) for v in qs)
+                            acc.total += total
+                            acc.n += n
+                    continue
+                whole = part.start >= start and part.start + self.partition_seconds <= end
+                for name, ts in part.times.items():
+                    if agent is not None and name != agent:
+                        continue
+                    acc = groups.setdefault(name, WindowStats())
+                    acc.count += len(ts) if whole else bisect.bisect_left(ts, end) - bisect.bisect_left(ts, start)
+                    series = part.series.get((name, metric))
+                    if series is not None:
+                        sts, values = series
+                        acc.values.extend(values if whole else values[bisect.bisect_left(sts, start):bisect.bisect_left(sts, end)])
+        return {name: acc.summarize(end - start, percentiles) for name, acc in groups.items()}
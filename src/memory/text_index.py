@@ -0,0 +1,317 @@
+# src/memory/text_index.py
+from __future__ import annotations
+import bisect, heapq, math, re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def _prefixed(terms: List[str], prefix: str) -> Iterable[str]:
+    # terms must be sorted; walks the contiguous run sharing `prefix`
+    i = bisect.bisect_left(terms, prefix)
+    while i < len(terms) and terms[i].startswith(prefix):
+        yield terms[i]
+        i += 1
+
+class InvertedIndex:
+    """
+    Incrementally maintained token -> posting list index answering the same
+    case-insensitive substring queries as a linear `query in field.lower()` scan.
+
+    Query tokens are resolved against the vocabulary (the first token as a term
+    suffix, the last as a term prefix, inner tokens exactly; a lone token may sit
+    anywhere inside a term), postings are intersected, and candidates are then
+    verified against the pre-lowered fields in insertion order until top_k hits.
+    """
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[int, None]] = {}
+        self.fields: Dict[int, Tuple[str, ...]] = {}
+        self.keys: Dict[int, str] = {}
+        self.seqs: Dict[str, int] = {}
+        self._next = 0
+        # sorted vocabulary and sorted reversed vocabulary for prefix/suffix lookups
+        self._terms: List[str] = []
+        self._rterms: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str, fields: Sequence[str]) -> None:
+        seq = self.seqs.get(key)
+        if seq is not None:
+            self._unpost(seq)
+        else:
+            seq = self._next
+            self._next += 1
+            self.seqs[key] = seq
+            self.keys[seq] = key
+        lowered = tuple(f.lower() for f in fields)
+        self.fields[seq] = lowered
+        for term in {tok for f in lowered for tok in TOKEN_RE.findall(f)}:
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self._terms, term)
+                bisect.insort(self._rterms, term[::-1])
+            posting[seq] = None
+
+    def remove(self, key: str) -> bool:
+        seq = self.seqs.pop(key, None)
+        if seq is None:
+            return False
+        self._unpost(seq)
+        del self.fields[seq]
+        del self.keys[seq]
+        return True
+
+    def _unpost(self, seq: int) -> None:
+        for term in {tok for f in self.fields.get(seq, ()) for tok in TOKEN_RE.findall(f)}:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(seq, None)
+            if not posting:
+                del self.postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+                del self._rterms[bisect.bisect_left(self._rterms, term[::-1])]
+
+    def _matching_terms(self, tok: str, first: bool, last: bool) -> Iterable[str]:
+        if first and last:
+            return [t for t in self.postings if tok in t]
+        if last:
+            return _prefixed(self._terms, tok)
+        if first:
+            return (r[::-1] for r in _prefixed(self._rterms, tok[::-1]))
+        return [tok] if tok in self.postings else []
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """Sequence numbers that may contain `query`, or None when every doc may."""
+        toks = TOKEN_RE.findall(query)
+        if not toks:
+            return None
+        groups = []
+        for i, tok in enumerate(toks):
+            group = [self.postings[term] for term in self._matching_terms(tok, i == 0, i == len(toks) - 1)]
+            if not group:
+                return []
+            groups.append(group)
+        # expand only the rarest token; the others are membership probes on their postings
+        groups.sort(key=lambda g: sum(len(p) for p in g))
+        cand = set().union(*groups[0])
+        for group in groups[1:]:
+            cand = {seq for seq in cand if any(seq in p for p in group)}
+            if not cand:
+                return []
+        return sorted(cand)
+
+    def search(self, query: str, top_k: Optional[int] = None, keys: Optional[Iterable[str]] = None) -> List[str]:
+        """Keys whose fields contain `query`, in insertion order; `keys` restricts (and bounds) the scan to those."""
+        if top_k is not None and top_k <= 0:
+            return []
+        q = query.lower()
+        cand = self.candidates(q)
+        seqs: Iterable[int] = self.fields.keys() if cand is None else cand
+        if keys is not None:
+            scope = {self.seqs[k] for k in keys if k in self.seqs}
+            # verify whichever side is smaller
+            seqs = sorted(scope) if cand is None or len(scope) < len(cand) else [seq for seq in cand if seq in scope]
+        out: List[str] = []
+        for seq in seqs:
+            if any(q in f for f in self.fields[seq]):
+                out.append(self.keys[seq])
+                if top_k is not None and len(out) >= top_k:
+                    break
+        return out
+
+# posting values pack (term frequency, doc length) into one int: a tuple per
+# entry would be a GC-tracked object and slow every collection
+_LEN_BITS = 32
+_LEN_MASK = (1 << _LEN_BITS) - 1
+
+def _grams(term: str) -> Iterable[str]:
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+class _Layer:
+    """Entries one Bm25Index layer adds or replaces; None marks a deletion of what lies beneath."""
+    __slots__ = ("postings", "docs", "grams")
+
+    def __init__(self) -> None:
+        # term -> {doc: term frequency << _LEN_BITS | doc length}
+        self.postings: Dict[str, Optional[Dict[int, int]]] = {}
+        # doc -> (length, distinct terms)
+        self.docs: Dict[int, Optional[Tuple[int, Tuple[str, ...]]]] = {}
+        # trigram -> terms with a live posting in this layer
+        self.grams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.postings) + len(self.docs)
+
+    def gram(self, term: str) -> None:
+        for g in _grams(term):
+            self.grams.setdefault(g, set()).add(term)
+
+    def ungram(self, term: str) -> None:
+        for g in _grams(term):
+            terms = self.grams[g]
+            terms.discard(term)
+            if not terms:
+                del self.grams[g]
+
+def _merge(lower: _Layer, upper: _Layer, bottom: bool) -> _Layer:
+    out = _Layer()
+    out.postings = {**lower.postings, **upper.postings}
+    out.docs = {**lower.docs, **upper.docs}
+    if bottom:
+        # nothing beneath to mask
+        out.postings = {t: p for t, p in out.postings.items() if p is not None}
+        out.docs = {d: e for d, e in out.docs.items() if e is not None}
+    for term, posting in out.postings.items():
+        if posting is not None:
+            out.gram(term)
+    return out
+
+class Bm25Index:
+    """
+    Okapi BM25 over an inverted index of term frequencies. Query terms also
+    match indexed terms containing them ("former" hits "transformers"), found
+    through a trigram map of the vocabulary, so scoring touches only the
+    postings of matching terms, never the whole corpus. Query terms shorter
+    than three characters fall back to a vocabulary scan.
+
+    The index is a stack of layers, each holding the postings and docs it
+    adds, replaces or deletes. fork() freezes this index's layers and
+    returns an index sharing them under a new empty top layer, so an edit
+    costs the terms it touches (a changed posting is cloned into the top).
+    Layers are merged log-structured: a frozen layer at least half the size
+    of the one beneath is folded into it, which keeps the stack logarithmic
+    and the merge work amortized O(change log n). The original must not
+    change after fork().
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.n = 0
+        self.total_len = 0
+        self._layers: List[_Layer] = [_Layer()]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def fork(self) -> "Bm25Index":
+        new = Bm25Index.__new__(Bm25Index)
+        new.k1, new.b, new.n, new.total_len = self.k1, self.b, self.n, self.total_len
+        layers = [layer for i, layer in enumerate(self._layers) if i == 0 or len(layer)]
+        while len(layers) > 1 and 2 * len(layers[-1]) >= len(layers[-2]):
+            upper = layers.pop()
+            layers[-1] = _merge(layers[-1], upper, bottom=len(layers) == 1)
+        new._layers = layers + [_Layer()]
+        return new
+
+    def posting(self, term: str) -> Optional[Dict[int, int]]:
+        """{doc: packed (term frequency, doc length)} for `term`, or None when no doc has it."""
+        for layer in reversed(self._layers):
+            if term in layer.postings:
+                return layer.postings[term]
+        return None
+
+    def _doc(self, doc: int) -> Optional[Tuple[int, Tuple[str, ...]]]:
+        for layer in reversed(self._layers):
+            if doc in layer.docs:
+                return layer.docs[doc]
+        return None
+
+    def _beneath(self, table: str, key: Any) -> bool:
+        return any(key in getattr(layer, table) for layer in self._layers[:-1])
+
+    def _writable(self, term: str) -> Dict[int, int]:
+        top = self._layers[-1]
+        posting = top.postings.get(term)
+        if posting is None:
+            shared = self.posting(term)
+            posting = top.postings[term] = dict(shared) if shared else {}
+            top.gram(term)
+        return posting
+
+    def add(self, doc: int, text: str) -> None:
+        self.remove(doc)
+        toks = tokenize(text)
+        tf: Dict[str, int] = {}
+        for tok in toks:
+            tf[tok] = tf.get(tok, 0) + 1
+        length = len(toks)
+        top = self._layers[-1]
+        top.docs[doc] = (length, tuple(tf))
+        self.n += 1
+        self.total_len += length
+        postings = top.postings
+        for term, n in tf.items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = self._writable(term)
+            posting[doc] = n << _LEN_BITS | length
+
+    def remove(self, doc: int) -> bool:
+        entry = self._doc(doc)
+        if entry is None:
+            return False
+        length, terms = entry
+        top = self._layers[-1]
+        if self._beneath("docs", doc):
+            top.docs[doc] = None
+        else:
+            del top.docs[doc]
+        self.n -= 1
+        self.total_len -= length
+        for term in terms:
+            posting = self._writable(term)
+            posting.pop(doc, None)
+            if not posting:
+                if self._beneath("postings", term):
+                    top.postings[term] = None
+                else:
+                    del top.postings[term]
+                top.ungram(term)
+        return True
+
+    def _matching(self, q: str) -> Iterable[Tuple[str, Dict[int, int]]]:
+        layers = self._layers
+        if len(q) < 3:
+            terms = {t for layer in layers for t, p in layer.postings.items() if p is not None and q in t}
+        else:
+            # candidates from the rarest trigram of `q`, verified by substring test
+            rarest = min(_grams(q), key=lambda g: sum(len(layer.grams.get(g, ())) for layer in layers))
+            terms = {t for layer in layers for t in layer.grams.get(rarest, ()) if q in t}
+        for term in sorted(terms):
+            posting = self.posting(term)
+            if posting:
+                yield term, posting
+
+    def score(self, terms: Sequence[str]) -> Dict[int, float]:
+        """BM25 score for every doc matching at least one (infix-expanded) term."""
+        n = self.n
+        if not n:
+            return {}
+        avg = self.total_len / n or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        # the length-normalized term weight depends only on (tf, doc length), which repeat a lot
+        norms: Dict[int, float] = {}
+        for q in dict.fromkeys(terms):
+            for _, posting in self._matching(q):
+                idf = math.log(1.0 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc, packed in posting.items():
+                    norm = norms.get(packed)
+                    if norm is None:
+                        tf, length = packed >> _LEN_BITS, packed & _LEN_MASK
+                        norm = norms[packed] = tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * length / avg))
+                    scores[doc] = scores.get(doc, 0.0) + idf * norm
+        return scores
+
+    def search(self, terms: Sequence[str], top_k: int) -> Tuple[List[Tuple[int, float]], int]:
+        """Top-k (doc, score) by heap selection, plus the total number of matching docs."""
+        scores = self.score(terms)
+        # ties keep corpus order
+        top = heapq.nsmallest(top_k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return top, len(scores)
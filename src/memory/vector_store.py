@@ -1,41 +1,305 @@
 # src/memory/vector_store.py
 from __future__ import annotations
-import math, re
-from typing import Dict, List, Tuple
+import heapq, json, math, os, re, uuid
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..core.utils import fnv1a_64
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORMAT_VERSION = 1
+HASH_NAME = "fnv1a64"
+_VECTORS_FILE = "vectors.f32"
+_TABLE_FILE = "index.json"
+
+def _tmp_path(path: str) -> str:
+    # unique per writer, so processes saving to one directory never write into each other's temp file
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+@lru_cache(maxsize=1 << 16)
+def _token_hash(tok: str, seed: int) -> int:
+    return fnv1a_64(tok, seed)
 
 class SimpleVectorStore:
     """
     Deterministic hashed bag-of-words embedder with cosine similarity.
-    No external deps.
+    Embeddings live in a contiguous float32 matrix when numpy is available,
+    otherwise in plain Python lists. No other external deps.
     """
-    def __init__(self, dim: int = 256) -> None:
+    INITIAL_CAPACITY = 64
+    # upper bound on query x record scores materialized at once by search_many
+    BATCH_CELLS = 1 << 22
+
+    def __init__(self, dim: int = 256, use_numpy: bool | None = None, index=None, seed: int = 0) -> None:
         self.dim = dim
-        self.store: Dict[str, List[float]] = {}
+        self.seed = seed
+        # set while the matrix is a read-only memory map; the first write copies it
+        self._mapped = False
         self.texts: Dict[str, str] = {}
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        if self.use_numpy:
+            self._mat = np.zeros((self.INITIAL_CAPACITY, dim), dtype=np.float32)
+        else:
+            self._vecs: List[List[float]] = []
+        # optional ANN index (see ann.py); it only narrows the rows that get scored
+        self.index = index if self.use_numpy else None
+        if self.index is not None:
+            self.index.attach(self)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def store(self) -> Dict[str, List[float]]:
+        # read-only snapshot kept for callers of the old dict-based layout
+        return {k: self.vector(k) for k in self.ids}
 
     def _tokenize(self, text: str) -> List[str]:
         return re.findall(r"[a-zA-Z0-9_]+", text.lower())
 
+    def _bucket(self, tok: str) -> int:
+        return _token_hash(tok, self.seed) % self.dim
+
     def embed(self, text: str) -> List[float]:
         vec = [0.0] * self.dim
         tokens = self._tokenize(text)
         if not tokens:
             return vec
         for tok in tokens:
-            h = (hash(tok) % self.dim + self.dim) % self.dim
-            vec[h] += 1.0
+            vec[self._bucket(tok)] += 1.0
         norm = math.sqrt(sum(v*v for v in vec)) or 1.0
         return [v / norm for v in vec]
 
+    def _embed_array(self, text: str):
+        buckets = [self._bucket(tok) for tok in self._tokenize(text)]
+        vec = np.bincount(buckets, minlength=self.dim).astype(np.float32) if buckets else np.zeros(self.dim, dtype=np.float32)
+        norm = float(np.sqrt(vec @ vec)) or 1.0
+        return vec / norm
+
+    def vector(self, key: str) -> List[float]:
+        row = self.rows[key]
+        if self.use_numpy:
+            return [float(v) for v in self._mat[row]]
+        return list(self._vecs[row])
+
+    def _grow(self, needed: int) -> None:
+        cap = self._mat.shape[0]
+        if needed <= cap and not self._mapped:
+            return
+        cap = max(cap, 1)
+        while cap < needed:
+            cap *= 2
+        grown = np.zeros((cap, self.dim), dtype=np.float32)
+        grown[:self._mat.shape[0]] = self._mat
+        self._mat = grown
+        self._mapped = False
+
     def add(self, key: str, text: str) -> None:
         self.texts[key] = text
-        self.store[key] = self.embed(text)
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(key)
+            self.rows[key] = row
+            if not self.use_numpy:
+                self._vecs.append([])
+        if self.use_numpy:
+            self._grow(row + 1)
+            self._mat[row] = self._embed_array(text)
+            if self.index is not None:
+                self.index.add(key, self._mat[row])
+        else:
+            self._vecs[row] = self.embed(text)
+
+    def add_vector(self, key: str, vec: Sequence[float]) -> None:
+        """Insert an already computed (normalized) embedding, e.g. one loaded from disk."""
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(key)
+            self.rows[key] = row
+            if not self.use_numpy:
+                self._vecs.append([])
+        if self.use_numpy:
+            self._grow(row + 1)
+            self._mat[row] = vec
+            if self.index is not None:
+                self.index.add(key, self._mat[row])
+        else:
+            self._vecs[row] = [float(v) for v in vec]
+
+    def remove(self, key: str) -> bool:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return False
+        self.texts.pop(key, None)
+        if self.index is not None:
+            self.index.remove(key)
+        # swap the last row into the hole so the matrix stays contiguous
+        last = len(self.ids) - 1
+        if self.use_numpy:
+            self._grow(last + 1)
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+            if self.use_numpy:
+                self._mat[row] = self._mat[last]
+            else:
+                self._vecs[row] = self._vecs[last]
+        self.ids.pop()
+        if self.use_numpy:
+            self._mat[last] = 0.0
+        else:
+            self._vecs.pop()
+        return True
+
+    def matrix(self):
+        return self._mat[:len(self.ids)]
+
+    def _top_rows(self, scores, top_k: int, candidates: Optional[object] = None):
+        # partial selection; ties resolve to the earliest inserted row like a stable sort.
+        # `candidates` maps positions in `scores` back to matrix rows when only a subset was scored
+        n = scores.shape[0]
+        k = min(top_k, n)
+        if k <= 0:
+            return []
+        if k < n:
+            kth = np.partition(scores, n - k)[n - k]
+            better = np.flatnonzero(scores > kth)
+            equal = np.flatnonzero(scores == kth)[:k - len(better)]
+            rows = np.concatenate([better, equal])
+        else:
+            rows = np.arange(n)
+        order = np.lexsort((rows, -scores[rows]))
+        if candidates is None:
+            return [(self.ids[r], float(scores[r])) for r in rows[order]]
+        return [(self.ids[candidates[r]], float(scores[r])) for r in rows[order]]
 
     def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
-        qv = self.embed(query)
-        results: List[Tuple[str, float]] = []
-        for k, v in self.store.items():
-            score = sum(a*b for a,b in zip(qv, v))
-            results.append((k, float(score)))
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+        if not self.use_numpy:
+            qv = self.embed(query)
+            scored = ((k, float(sum(a*b for a,b in zip(qv, v)))) for k, v in zip(self.ids, self._vecs))
+            return heapq.nlargest(top_k, scored, key=lambda x: x[1])
+        n = len(self.ids)
+        if not n:
+            return []
+        qv = self._embed_array(query)
+        if self.index is not None:
+            cand = self.index.candidates(qv)
+            if cand is not None:
+                return self._top_rows(self._mat[cand] @ qv, top_k, cand)
+        scores = self._mat[:n] @ qv
+        return self._top_rows(scores, top_k)
+
+    def similarity(self, query: str, keys: Sequence[str]) -> List[float]:
+        """Cosine similarity between `query` and the stored vectors of `keys`."""
+        if not keys:
+            return []
+        if not self.use_numpy:
+            qv = self.embed(query)
+            return [float(sum(a*b for a, b in zip(qv, self._vecs[self.rows[k]]))) for k in keys]
+        qv = self._embed_array(query)
+        return [float(v) for v in self._mat[[self.rows[k] for k in keys]] @ qv]
+
+    def search_many(self, queries: Sequence[str], top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Score a batch of queries with one matrix product per chunk of queries."""
+        n = len(self.ids)
+        if not self.use_numpy or not n or self.index is not None:
+            return [self.search(q, top_k=top_k) for q in queries]
+        out: List[List[Tuple[str, float]]] = []
+        chunk = max(1, self.BATCH_CELLS // n)
+        mat = self._mat[:n]
+        for start in range(0, len(queries), chunk):
+            qm = np.stack([self._embed_array(q) for q in queries[start:start+chunk]])
+            scores = qm @ mat.T
+            out.extend(self._top_rows(row, top_k) for row in scores)
+        return out
+
+    def to_bytes(self) -> bytes:
+        """The embeddings as a row-major little-endian float32 matrix, in `ids` order."""
+        if self.use_numpy:
+            return np.ascontiguousarray(self._mat[:len(self.ids)], dtype="<f4").tobytes()
+        flat = array("f")
+        for v in self._vecs:
+            flat.extend(v)
+        return flat.tobytes()
+
+    # Persistence: a raw little-endian float32 matrix (memory-mappable) plus a JSON id table.
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        n = len(self.ids)
+        vec_tmp = _tmp_path(os.path.join(path, _VECTORS_FILE))
+        with open(vec_tmp, "wb") as f:
+            if self.use_numpy:
+                np.ascontiguousarray(self._mat[:n], dtype="<f4").tofile(f)
+            else:
+                for v in self._vecs:
+                    array("f", v).tofile(f)
+        table = {"version": FORMAT_VERSION, "hash": HASH_NAME, "seed": self.seed, "dim": self.dim, "count": n, "ids": self.ids,
+                 "texts": [self.texts.get(key) for key in self.ids]}
+        table_tmp = _tmp_path(os.path.join(path, _TABLE_FILE))
+        with open(table_tmp, "w", encoding="utf-8") as f:
+            json.dump(table, f)
+        # replace, never truncate: readers that mapped the old file keep a valid view
+        os.replace(vec_tmp, os.path.join(path, _VECTORS_FILE))
+        os.replace(table_tmp, os.path.join(path, _TABLE_FILE))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, _TABLE_FILE))
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True, use_numpy: bool | None = None, index=None) -> "SimpleVectorStore":
+        """Load a saved store; with numpy and mmap=True the matrix is mapped, not read."""
+        with open(os.path.join(path, _TABLE_FILE), "r", encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("version") != FORMAT_VERSION or table.get("hash") != HASH_NAME:
+            raise ValueError(f"unsupported vector index format in {path}: {table.get('version')}/{table.get('hash')}")
+        n, dim = table["count"], table["dim"]
+        vec_path = os.path.join(path, _VECTORS_FILE)
+        if (np is not None if use_numpy is None else use_numpy and np is not None):
+            if n and mmap:
+                mat = np.memmap(vec_path, dtype="<f4", mode="r", shape=(n, dim))
+            else:
+                mat = np.fromfile(vec_path, dtype="<f4").reshape(n, dim).astype(np.float32)
+        else:
+            mat = array("f")
+            with open(vec_path, "rb") as f:
+                mat.fromfile(f, n * dim)
+        vs = cls.from_matrix(table["ids"], mat, dim, seed=table["seed"], use_numpy=use_numpy, index=index, mapped=bool(n and mmap))
+        # absent in files written before texts were saved; vectors added without text have None
+        vs.texts = {key: text for key, text in zip(vs.ids, table.get("texts", ())) if text is not None}
+        return vs
+
+    @classmethod
+    def from_matrix(cls, ids: Sequence[str], mat, dim: int, seed: int = 0, use_numpy: bool | None = None,
+                    index=None, mapped: bool = False) -> "SimpleVectorStore":
+        """
+        Wrap already computed embeddings: `mat` is an (n, dim) float32 array or a
+        flat array("f"). A `mapped` matrix is treated as read-only and copied on
+        the first write.
+        """
+        vs = cls(dim=dim, use_numpy=use_numpy, seed=seed)
+        n = len(ids)
+        vs.ids = list(ids)
+        vs.rows = {k: i for i, k in enumerate(vs.ids)}
+        if vs.use_numpy:
+            if n:
+                vs._mat = mat if mapped else np.asarray(mat, dtype=np.float32).reshape(n, dim)
+                vs._mapped = mapped
+        else:
+            flat = mat if isinstance(mat, array) else array("f", np.asarray(mat).ravel().tolist())
+            vs._vecs = [list(flat[i*dim:(i+1)*dim]) for i in range(n)]
+        if index is not None and vs.use_numpy:
+            vs.index = index
+            index.attach(vs)
+            if n >= index.train_min:
+                index.train()
+        return vs
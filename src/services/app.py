@@ -1,9 +1,11 @@
 # src/services/app.py
 from __future__ import annotations
 import os
+from typing import Any, Dict
 from ..agents.coordinator import Coordinator
+from ..core.config import Config
 
-def build_coordinator() -> Coordinator:
-    kb_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "knowledge_base.json"))
-    log_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "outputs"))
-    return Coordinator(cfg=None, kb_path=kb_path, log_dir=log_dir)
+def build_coordinator(log_dir: str | None = None, cfg: Dict[str, Any] | None = None) -> Coordinator:
+    kb_path = Config.RESEARCH_KB or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "knowledge_base.json"))
+    log_dir = log_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "outputs"))
+    return Coordinator(cfg=cfg, kb_path=kb_path, log_dir=log_dir)
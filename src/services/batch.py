@@ -0,0 +1,117 @@
+# src/services/batch.py
+"""
+Offline batch answering: JSONL queries in, JSONL answers out, in input order.
+
+Input lines are objects with a "query" (or "prompt"/"text") field, JSON
+strings, or plain text; an "id" and "session_id" are passed through. Chunks
+of `chunk_size` queries are answered by a pool of worker processes, each with
+its own Coordinator from build_coordinator(); at most `max_inflight` chunks
+are queued at once, so memory stays flat however long the input is. Each
+Coordinator is closed when its process exits, flushing its buffered trace to
+its own trace.batch-<pid>.jsonl; inline runs (workers=1) use trace.jsonl.
+Only an inline run writes KB_DIR back on close; pool workers leave it as is.
+"""
+from __future__ import annotations
+import json, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util as mp_util
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+from .app import build_coordinator
+
+QUERY_FIELDS = ("query", "prompt", "text")
+
+_coordinator = None
+
+def _init_worker(log_dir: str | None = None) -> None:
+    global _coordinator
+    _coordinator = build_coordinator(log_dir, cfg={"trace_file": f"trace.batch-{os.getpid()}.jsonl", "kb_save_on_close": False})
+    # pool workers exit without running atexit; multiprocessing finalizers do run
+    mp_util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker() -> None:
+    global _coordinator
+    if _coordinator is not None:
+        _coordinator.close()
+        _coordinator = None
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        item = json.loads(line)
+    except ValueError:
+        item = line
+    if isinstance(item, str):
+        return {"query": item}
+    if isinstance(item, dict):
+        query = next((item[k] for k in QUERY_FIELDS if item.get(k)), None)
+        if query is not None:
+            return {"id": item.get("id"), "session_id": item.get("session_id"), "query": query}
+    return {"error": "no query field", "line": line}
+
+def answer_chunk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if _coordinator is None:
+        _init_worker()
+    out = []
+    for item in items:
+        if "error" in item:
+            out.append(item)
+            continue
+        try:
+            answer = _coordinator.handle(item["query"], session_id=item.get("session_id"))
+            row = {"query": item["query"], "answer": answer}
+        except Exception as e:
+            row = {"query": item["query"], "error": str(e)}
+        if item.get("id") is not None:
+            row = {"id": item["id"], **row}
+        out.append(row)
+    return out
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for line in lines:
+        item = parse_line(line)
+        if item is None:
+            continue
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(inp: TextIO, out: TextIO, workers: int = 1, chunk_size: int = 16, max_inflight: int | None = None,
+              log_dir: str | None = None) -> int:
+    """Answer every query in `inp`, writing one JSON line per query to `out`; returns the count."""
+    global _coordinator
+    written = 0
+    def emit(rows: List[Dict[str, Any]]) -> None:
+        nonlocal written
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+        written += len(rows)
+
+    if workers <= 1:
+        if _coordinator is None:
+            _coordinator = build_coordinator(log_dir)
+        try:
+            for chunk in _chunks(inp, chunk_size):
+                emit(answer_chunk(chunk))
+        finally:
+            _close_worker()
+        return written
+
+    max_inflight = max_inflight or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_dir,)) as pool:
+        pending = deque()
+        for chunk in _chunks(inp, chunk_size):
+            pending.append(pool.submit(answer_chunk, chunk))
+            if len(pending) >= max_inflight:
+                # results leave in submission order
+                emit(pending.popleft().result())
+        while pending:
+            emit(pending.popleft().result())
+    return written
@@ -0,0 +1,265 @@
+# src/services/http.py
+"""
+Local HTTP service over a pool of pre-warmed Coordinator worker processes.
+
+    python -m src.main --mode serve --port 8080 --workers 4
+
+    POST /chat     {"session_id": "...", "query": "..."} -> {"session_id", "answer"}
+    GET  /healthz  200 once every worker is up, 503 otherwise
+    GET  /metrics  Prometheus text; ?format=json adds each worker's stage timings
+
+A session is always routed to the same worker (FNV hash of its id), so its
+conversation memory lives in one process. Sessions on one worker share its
+knowledge base (research findings, the answer cache), but memory recall
+only returns knowledge stored by the asking session.
+Each worker accepts at most `queue_size` outstanding requests; beyond that
+/chat answers 503 at once, and a request not answered within `timeout`
+seconds gets 504. A worker process that dies is respawned; its pending
+requests fail with 500 at once. Worker i traces to trace.http-<i>.jsonl;
+workers open KB_DIR but never write it back.
+"""
+from __future__ import annotations
+import itertools, json, multiprocessing as mp, queue, signal, threading, time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from ..core.metrics import Metrics
+from ..core.utils import fnv1a_64, gen_id
+from .app import build_coordinator
+
+class Overloaded(Exception):
+    """The worker owning the session has `queue_size` requests outstanding."""
+
+def _worker_main(index: int, requests, results) -> None:
+    # Ctrl-C reaches the whole process group; the parent shuts workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    co = build_coordinator(cfg={"trace_file": f"trace.http-{index}.jsonl", "kb_save_on_close": False})
+    results.put((None, "ready", index))
+    while True:
+        msg = requests.get()
+        if msg is None:
+            break
+        req_id, kind, payload = msg
+        try:
+            if kind == "chat":
+                value = co.handle(payload["query"], session_id=payload["session_id"])
+            else:
+                value = co.metrics.snapshot()
+            results.put((req_id, "ok", value))
+        except Exception as e:
+            results.put((req_id, "error", str(e)))
+    co.close()
+
+class WorkerPool:
+    def __init__(self, workers: int = 2, queue_size: int = 64, timeout: float = 30.0) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.inflight = [0] * workers
+        self.ready = [False] * workers
+        self.restarts = 0
+        self._closing = False
+        self._results = mp.Queue()
+        self._queues: List[Any] = [None] * workers
+        self._procs: List[Any] = [None] * workers
+        for i in range(workers):
+            self._spawn(i)
+        self._pending: Dict[int, Tuple[int, Future]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._all_ready = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="pool-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def _spawn(self, worker: int) -> None:
+        # a fresh request queue: the old one may hold requests already failed
+        self._queues[worker] = mp.Queue()
+        self._procs[worker] = mp.Process(target=_worker_main, args=(worker, self._queues[worker], self._results),
+                                         name=f"coordinator-{worker}", daemon=True)
+        self._procs[worker].start()
+
+    def _check_workers(self) -> None:
+        for worker, proc in enumerate(self._procs):
+            if proc.is_alive() or self._closing:
+                continue
+            with self._lock:
+                failed = [req_id for req_id, (w, _) in self._pending.items() if w == worker]
+                futs = [self._pending.pop(req_id)[1] for req_id in failed]
+                self.inflight[worker] = 0
+                self.ready[worker] = False
+                self._all_ready.clear()
+                self._spawn(worker)
+                self.restarts += 1
+            for fut in futs:
+                if not fut.done():
+                    fut.set_exception(RuntimeError(f"worker {worker} exited (code {proc.exitcode}); restarted"))
+
+    def _dispatch(self) -> None:
+        checked = time.monotonic()
+        while True:
+            # liveness is checked at least every half second, busy or idle
+            if time.monotonic() - checked >= 0.5:
+                self._check_workers()
+                checked = time.monotonic()
+            try:
+                msg = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if msg is None:
+                return
+            req_id, status, value = msg
+            if req_id is None:
+                self.ready[value] = True
+                if all(self.ready):
+                    self._all_ready.set()
+                continue
+            with self._lock:
+                worker, fut = self._pending.pop(req_id, (None, None))
+                if worker is not None:
+                    self.inflight[worker] -= 1
+            if fut is None or fut.done():
+                continue
+            if status == "ok":
+                fut.set_result(value)
+            else:
+                fut.set_exception(RuntimeError(value))
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        return self._all_ready.wait(timeout)
+
+    def alive(self) -> int:
+        return sum(proc.is_alive() for proc in self._procs)
+
+    def route(self, session_id: str) -> int:
+        return fnv1a_64(session_id) % self.workers
+
+    def _submit(self, worker: int, kind: str, payload: Any, bounded: bool = True) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if bounded and self.inflight[worker] >= self.queue_size:
+                raise Overloaded(f"worker {worker} has {self.inflight[worker]} requests queued")
+            req_id = next(self._ids)
+            self._pending[req_id] = (worker, fut)
+            self.inflight[worker] += 1
+            # under the lock, so a respawn cannot swap the queue in between
+            self._queues[worker].put((req_id, kind, payload))
+        return fut
+
+    def chat(self, session_id: str, query: str, timeout: float | None = None) -> str:
+        """Raises Overloaded when the session's worker is full, TimeoutError when it does not answer in time."""
+        fut = self._submit(self.route(session_id), "chat", {"session_id": session_id, "query": query})
+        try:
+            return fut.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            # the worker still answers later; that result is discarded
+            fut.cancel()
+            raise TimeoutError(f"no answer within {self.timeout if timeout is None else timeout}s")
+
+    def worker_metrics(self, timeout: float = 2.0) -> List[Optional[Dict[str, Any]]]:
+        futs = [self._submit(i, "metrics", None, bounded=False) for i in range(self.workers)]
+        out = []
+        for fut in futs:
+            try:
+                out.append(fut.result(timeout=timeout))
+            except Exception:
+                out.append(None)
+        return out
+
+    def close(self) -> None:
+        self._closing = True
+        for q in self._queues:
+            q.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._results.put(None)
+        self._dispatcher.join(timeout=5)
+
+class ChatService:
+    """The worker pool, service-level metrics, and the HTTP server in front of them."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, workers: int = 2, queue_size: int = 64, timeout: float = 30.0) -> None:
+        self.pool = WorkerPool(workers=workers, queue_size=queue_size, timeout=timeout)
+        self.metrics = Metrics()
+        self.metrics.gauge("workers_alive", self.pool.alive)
+        self.metrics.gauge("inflight", lambda: sum(self.pool.inflight))
+        self.metrics.gauge("worker_restarts", lambda: self.pool.restarts)
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.close()
+
+def _make_handler(service: ChatService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def _send(self, code: int, body: Any, content_type: str = "application/json") -> None:
+            data = (body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/healthz":
+                alive, ready = service.pool.alive(), all(service.pool.ready)
+                self._send(200 if ready and alive == service.pool.workers else 503,
+                           {"status": "ok" if ready else "starting", "workers": service.pool.workers, "alive": alive})
+            elif url.path == "/metrics":
+                if parse_qs(url.query).get("format") == ["json"]:
+                    self._send(200, {**service.metrics.snapshot(), "workers": service.pool.worker_metrics()})
+                else:
+                    self._send(200, service.metrics.prometheus(), "text/plain; version=0.0.4")
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if urlparse(self.path).path != "/chat":
+                self._send(404, {"error": "not found"})
+                return
+            metrics = service.metrics
+            metrics.inc("http_requests")
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                query = body.get("query") or body.get("message")
+            except (ValueError, AttributeError):
+                body, query = {}, None
+            if not isinstance(query, str) or not query.strip():
+                metrics.inc("http_bad_requests")
+                self._send(400, {"error": "expected a JSON body with a 'query'"})
+                return
+            session_id = str(body.get("session_id") or gen_id("sess"))
+            try:
+                with metrics.span("http.chat"):
+                    answer = service.pool.chat(session_id, query)
+            except Overloaded as e:
+                metrics.inc("http_rejected")
+                self._send(503, {"error": str(e), "session_id": session_id})
+                return
+            except TimeoutError as e:
+                metrics.inc("http_timeouts")
+                self._send(504, {"error": str(e), "session_id": session_id})
+                return
+            except Exception as e:
+                metrics.inc("http_errors")
+                self._send(500, {"error": str(e), "session_id": session_id})
+                return
+            self._send(200, {"session_id": session_id, "answer": answer})
+
+    return Handler
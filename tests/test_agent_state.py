@@ -0,0 +1,89 @@
+import pickle
+from datetime import datetime, timezone
+import pytest
+from src.memory.schema import AgentStateRecord
+from src.memory.stores import AgentStateMemory
+from src.memory.sqlite_stores import open_sqlite_stores
+
+T0 = 1_700_000_000 // 3600 * 3600
+
+def _ts(t):
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def _rec(i, t, agent, conf):
+    return AgentStateRecord(id=f"s{i}", timestamp=_ts(t), agent=agent, task="t", result_summary="r",
+                            metrics=None if conf is None else {"confidence": conf})
+
+def _fill(store, hours=3):
+    # one record a minute; research every minute, manager every other, confidence cycling 0.0 .. 0.9
+    i = 0
+    for m in range(hours * 60):
+        store.add(_rec(i, T0 + 60 * m, "research", (m % 10) / 10))
+        i += 1
+        if m % 2 == 0:
+            store.add(_rec(i, T0 + 60 * m, "manager", None if m % 4 else 0.5))
+            i += 1
+    return i
+
+def test_window_aggregates():
+    store = AgentStateMemory()
+    assert _fill(store) == len(store) == 270
+    stats = store.aggregate(start=T0 + 1800, end=T0 + 5400)
+    research, manager = stats["research"], stats["manager"]
+    assert research["count"] == 60 and research["rate"] == pytest.approx(60 / 3600)
+    assert research["mean"] == pytest.approx(0.45) and research["min"] == 0.0 and research["max"] == 0.9
+    assert research["p50"] == 0.4 and research["p90"] == 0.8 and research["p99"] == 0.9
+    # records without the metric count, but are not sampled
+    assert manager["count"] == 30 and manager["samples"] == 15 and manager["mean"] == 0.5
+    assert set(store.aggregate(end=T0 + 5400, window=600, agent="manager")) == {"manager"}
+    assert store.aggregate(metric="latency", start=T0, end=T0 + 60)["research"] == {"count": 1, "rate": 1 / 60}
+    assert len(store.list(T0 + 1800, T0 + 5400)) == 90
+
+def test_downsampling_and_retention():
+    store = AgentStateMemory()
+    _fill(store)
+    # set afterwards: opening a partition compacts against the wall clock, long past T0
+    store.raw_retention, store.retention = 3600, 3 * 3600
+    store.compact(now=T0 + 3 * 3600)
+    # the first two hours are downsampled: counted whole, percentiles from their summary points
+    assert len(store) == 90
+    stats = store.aggregate(start=T0, end=T0 + 3 * 3600)["research"]
+    assert stats["count"] == 180 and stats["mean"] == pytest.approx(0.45) and stats["p90"] == 0.8
+    store.compact(now=T0 + 4 * 3600 + 1)
+    assert store.aggregate(start=T0, end=T0 + 3 * 3600)["research"]["count"] == 120
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored.aggregate(start=T0, end=T0 + 3 * 3600) == store.aggregate(start=T0, end=T0 + 3 * 3600)
+    # a late record for a downsampled partition is counted only
+    restored.add(_rec(999, T0 + 2 * 3600, "research", 1.0))
+    assert restored.aggregate(start=T0, end=T0 + 3 * 3600)["research"]["count"] == 121 and len(restored) == 0
+
+def test_sqlite_matches_in_memory(tmp_path):
+    memory = AgentStateMemory()
+    _, _, sqlite = open_sqlite_stores(str(tmp_path / "m.db"), vector_dim=32)
+    _fill(memory)
+    _fill(sqlite)
+    for args in ({"start": T0 + 1800, "end": T0 + 5400}, {"end": T0 + 3 * 3600, "window": 7200, "agent": "research"}):
+        expect = memory.aggregate(**args)
+        assert {a: pytest.approx(s) for a, s in sqlite.aggregate(**args).items()} == expect
+    assert [r.id for r in sqlite.list(T0 + 1800, T0 + 5400)] == [r.id for r in memory.list(T0 + 1800, T0 + 5400)]
+
+def test_sqlite_retention_is_applied_on_add(tmp_path):
+    import time
+    _, _, sqlite = open_sqlite_stores(str(tmp_path / "m.db"), vector_dim=32, state_retention=3600)
+    now = time.time()
+    sqlite.db.write([("INSERT INTO agent_state (id, timestamp, agent, metrics) VALUES ('old', ?, 'research', '{}')", (_ts(now - 7200),))])
+    sqlite.add(_rec(1, now, "research", 0.5))
+    assert [r.id for r in sqlite.list()] == ["s1"]
+
+def test_configure_repartitions_raw_and_downsampled_records():
+    store = AgentStateMemory()
+    _fill(store, hours=4)
+    store.raw_retention = 3600
+    store.compact(now=T0 + 3 * 3600)
+    before = store.aggregate(start=T0, end=T0 + 4 * 3600)["research"]
+    # configure() compacts against the wall clock, long past T0
+    store.configure(partition_seconds=7200, raw_retention=0)
+    after = store.aggregate(start=T0, end=T0 + 4 * 3600)["research"]
+    assert len(store._keys) == 2 and len(store) == 180
+    assert after["count"] == before["count"] == 240 and after["mean"] == pytest.approx(before["mean"])
+    assert after["p50"] == pytest.approx(before["p50"], abs=0.1)
@@ -0,0 +1,56 @@
+import random
+import pytest
+from src.memory.vector_store import SimpleVectorStore, np
+from src.memory.stores import KnowledgeBase
+
+pytestmark = pytest.mark.skipif(np is None, reason="IVF index requires numpy")
+
+def _corpus(n, seed=7):
+    rng = random.Random(seed)
+    topics = [[f"t{t}w{i}" for i in range(12)] for t in range(40)]
+    docs = []
+    for _ in range(n):
+        words = rng.choice(topics)
+        docs.append(" ".join(rng.choice(words) for _ in range(8)))
+    return docs
+
+def _recall_at_k(nprobe, k=5, nlist=32):
+    from src.memory.ann import IVFIndex
+    docs = _corpus(4000)
+    exact = SimpleVectorStore(dim=128)
+    ann = SimpleVectorStore(dim=128, index=IVFIndex(nlist=nlist, nprobe=nprobe))
+    for i, d in enumerate(docs):
+        exact.add(f"d{i}", d)
+        ann.add(f"d{i}", d)
+    queries = _corpus(100, seed=11)
+    hit = 0
+    for q in queries:
+        truth = {key for key, _ in exact.search(q, top_k=k)}
+        hit += len(truth & {key for key, _ in ann.search(q, top_k=k)})
+    return hit / (k * len(queries))
+
+def test_ivf_recall_against_exact_scan():
+    low, high = _recall_at_k(nprobe=2), _recall_at_k(nprobe=8)
+    assert high >= 0.9
+    assert high >= low
+    assert _recall_at_k(nprobe=32) == 1.0
+    # a quarter of the cells probed, not the exact-scan fallback
+    assert _recall_at_k(nprobe=4, nlist=16) >= 0.9
+
+def test_ivf_incremental_insert_and_delete():
+    kb = KnowledgeBase(vector_dim=64, index="ivf", index_opts={"nlist": 16, "nprobe": 4, "train_min": 128})
+    from src.memory.stores import KnowledgeRecord
+    docs = _corpus(200)
+    for i, d in enumerate(docs):
+        kb.add(KnowledgeRecord(id=f"k{i}", timestamp="", topic=[], content=d, source="t", agent="t", confidence=0.5))
+    index = kb.vs.index
+    assert index.trained and len(index.centroids) == 16
+    # records added after training are assigned to cells and found by a probed (not exact) search
+    target = kb.records["k150"].content
+    assert index.candidates(kb.vs._embed_array(target)) is not None
+    same = {r.id for r in kb.records.values() if r.content == target}
+    assert kb.search_vector(target, top_k=1)[0][0].id in same
+    kb.remove("k150")
+    assert all(rec.id != "k150" for rec, _ in kb.search_vector(target, top_k=200))
+    assert len(kb.vs) == 199 and "k150" not in index.assign
+    assert sum(len(cell) for cell in index.cells) == 199
@@ -0,0 +1,51 @@
+from src.agents.coordinator import Coordinator
+
+Q = "Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs."
+PARAPHRASE = "Research transformer architectures and analyze their computational efficiency; summarize the key trade-offs."
+
+def test_repeat_question_is_served_from_cache(tmp_path):
+    co = Coordinator(cfg={"answer_cache_threshold": 0.8}, log_dir=str(tmp_path))
+    first = co.handle(Q)
+    records = len(co.kb.records)
+    assert co.handle(PARAPHRASE) == first
+    assert len(co.kb.records) == records
+    assert co.convo.turns[-1].metadata["cached"] is True
+    assert co.answer_cache.stats()["hits"] == 1
+
+def test_corpus_change_invalidates(tmp_path):
+    co = Coordinator(cfg={"answer_cache_threshold": 0.8}, log_dir=str(tmp_path))
+    co.handle(Q)
+    co.research.version += 1
+    co.handle(Q)
+    stats = co.answer_cache.stats()
+    assert stats["hits"] == 0 and stats["invalidations"] == 1
+
+def test_disabled_by_default(tmp_path):
+    assert Coordinator(log_dir=str(tmp_path)).answer_cache is None
+
+def test_concurrent_lookups_and_evicting_adds():
+    import sys, threading
+    from src.memory.answer_cache import SemanticAnswerCache
+    from src.memory.stores import KnowledgeBase, KnowledgeRecord
+    kb = KnowledgeBase(vector_dim=64)
+    kb.add(KnowledgeRecord(id="r", timestamp="", topic=[], content="answer", source="s", agent="a", confidence=0.5))
+    cache = SemanticAnswerCache(kb, threshold=0.5, max_entries=4)
+    errors = []
+    def run(n):
+        try:
+            for i in range(300):
+                cache.add(f"what about topic {i % 7}", "research", "r", 0)
+                cache.lookup(f"what about topic {(i + n) % 7}", "research", 0)
+        except Exception as exc:  # surfaced below
+            errors.append(exc)
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(6)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often enough to interleave
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == [] and len(cache.entries) == len(cache.questions) == 4
@@ -0,0 +1,34 @@
+import io, json
+from src.services.batch import parse_line, run_batch
+
+LINES = ['{"id": 1, "query": "What are the main types of neural networks?"}',
+         '',
+         '"Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs."',
+         'Find recent papers on reinforcement learning, analyze their methodologies, and identify common challenges.',
+         '{"id": 4, "note": "no query"}']
+
+def test_parse_line_forms():
+    assert parse_line("  ") is None
+    assert parse_line('{"prompt": "hi", "session_id": "s"}') == {"id": None, "session_id": "s", "query": "hi"}
+    assert parse_line("plain text") == {"query": "plain text"}
+    assert "error" in parse_line("[1, 2]")
+
+def test_pool_output_matches_inline_order():
+    text = "\n".join(LINES * 5) + "\n"
+    inline, pooled = io.StringIO(), io.StringIO()
+    assert run_batch(io.StringIO(text), inline, workers=1, chunk_size=3) == 20
+    assert run_batch(io.StringIO(text), pooled, workers=2, chunk_size=3, max_inflight=2) == 20
+    rows = [json.loads(l) for l in pooled.getvalue().splitlines()]
+    assert [r.get("query") for r in rows] == [r.get("query") for r in map(json.loads, inline.getvalue().splitlines())]
+    assert rows[0]["id"] == 1 and rows[0]["answer"].startswith("Main findings") and "error" in rows[3]
+
+def test_every_worker_flushes_its_trace(tmp_path):
+    text = "\n".join(LINES * 5) + "\n"
+    for workers in (1, 2):
+        log_dir = tmp_path / f"w{workers}"
+        run_batch(io.StringIO(text), io.StringIO(), workers=workers, chunk_size=3, log_dir=str(log_dir))
+        files = sorted(p.name for p in log_dir.glob("trace*.jsonl"))
+        # pool workers never share (and so never rotate) one file
+        assert (files == ["trace.jsonl"]) == (workers == 1), files
+        events = [json.loads(l)["event"] for name in files for l in (log_dir / name).read_text().splitlines()]
+        assert events.count("intent") == 15, workers
@@ -0,0 +1,45 @@
+import asyncio
+from src.agents.coordinator import Coordinator
+
+QUERIES = [
+    "What are the main types of neural networks?",
+    "Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs.",
+    "Find recent papers on reinforcement learning, analyze their methodologies, and identify common challenges.",
+]
+
+def test_handle_async_matches_sync(tmp_path):
+    sync_co = Coordinator(log_dir=str(tmp_path / "sync"))
+    async_co = Coordinator(log_dir=str(tmp_path / "async"))
+    expected = [sync_co.handle(q) for q in QUERIES]
+    got = [asyncio.run(async_co.handle_async(q)) for q in QUERIES]
+    assert got == expected
+    sync_co.close()
+    async_co.close()
+
+def test_many_sessions_on_one_loop(tmp_path):
+    co = Coordinator(log_dir=str(tmp_path))
+    async def run():
+        return await asyncio.gather(*(co.handle_async(q) for q in QUERIES * 4))
+    answers = asyncio.run(run())
+    assert len(answers) == 12 and all(isinstance(a, str) and a for a in answers)
+    assert len(co.kb.records) == 12
+    co.close()
+
+def test_sessions_keep_separate_histories(tmp_path):
+    co = Coordinator(log_dir=str(tmp_path))
+    co.handle(QUERIES[0], session_id="alice")
+    co.handle(QUERIES[1], session_id="bob")
+    assert [t.content for t in co.convo.history("alice")][0] == QUERIES[0]
+    assert len(co.convo.history("bob")) == 2 and len(co.convo.history()) == 0
+    co.close()
+
+def test_handle_from_threads_and_inside_a_running_loop(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    co = Coordinator(log_dir=str(tmp_path))
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        answers = list(ex.map(lambda i: co.handle(QUERIES[i % 3], session_id=f"s{i}"), range(8)))
+    assert all(isinstance(a, str) and a for a in answers)
+    async def nested():
+        return co.handle(QUERIES[0], session_id="nested")
+    assert asyncio.run(nested()) == co.handle(QUERIES[0], session_id="other")
+    co.close()
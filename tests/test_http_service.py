@@ -0,0 +1,69 @@
+import json, threading, urllib.error, urllib.request
+import pytest
+from src.services.http import ChatService
+
+@pytest.fixture(scope="module")
+def service():
+    svc = ChatService(port=0, workers=2, queue_size=4, timeout=10)
+    assert svc.pool.wait_ready(timeout=30)
+    threading.Thread(target=svc.serve_forever, daemon=True).start()
+    yield svc
+    svc.close()
+
+def _call(svc, path, body=None):
+    host, port = svc.address
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f"http://{host}:{port}{path}", data=data, method="POST" if data else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, resp.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+def test_chat_keeps_sessions_apart(service):
+    status, body = _call(service, "/chat", {"session_id": "alice", "query": "What are the main types of neural networks?"})
+    assert status == 200 and json.loads(body)["answer"].startswith("Main findings")
+    # the same session reaches the same worker, so its earlier turn is recalled
+    _, body = _call(service, "/chat", {"session_id": "alice", "query": "What did we discuss about neural networks earlier?"})
+    assert "found in memory" in json.loads(body)["answer"]
+    status, body = _call(service, "/chat", {"query": "hello"})
+    assert status == 200 and json.loads(body)["session_id"].startswith("sess_")
+    assert _call(service, "/chat", {"session_id": "x"})[0] == 400
+
+def test_health_metrics_and_backpressure(service):
+    status, body = _call(service, "/healthz")
+    assert status == 200 and json.loads(body)["alive"] == 2
+    worker = service.pool.route("bob")
+    service.pool.inflight[worker] += service.pool.queue_size
+    try:
+        assert _call(service, "/chat", {"session_id": "bob", "query": "hi"})[0] == 503
+    finally:
+        service.pool.inflight[worker] -= service.pool.queue_size
+    status, text = _call(service, "/metrics")
+    assert status == 200 and "machat_http_rejected_total 1" in text and "machat_workers_alive 2" in text
+    snap = json.loads(_call(service, "/metrics?format=json")[1])
+    assert len(snap["workers"]) == 2 and any(w and "request" in w["stages"] for w in snap["workers"])
+
+def test_recall_is_scoped_to_the_session(service):
+    # two sessions hashed to the same worker share its knowledge base, not their recall
+    first = service.pool.route("carol")
+    other = next(f"dave{i}" for i in range(100) if service.pool.route(f"dave{i}") == first)
+    _call(service, "/chat", {"session_id": "carol", "query": "Research reinforcement learning sample efficiency."})
+    _, body = _call(service, "/chat", {"session_id": other, "query": "What did we discuss about reinforcement learning earlier?"})
+    assert "couldn't find relevant memory" in json.loads(body)["answer"]
+    _, body = _call(service, "/chat", {"session_id": "carol", "query": "What did we discuss about reinforcement learning earlier?"})
+    assert "found in memory" in json.loads(body)["answer"]
+
+def test_dead_worker_is_respawned(service):
+    import time
+    worker = service.pool.route("erin")
+    proc = service.pool._procs[worker]
+    proc.kill()
+    proc.join()
+    deadline = time.monotonic() + 30
+    while service.pool._procs[worker] is proc and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert service.pool.restarts == 1 and service.pool.inflight[worker] == 0
+    assert service.pool.wait_ready(timeout=30)
+    status, body = _call(service, "/chat", {"session_id": "erin", "query": "What are the main types of neural networks?"})
+    assert status == 200 and json.loads(body)["answer"].startswith("Main findings")
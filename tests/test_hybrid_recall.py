@@ -0,0 +1,67 @@
+from src.agents.memory import MemoryAgent
+from src.memory.stores import ConversationMemory, KnowledgeBase, AgentStateMemory, KnowledgeRecord
+from src.memory.sqlite_stores import open_sqlite_stores
+
+TEXTS = [("Adam optimizer defaults and learning rate warmup", 0.9),
+         ("Transformer attention trade-offs", 0.6),
+         ("Learning rate schedules for transformers", 0.3),
+         ("Tabular data with gradient boosting", 0.8)]
+
+def _fill(kb):
+    for i, (text, conf) in enumerate(TEXTS):
+        kb.add(KnowledgeRecord(id=f"k{i}", timestamp="2024-01-01T00:00:00Z", topic=["ml"], content=text, source="s", agent="a", confidence=conf,
+                               provenance={"session_id": "default"}))
+    return kb
+
+def test_hybrid_ranks_records_matching_both_signals_first():
+    kb = _fill(KnowledgeBase(vector_dim=64))
+    hits = kb.search_hybrid("learning rate", top_k=4)
+    assert {rec.id for rec, _, _ in hits[:2]} == {"k0", "k2"}
+    assert [s for _, s, _ in hits] == sorted((s for _, s, _ in hits), reverse=True)
+    weighted = kb.search_hybrid("learning rate", top_k=2, fusion="weighted", confidence_weight=1.0)
+    assert [rec.id for rec, _, _ in weighted] == ["k0", "k2"]
+
+def test_keyword_only_hits_get_a_similarity():
+    kb = _fill(KnowledgeBase(vector_dim=64))
+    # "former" is no token: k1 arrives only as a substring match, and unrelated records are not candidates
+    hits = kb.search_hybrid("former", top_k=5, pool=1)
+    assert [(rec.id, sim) for rec, _, sim in hits] == [("k1", 0.0)]
+    recall = MemoryAgent(ConversationMemory(), kb, AgentStateMemory()).recall("transformer")
+    assert recall["matches"] and all(m["similarity"] is not None and "score" in m for m in recall["matches"])
+    assert MemoryAgent(ConversationMemory(), kb, AgentStateMemory()).recall("transformer", session_id="other")["matches"] == []
+
+def test_sqlite_hybrid_matches_memory(tmp_path):
+    kb = _fill(KnowledgeBase(vector_dim=64))
+    _, s_kb, _ = open_sqlite_stores(str(tmp_path / "mem.sqlite"), vector_dim=64)
+    _fill(s_kb)
+    for q in ["learning rate", "transformer", "boost"]:
+        expect = [(rec.id, round(score, 6)) for rec, score, _ in kb.search_hybrid(q, top_k=3)]
+        assert [(rec.id, round(score, 6)) for rec, score, _ in s_kb.search_hybrid(q, top_k=3)] == expect, q
+
+def _crowd(kb, sessions=200):
+    agent = MemoryAgent(ConversationMemory(), kb, AgentStateMemory())
+    for i in range(sessions):
+        agent.store_knowledge(["nn"], "Types of neural networks", "s", "a", 0.5, session_id=f"s{i}")
+    # ranked below every foreign record by both similarity and keyword order
+    mine = agent.store_knowledge(["nn"], "Neural networks, briefly", "s", "a", 0.5, session_id="Z")
+    return agent, mine
+
+def test_recall_ranks_only_the_sessions_records(tmp_path):
+    # far more foreign records than the default candidate pool (20)
+    for kb in (KnowledgeBase(vector_dim=64), open_sqlite_stores(str(tmp_path / "mem.sqlite"), vector_dim=64)[1]):
+        agent, mine = _crowd(kb)
+        assert [m["id"] for m in agent.recall("types of neural networks", session_id="Z")["matches"]] == [mine.id]
+        assert [m["id"] for m in agent.recall("neural networks", session_id="Z")["matches"]] == [mine.id]
+        assert len(agent.recall("neural networks", top_k=3, session_id="s7")["matches"]) == 1
+
+def test_merged_sessions_outlive_the_merge_history():
+    kb = KnowledgeBase(vector_dim=64, dedup_threshold=0.9)
+    agent = MemoryAgent(ConversationMemory(), kb, AgentStateMemory())
+    first = agent.store_knowledge(["nn"], "Adam optimizer default learning rate", "s", "a", 0.5, session_id="early")
+    for i in range(8):
+        assert agent.store_knowledge(["nn"], "adam optimizer default learning rate", "s", "a", 0.5, session_id=f"later{i}") is first
+    assert len(first.provenance["merged_from"]) == 5 and "early" in first.provenance["sessions"]
+    assert [m["id"] for m in agent.recall("adam optimizer", session_id="early")["matches"]] == [first.id]
+    assert [m["id"] for m in agent.recall("adam optimizer", session_id="later0")["matches"]] == [first.id]
+    kb.remove(first.id)
+    assert agent.recall("adam optimizer", session_id="early")["matches"] == [] and not kb._by_session
@@ -0,0 +1,35 @@
+import json
+from src.core.intent import IntentEngine, load_engine
+from src.main import SCENARIOS
+
+def legacy_intent(text):
+    # the substring chain the compiled rules replace
+    t = text.lower()
+    if "what did we" in t or "earlier" in t or "remember" in t or "discuss" in t:
+        return "memory_query"
+    if "compare" in t and "recommend" in t:
+        return "compare_recommend"
+    if any(k in t for k in ["research", "analyze", "analyze their", "trade-offs", "tradeoffs", "papers", "architectures", "efficiency", "methodologies", "challenges"]):
+        if "paper" in t or "papers" in t or "recent" in t:
+            return "multi_step"
+        return "complex_research"
+    return "simple_query"
+
+QUERIES = [p for _, p in SCENARIOS] + [
+    "Do you REMEMBER the optimizer?", "compare A and B", "Compare A and B and recommend one",
+    "recent trends", "analyze this paper", "Analyze the papers", "tradeoffs of CNNs", "newspapers research",
+    "", "rl", "discussion of recent research challenges", "Research efficiency: compare and recommend",
+]
+
+def test_default_rules_match_legacy_chain():
+    engine = load_engine()
+    assert engine.classify_many(QUERIES) == [legacy_intent(q) for q in QUERIES]
+
+def test_rules_from_file_with_priority(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"default": "chitchat", "rules": [
+        {"intent": "research", "any": ["research"]},
+        {"intent": "billing", "all": [["invoice", "refund"], ["order"]], "priority": 5},
+    ]}))
+    engine = IntentEngine.from_file(str(path))
+    assert engine.classify_many(["research my order refund", "research", "refund please", "hi"]) == ["billing", "research", "chitchat", "chitchat"]
@@ -0,0 +1,87 @@
+import time
+from datetime import datetime, timezone
+from src.memory.stores import KnowledgeBase, KnowledgeRecord
+from src.memory.sqlite_stores import open_sqlite_stores
+
+def _rec(i, content, confidence=0.5, timestamp="2024-01-01T00:00:00Z"):
+    return KnowledgeRecord(id=f"k{i}", timestamp=timestamp, topic=["t"], content=content, source="s", agent="a", confidence=confidence, provenance={"i": i})
+
+def test_near_duplicates_are_merged():
+    kb = KnowledgeBase(vector_dim=64, dedup_threshold=0.9)
+    first = kb.add(_rec(0, "Adam optimizer default learning rate", confidence=0.4))
+    merged = kb.add(_rec(1, "adam optimizer default learning rate", confidence=0.8))
+    assert merged is first and len(kb.records) == 1
+    assert merged.confidence == 0.8 and merged.provenance["merged_count"] == 1
+    assert merged.provenance["merged_from"][0]["id"] == "k1"
+    assert kb.add(_rec(2, "Transformers trade attention cost for context")).id == "k2"
+    assert len(kb.records) == 2 and kb.merged == 1
+
+def test_eviction_policies():
+    texts = ["alpha beta", "gamma delta", "epsilon zeta", "eta theta"]
+    lru = KnowledgeBase(vector_dim=64, max_records=3, eviction="lru")
+    for i, text in enumerate(texts[:3]):
+        lru.add(_rec(i, text))
+    lru.search_keyword("alpha")
+    lru.add(_rec(3, texts[3]))
+    assert sorted(lru.records) == ["k0", "k2", "k3"] and lru.evicted == 1
+    assert [r.id for r, _ in lru.search_vector("gamma delta", top_k=4)].count("k1") == 0
+
+    conf = KnowledgeBase(vector_dim=64, max_records=3, eviction="lowest_confidence")
+    for i, (text, c) in enumerate(zip(texts, [0.9, 0.2, 0.7, 0.1])):
+        conf.add(_rec(i, text, confidence=c))
+    assert sorted(conf.records) == ["k0", "k2", "k3"]
+
+    oldest = KnowledgeBase(vector_dim=64, max_records=2, eviction="oldest")
+    for i, text in enumerate(texts):
+        oldest.add(_rec(i, text))
+    assert sorted(oldest.records) == ["k2", "k3"] and oldest.search_keyword("alpha") == []
+
+def _ts(t):
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def test_ttl_expiry(tmp_path):
+    now = _ts(time.time())
+    kb = KnowledgeBase(vector_dim=64, ttl=60)
+    kb.add(_rec(0, "alpha beta", timestamp=now))
+    kb.add(_rec(1, "gamma delta", timestamp=now))
+    assert kb.expire(now=time.time() + 120) == 2 and not kb.records
+    kb.add(_rec(2, "epsilon zeta"))
+    kb.save(str(tmp_path / "kb"))
+    # write times are record timestamps, live or reopened, so the 2024 record expires
+    assert len(KnowledgeBase.open(str(tmp_path / "kb")).records) == 1
+    reopened = KnowledgeBase.open(str(tmp_path / "kb"), ttl=60)
+    reopened.add(_rec(3, "eta theta", timestamp=now))
+    assert sorted(reopened.records) == ["k3"]
+
+def test_expiry_follows_write_times_on_every_add(tmp_path):
+    now = time.time()
+    kb = KnowledgeBase(vector_dim=64, ttl=600, dedup_threshold=0.9)
+    kb.add(_rec(0, "alpha beta", timestamp=_ts(now)))
+    kb.add(_rec(1, "gamma delta", timestamp=_ts(now - 500)))
+    kb.save(str(tmp_path / "kb"))
+    reopened = KnowledgeBase.open(str(tmp_path / "kb"), ttl=600)
+    # recency follows write time, not file order, and expiry does not stop at a fresh first record
+    assert list(reopened._used) == ["k1", "k0"]
+    assert reopened.expire(now=now + 200) == 1 and sorted(reopened.records) == ["k0"]
+    # a merge is a write too, and expires what is stale
+    kb.add(_rec(2, "epsilon zeta", timestamp=_ts(now - 700)))
+    assert kb.add(_rec(3, "Alpha Beta", timestamp=_ts(now))).id == "k0"
+    assert sorted(kb.records) == ["k0", "k1"]
+
+def test_confidence_heap_is_compacted():
+    kb = KnowledgeBase(vector_dim=64, dedup_threshold=0.9, max_records=10, eviction="lowest_confidence")
+    for i in range(500):
+        kb.add(_rec(i, "alpha beta" if i % 2 else "Alpha Beta", confidence=0.5))
+    assert len(kb.records) == 1 and len(kb._by_conf) <= 66
+
+def test_sqlite_limits_survive_reopen(tmp_path):
+    path = str(tmp_path / "mem.sqlite")
+    _, kb, _ = open_sqlite_stores(path, vector_dim=64, dedup_threshold=0.9, max_records=2, eviction="oldest")
+    kb.add(_rec(0, "alpha beta"))
+    assert kb.add(_rec(1, "Alpha Beta", confidence=0.9)).id == "k0"
+    kb.add(_rec(2, "gamma delta"))
+    kb.db.close()
+    _, kb, _ = open_sqlite_stores(path, vector_dim=64, max_records=2, eviction="oldest")
+    assert kb.get("k0").provenance["merged_count"] == 1 and kb.get("k0").confidence == 0.9
+    kb.add(_rec(3, "epsilon zeta"))
+    assert sorted(kb.records) == ["k2", "k3"] and kb.search_keyword("alpha") == []
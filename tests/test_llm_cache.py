@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from src.core.llm import LLMClient, ResponseCache
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, max_tokens):
+        self.calls += 1
+        text = f"plan #{self.calls} for {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+def _client(cache):
+    llm = LLMClient(cache=cache)
+    llm.enabled = True
+    completions = FakeCompletions()
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return llm, completions
+
+def test_repeated_prompts_hit_the_cache():
+    llm, completions = _client(ResponseCache(max_entries=2))
+    first = llm.classify_or_plan("compare optimizers")
+    assert llm.classify_or_plan("compare optimizers") == first
+    assert completions.calls == 1
+    assert llm.cache.stats()["hits"] == 1 and llm.cache.stats()["misses"] == 1
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=3600)
+    for k in ("a", "b", "c"):
+        cache.put(k, k.upper())
+    assert cache.get("a") is None and cache.get("c") == "C"
+    expired = ResponseCache(ttl=1e-9)
+    expired.put("k", "v")
+    assert expired.get("k") is None
+
+def test_sqlite_persistence(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    llm, _ = _client(ResponseCache(path=path))
+    answer = llm.classify_or_plan("summarize transformers")
+    llm.cache.close()
+    again, completions = _client(ResponseCache(path=path))
+    assert again.classify_or_plan("summarize transformers") == answer
+    assert completions.calls == 0
+
+def test_sqlite_table_is_bounded(tmp_path):
+    import time
+    cache = ResponseCache(max_entries=3, ttl=60, path=str(tmp_path / "llm_cache.sqlite"))
+    cache._db.execute("INSERT INTO llm_cache (key, created, value) VALUES ('stale', ?, 'x')", (time.time() - 120,))
+    for k in "abcde":
+        cache.put(k, k.upper())
+    rows = [r[0] for r in cache._db.execute("SELECT key FROM llm_cache ORDER BY created")]
+    assert rows == ["c", "d", "e"]
@@ -0,0 +1,44 @@
+import threading
+import pytest
+from src.core.message_bus import BusFull, Message, MessageBus
+
+def _msg(i, to="research"):
+    return Message(sender="manager", recipient=to, type="search", payload={"i": i})
+
+def test_trace_and_queues_stay_bounded():
+    bus = MessageBus(queue_size=3, trace_size=5)
+    bus.open("research")
+    for i in range(10):
+        bus.send(_msg(i))
+        bus.send(_msg(i, to="analysis"))  # no queue, no subscriber: traced only
+    assert len(bus.dump()) == 5 and bus.pending("analysis") == 0
+    assert [m.payload["i"] for m in bus.drain("research")] == [7, 8, 9]
+    assert bus.stats()["dropped"] == 7 and not hasattr(_msg(0), "__dict__")
+
+def test_drop_policies():
+    newest = MessageBus(queue_size=2, policy="drop_newest")
+    newest.open("research")
+    for i in range(4):
+        newest.send(_msg(i))
+    assert [m.payload["i"] for m in newest.drain("research")] == [0, 1]
+    strict = MessageBus(queue_size=1, policy="block", block_timeout=0.01)
+    strict.open("research")
+    strict.send(_msg(0))
+    with pytest.raises(BusFull):
+        strict.send(_msg(1))
+
+def test_subscribers_and_consumers():
+    bus = MessageBus()
+    seen, done = [], threading.Event()
+    bus.subscribe("*", lambda m: seen.append(("all", m.payload["i"])))
+    got = []
+    def handle(m):
+        got.append(m.payload["i"])
+        if len(got) == 3:
+            done.set()
+    bus.consume("research", handle)
+    for i in range(3):
+        bus.send(_msg(i))
+    assert done.wait(2) and got == [0, 1, 2] and seen == [("all", 0), ("all", 1), ("all", 2)]
+    bus.close()
+    assert bus.receive("research", timeout=0) is None
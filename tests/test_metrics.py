@@ -0,0 +1,62 @@
+from src.agents.coordinator import Coordinator
+from src.core.metrics import Histogram, Metrics
+
+def test_histogram_quantiles_over_window():
+    hist = Histogram(window=100)
+    for v in range(1, 201):
+        hist.observe(float(v))
+    # count and sum cover every observation; quantiles only the last 100
+    assert hist.count == 200 and hist.sum == sum(range(1, 201)) and hist.max == 200.0
+    assert hist.quantiles() == {0.5: 150.0, 0.95: 195.0, 0.99: 199.0}
+
+def test_export_formats():
+    m = Metrics()
+    with m.span("research.search"):
+        pass
+    m.inc("llm_calls", 2)
+    m.gauge("kb_records", lambda: 7)
+    snap = m.snapshot()
+    assert snap["stages"]["research.search"]["count"] == 1
+    assert snap["counters"] == {"llm_calls": 2} and snap["gauges"] == {"kb_records": 7.0}
+    text = m.prometheus()
+    assert '# TYPE machat_research_search_seconds summary' in text
+    assert 'machat_research_search_seconds{quantile="0.99"}' in text and "machat_research_search_seconds_count 1" in text
+    assert "machat_llm_calls_total 2" in text and "machat_kb_records 7" in text
+
+def test_disabled_registry_records_nothing():
+    m = Metrics(enabled=False)
+    fn = lambda: 1
+    assert m.timed("x", fn) is fn and m.span("x") is m.span("y")
+    with m.span("x"):
+        m.inc("n")
+    assert m.snapshot() == {"stages": {}, "counters": {}, "gauges": {}}
+
+def test_coordinator_stage_timings_and_profile(tmp_path):
+    co = Coordinator(log_dir=str(tmp_path))
+    co.handle("Research transformer architectures, analyze their computational efficiency, and summarize key trade-offs.")
+    answer, stats = co.profile("What are the main types of neural networks?")
+    snap = co.metrics.snapshot()
+    assert {"request", "intent", "plan", "overlap_probe", "research.search", "analysis", "synthesize", "memory.write"} <= set(snap["stages"])
+    assert snap["counters"]["requests"] == 2 and snap["gauges"]["kb_records"] == 2
+    assert answer.startswith("Main findings") and "search" in stats
+    co.close()
+
+def test_profile_inlines_only_its_own_call(tmp_path):
+    import asyncio, json, threading
+    co = Coordinator(cfg={"metrics": False}, log_dir=str(tmp_path))
+    seen = {}
+    search = co.research.search
+    def probe(*args, **kwargs):
+        # another thread offloading while profile() runs still uses the executor
+        other = threading.Thread(target=lambda: seen.update(other=asyncio.run(co._offload(lambda: threading.current_thread().name))))
+        other.start()
+        other.join()
+        seen["profiled"] = threading.current_thread().name
+        return search(*args, **kwargs)
+    co.research.search = probe
+    co.profile("What are the main types of neural networks?")
+    co.close()
+    assert seen["other"].startswith("coordinator") and seen["profiled"] == threading.current_thread().name
+    # no metrics, no zero-latency "request" events
+    events = [json.loads(line)["event"] for line in open(co.tracer.path, encoding="utf-8")]
+    assert "request" not in events and "intent" in events
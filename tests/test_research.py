@@ -0,0 +1,144 @@
+import json, os
+import pytest
+from src.agents.research import ResearchAgent
+
+ITEMS = [
+    {"title": "Optimizers overview", "summary": "SGD and friends.", "tags": ["optimizer"]},
+    {"title": "Transformers", "summary": "Self-attention; transformer efficiency varies.", "tags": ["transformer", "attention"]},
+    {"title": "Efficient attention", "summary": "Linear attention transformers.", "tags": ["attention"]},
+]
+
+def _agent(tmp_path, items=ITEMS):
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps(items), encoding="utf-8")
+    return ResearchAgent(kb_path=str(path))
+
+def test_search_is_ranked_and_keeps_payload_shape(tmp_path):
+    out = _agent(tmp_path).search("transformer attention efficiency")
+    assert set(out) == {"query", "results", "timestamp", "confidence", "agent"}
+    assert [r["title"] for r in out["results"]] == ["Transformers", "Efficient attention"]
+    assert out["confidence"] == 0.6
+
+def test_query_terms_match_inside_indexed_terms():
+    from src.memory.text_index import Bm25Index
+    index = Bm25Index()
+    index.add(0, "Transformers and attention")
+    index.add(1, "Reformer: the efficient transformer")
+    index.add(2, "Convolutional networks")
+    assert sorted(index.score(["former"])) == [0, 1] and sorted(index.score(["volution"])) == [2]
+    # removal needs only the doc id
+    assert index.remove(1) and not index.remove(1)
+    assert sorted(index.score(["former"])) == [0] and index.posting("reformer") is None and len(index) == 2
+
+def test_search_top_k_and_fallback(tmp_path):
+    agent = _agent(tmp_path)
+    assert len(agent.search("attention", top_k=1)["results"]) == 1
+    fallback = agent.search("zzzz unknown words", top_k=2)
+    assert fallback["results"] == ITEMS[:2]
+
+def test_jsonl_corpus_matches_json_array(tmp_path):
+    from src.data.corpus import JsonlCorpus, convert_json_to_jsonl
+    src = tmp_path / "kb.json"
+    src.write_text(json.dumps(ITEMS), encoding="utf-8")
+    dst = tmp_path / "kb.jsonl"
+    assert convert_json_to_jsonl(str(src), str(dst)) == len(ITEMS)
+    corpus = JsonlCorpus(str(dst))
+    assert len(corpus) == 3 and corpus[1] == ITEMS[1] and corpus[:2] == ITEMS[:2]
+    eager, lazy = ResearchAgent(kb_path=str(src)), ResearchAgent(kb_path=str(dst))
+    for q in ["transformer attention", "optimizer", "nothing here"]:
+        assert eager.search(q)["results"] == lazy.search(q)["results"]
+
+def _replace(path, items, jsonl=False):
+    # write-then-rename, as reload() expects
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(i) for i in items) + "\n" if jsonl else json.dumps(items))
+    os.replace(tmp, path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+def test_reload_applies_only_the_diff(tmp_path):
+    agent = _agent(tmp_path)
+    path = tmp_path / "kb.json"
+    assert agent.reload() is None
+    before_state, before_index = agent._state, agent.index
+    edited = dict(ITEMS[1], summary="Transformers now explained with diffusion.")
+    new_doc = {"title": "Diffusion models", "summary": "Denoising diffusion.", "tags": ["diffusion"]}
+    _replace(path, [ITEMS[0], edited, new_doc])
+    assert agent.reload() == {"added": 1, "changed": 1, "removed": 1}
+    assert agent.version == 1
+    assert [r["title"] for r in agent.search("diffusion")["results"]] == ["Diffusion models", "Transformers"]
+    assert [r["title"] for r in agent.search("efficient attention")["results"]] == ["Transformers"]
+    # the previous version is untouched, so a search that started on it completes consistently
+    assert before_index.posting("diffusion") is None and before_state.item(2)["title"] == "Efficient attention"
+    # unchanged items keep their index entries
+    assert agent.index.posting("optimizers") is before_index.posting("optimizers")
+
+def test_reload_skips_a_missing_file(tmp_path):
+    agent = _agent(tmp_path)
+    os.remove(tmp_path / "kb.json")
+    assert agent.reload() is None and agent.reload(force=True) is None
+    assert agent.kb == ITEMS and agent.version == 0
+    _replace(tmp_path / "kb.json", ITEMS[:2])
+    assert agent.reload() == {"added": 0, "changed": 0, "removed": 1}
+
+def test_forks_share_layers_and_match_a_fresh_build():
+    import random
+    from src.memory.text_index import Bm25Index
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "theta", "kappa"]
+    texts = {d: " ".join(rng.choices(words, k=5)) for d in range(200)}
+    index = Bm25Index()
+    for d, t in texts.items():
+        index.add(d, t)
+    next_doc, bases = 200, {}
+    for _ in range(50):
+        prev, index = index, index.fork()
+        for d in rng.sample(sorted(texts), 3):
+            assert index.remove(d)
+            texts.pop(d)
+        for _ in range(3):
+            texts[next_doc] = " ".join(rng.choices(words, k=5))
+            index.add(next_doc, texts[next_doc])
+            next_doc += 1
+        assert prev.posting("alpha") is not None and len(index._layers) <= 8
+        bases[id(index._layers[0])] = index._layers[0]
+    # the base layer is shared by the forks, and rebuilt only when the changes rival it in size
+    assert len(bases) <= 3
+    fresh = Bm25Index()
+    for d, t in texts.items():
+        fresh.add(d, t)
+    assert len(index) == len(fresh) == 200
+    for q in (["alpha"], ["gam", "kappa"], ["zeta", "the"]):
+        assert index.score(q) == pytest.approx(fresh.score(q))
+
+def test_reload_jsonl_and_watch(tmp_path):
+    import time
+    path = tmp_path / "kb.jsonl"
+    _replace(path, ITEMS, jsonl=True)
+    agent = ResearchAgent(kb_path=str(path))
+    _replace(path, ITEMS[:2], jsonl=True)
+    assert agent.reload() == {"added": 0, "changed": 0, "removed": 1}
+    assert [r["title"] for r in agent.search("linear attention")["results"]] == ["Transformers"]
+    agent.watch(0.01)
+    try:
+        _replace(path, ITEMS[:2] + [{"title": "Pruning", "summary": "Sparse networks.", "tags": []}], jsonl=True)
+        deadline = time.time() + 5
+        while agent.version < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert agent.search("pruning")["results"][0]["title"] == "Pruning"
+    finally:
+        agent.close()
+
+def test_json_array_is_decoded_across_chunk_boundaries(tmp_path):
+    from src.data.corpus import iter_json_array
+    items = ITEMS + [12345, "x" * 50, [1, [2, {"k": "]"}]], {"big": "y" * 200}]
+    src = tmp_path / "kb.json"
+    src.write_text(" \n" + json.dumps(items, indent=1), encoding="utf-8")
+    for chunk_size in (1, 3, 7, 64, 1 << 16):
+        assert list(iter_json_array(str(src), chunk_size=chunk_size)) == items, chunk_size
+    (tmp_path / "empty.json").write_text("[ ]", encoding="utf-8")
+    assert list(iter_json_array(str(tmp_path / "empty.json"), chunk_size=1)) == []
+    (tmp_path / "cut.json").write_text('[{"a": 1}, {"b":', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(tmp_path / "cut.json"), chunk_size=4))
@@ -0,0 +1,31 @@
+import json, pickle
+from src.memory.schema import KnowledgeRecord, ConversationTurn
+from src.memory.stores import KnowledgeBase
+
+def _rec(i, topic, provenance=None):
+    return KnowledgeRecord(id=f"k{i}", timestamp="ts", topic=topic, content=f"content {i}", source="s", agent="a",
+                           confidence=0.5, provenance=provenance)
+
+def test_records_are_slotted_with_lazy_dicts():
+    rec = _rec(0, ["alpha"])
+    assert not hasattr(rec, "__dict__")
+    assert rec._provenance is None and rec == _rec(0, ["alpha"], provenance={})
+    rec.provenance["x"] = 1
+    assert rec.provenance == {"x": 1} and rec != _rec(0, ["alpha"])
+    turn = ConversationTurn(id="t", timestamp="ts", role="user", content="hi")
+    assert turn._metadata is None and turn.to_dict()["metadata"] == {}
+
+def test_topics_are_interned():
+    a, b = _rec(0, json.loads('["shared topic"]')), _rec(1, json.loads('["shared topic"]'))
+    assert a.topic == ("shared topic",) and a.topic[0] is b.topic[0]
+
+def test_round_trips(tmp_path):
+    rec = _rec(0, ["alpha", "beta"], provenance={"intent": "x"})
+    assert KnowledgeRecord(**json.loads(json.dumps(rec.to_dict()))) == rec
+    assert pickle.loads(pickle.dumps(rec)) == rec
+    kb = KnowledgeBase(vector_dim=32)
+    kb.add(rec)
+    kb.add(_rec(1, ["gamma"]))
+    kb.save(str(tmp_path))
+    reopened = KnowledgeBase.open(str(tmp_path))
+    assert reopened.get("k0") == rec and reopened.get("k1").provenance == {}
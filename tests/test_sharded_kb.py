@@ -0,0 +1,85 @@
+import random
+import pytest
+from src.memory.sharded import HashRing, ShardedKnowledgeBase
+from src.memory.stores import KnowledgeBase, KnowledgeRecord
+
+WORDS = ("transformer attention heads adam optimizer betas convolution kernels images reinforcement learning "
+         "rewards recurrent networks lstm gradient descent momentum dropout batch norm embedding").split()
+
+def _records(n):
+    rng = random.Random(0)
+    return [KnowledgeRecord(id=f"k{i}", timestamp="2024-01-01T00:00:00Z", topic=["ml", f"t{i % 3}"],
+                            content=" ".join(rng.sample(WORDS, 6)), source="s", agent="a", confidence=0.3 + (i % 7) / 10)
+            for i in range(n)]
+
+def _ranked(hits):
+    # equal scores may come back in any order across shards; compare scores, and ids above the cut-off
+    scores = [round(h[1], 6) for h in hits]
+    return scores, {h[0].id for h in hits if round(h[1], 6) > scores[-1]}
+
+@pytest.fixture
+def sharded():
+    kb = ShardedKnowledgeBase(shards=3, vector_dim=64)
+    yield kb
+    kb.close()
+
+def test_ring_moves_only_the_new_shards_keys():
+    ring = HashRing([0, 1, 2])
+    before = {f"k{i}": ring.owner(f"k{i}") for i in range(2000)}
+    ring.add(3)
+    moved = [k for k, owner in before.items() if ring.owner(k) != owner]
+    assert all(ring.owner(k) == 3 for k in moved)
+    assert 200 < len(moved) < 800
+
+def test_scatter_gather_matches_single_kb(sharded):
+    single = KnowledgeBase(vector_dim=64)
+    recs = _records(60)
+    for rec in recs:
+        single.add(rec)
+    assert sharded.add_many(recs) == 60 and len(sharded.records) == 60
+    for query in ("attention transformer", "optimizer", "lstm networks"):
+        assert _ranked(sharded.search_vector(query, top_k=5)) == _ranked(single.search_vector(query, top_k=5))
+        assert ({r.id for r in sharded.search_keyword(query, top_k=100)} == {r.id for r in single.search_keyword(query, top_k=100)})
+        # rrf scores depend on the order of tied similarities, which differs across shards
+        expect = single.search_hybrid(query, top_k=5, fusion="weighted", confidence_weight=0.5, pool=100)
+        assert _ranked(sharded.search_hybrid(query, top_k=5, fusion="weighted", confidence_weight=0.5, pool=100)) == _ranked(expect)
+        scores = [score for _, score, _ in sharded.search_hybrid(query, top_k=5)]
+        assert len(scores) == 5 and scores == sorted(scores, reverse=True)
+    assert sharded.get("k7").content == recs[7].content and sharded.remove("k7") is not None
+    assert sharded.get("k7") is None and len(sharded) == 59
+
+def test_add_and_remove_shards_keep_every_record(sharded):
+    sharded.add_many(_records(90))
+    before = _ranked(sharded.search_vector("attention", top_k=10))
+    new_id = sharded.add_shard()
+    stats = sharded.stats()
+    assert stats["records"] == 90 and stats["shards"][new_id]["records"] > 0
+    assert _ranked(sharded.search_vector("attention", top_k=10)) == before
+    assert all(sharded.get(f"k{i}") is not None for i in range(90))
+    sharded.remove_shard(0)
+    assert sorted(sharded.shard_ids) == [1, 2, new_id] and len(sharded) == 90
+    assert _ranked(sharded.search_vector("attention", top_k=10)) == before
+
+def test_coordinator_with_shards(tmp_path):
+    from src.agents.coordinator import Coordinator
+    co = Coordinator(cfg={"kb_shards": 2, "kb_dir": None, "llm_intent": False}, log_dir=str(tmp_path))
+    try:
+        co.handle("Research transformer architectures and summarize key trade-offs.")
+        assert len(co.kb.records) >= 1
+        assert "transformer" in co.handle("What did we discuss about transformers earlier?").lower()
+    finally:
+        co.close()
+
+def test_errors_drain_every_shard_and_dead_shards_restart(sharded):
+    sharded.add_many(_records(30))
+    with pytest.raises(RuntimeError):
+        sharded._scatter("search_vector", None, 3)
+    assert len(sharded) == 30
+    victim = sharded._shards[1]
+    lost = sharded.stats()["shards"][1]["records"]
+    victim.proc.kill()
+    victim.proc.join()
+    with pytest.raises(RuntimeError, match="shard 1: process exited"):
+        len(sharded)
+    assert len(sharded) == 30 - lost and sharded.stats()["shards"][1]["restarts"] == 1
+    assert len(sharded.search_vector("attention", top_k=5)) == 5
@@ -0,0 +1,83 @@
+import json, os, struct
+from src.agents.coordinator import Coordinator
+from src.memory.stores import KnowledgeRecord
+from src.memory.snapshot import MAGIC, open_snapshot
+
+def _corpus(tmp_path):
+    path = tmp_path / "corpus.json"
+    path.write_text(json.dumps([
+        {"title": "Transformers", "summary": "Self-attention based sequence models.", "tags": ["transformer", "attention"]},
+        {"title": "Adam", "summary": "Adaptive optimizer.", "tags": ["optimizer"]},
+    ]), encoding="utf-8")
+    return str(path)
+
+def _coordinator(tmp_path, kb_path, snapshot):
+    cfg = {"memory_backend": "memory", "kb_dir": None, "llm_intent": False, "snapshot": snapshot}
+    return Coordinator(cfg=cfg, kb_path=kb_path, log_dir=str(tmp_path / "logs"))
+
+def test_snapshot_round_trip(tmp_path):
+    kb_path, snap = _corpus(tmp_path), str(tmp_path / "snap.bin")
+    co = _coordinator(tmp_path, kb_path, snap)
+    for i, text in enumerate(["transformer attention heads", "adam optimizer betas", "convolution kernels"]):
+        co.kb.add(KnowledgeRecord(id=f"kn_{i}", timestamp="2024-01-01T00:00:00Z", topic=["ml"], content=text,
+                                  source="test", agent="test", confidence=0.5 + i / 10))
+    co.memory.record_turn("user", "hello", session_id="s1")
+    expected = [(r.id, round(s, 5)) for r, s in co.kb.search_vector("attention transformer", top_k=3)]
+    co.save_snapshot()
+    co.close()
+
+    warm = _coordinator(tmp_path, kb_path, snap)
+    assert warm.restored == ["memory", "research"]
+    assert [(r.id, round(s, 5)) for r, s in warm.kb.search_vector("attention transformer", top_k=3)] == expected
+    assert warm.research.search("attention")["results"][0]["title"] == "Transformers"
+    assert [t.content for t in warm.convo.history("s1")] == ["hello"]
+    # the mapped matrix is copied before the first write
+    warm.kb.add(KnowledgeRecord(id="kn_new", timestamp="", topic=["ml"], content="new record", source="t", agent="t", confidence=0.5))
+    assert "kn_new" in warm.kb.records
+    warm.close()
+
+def test_changed_corpus_rebuilds_research_index(tmp_path):
+    kb_path, snap = _corpus(tmp_path), str(tmp_path / "snap.bin")
+    co = _coordinator(tmp_path, kb_path, snap)
+    co.save_snapshot()
+    co.close()
+    with open(kb_path, "w", encoding="utf-8") as f:
+        json.dump([{"title": "Diffusion models", "summary": "Denoising.", "tags": ["diffusion"]}], f)
+    warm = _coordinator(tmp_path, kb_path, snap)
+    assert warm.restored == ["memory"]
+    assert warm.research.search("diffusion")["results"][0]["title"] == "Diffusion models"
+    warm.close()
+
+def test_incompatible_snapshot_is_ignored(tmp_path):
+    kb_path, snap = _corpus(tmp_path), str(tmp_path / "snap.bin")
+    co = _coordinator(tmp_path, kb_path, snap)
+    co.save_snapshot()
+    co.close()
+    with open(snap, "r+b") as f:
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<I", 999))
+    assert open_snapshot(snap) is None
+    cold = _coordinator(tmp_path, kb_path, snap)
+    assert cold.restored == []
+    cold.close()
+    assert open_snapshot(os.path.join(str(tmp_path), "missing.bin")) is None
+
+def test_warm_start_applies_current_memory_options(tmp_path):
+    from src.memory.schema import AgentStateRecord
+    kb_path, snap = _corpus(tmp_path), str(tmp_path / "snap.bin")
+    co = _coordinator(tmp_path, kb_path, snap)
+    for i in range(30):
+        co.memory.record_turn("user", f"turn {i}", session_id="s1")
+    for i in range(6):
+        co.agent_state.add(AgentStateRecord(id=f"st{i}", timestamp=f"2030-01-01T0{i}:30:00Z", agent="manager", task="t",
+                                            result_summary="r", metrics={"confidence": i / 10}))
+    co.save_snapshot()
+    co.close()
+    cfg = {"memory_backend": "memory", "kb_dir": None, "llm_intent": False, "snapshot": snap,
+           "convo_max_turns": 5, "convo_summary_turns": 5, "agent_state_partition": 7200.0}
+    warm = Coordinator(cfg=cfg, kb_path=kb_path, log_dir=str(tmp_path / "logs"))
+    assert warm.restored == ["memory", "research"]
+    assert warm.convo.max_turns == 5 and [t.content for t in warm.convo.history("s1")] == [f"turn {i}" for i in range(25, 30)]
+    assert len(warm.convo.summaries("s1")) == 5
+    assert warm.agent_state.partition_seconds == 7200.0 and len(warm.agent_state._keys) == 3 and len(warm.agent_state) == 6
+    warm.close()
@@ -0,0 +1,86 @@
+from src.agents.coordinator import Coordinator
+from src.memory.stores import ConversationMemory, KnowledgeBase, AgentStateMemory, ConversationTurn, KnowledgeRecord, AgentStateRecord
+from src.memory.sqlite_stores import migrate_to_sqlite, open_sqlite_stores
+
+TEXTS = ["Neural networks for tabular data", "Transformer trade-offs and attention", "Adam optimizer defaults", "RL sample efficiency"]
+
+def _memory_stores():
+    convo, kb, state = ConversationMemory(), KnowledgeBase(vector_dim=64), AgentStateMemory()
+    for i, text in enumerate(TEXTS):
+        convo.add(ConversationTurn(id=f"t{i}", timestamp="ts", role="user", content=text))
+        kb.add(KnowledgeRecord(id=f"k{i}", timestamp="ts", topic=["topic", f"tag{i}"], content=text, source="s", agent="a", confidence=0.5, provenance={"i": i}))
+        state.add(AgentStateRecord(id=f"s{i}", timestamp="ts", agent="manager", task="t", result_summary=text, metrics={"confidence": 0.5}))
+    return convo, kb, state
+
+def test_migration_preserves_search_results(tmp_path):
+    convo, kb, state = _memory_stores()
+    s_convo, s_kb, s_state = migrate_to_sqlite(str(tmp_path / "mem.sqlite"), convo, kb, state)
+    for q in ["neural", "TRADE-OFFS", "tag2", "ad", "missing"]:
+        assert [r.id for r in s_kb.search_keyword(q)] == [r.id for r in kb.search_keyword(q)], q
+        assert [t.id for t in s_convo.search(q)] == [t.id for t in convo.search(q)], q
+    assert [(r.id, round(s, 5)) for r, s in s_kb.search_vector("attention", top_k=2)] == [(r.id, round(s, 5)) for r, s in kb.search_vector("attention", top_k=2)]
+    assert [r.id for r in s_state.list()] == [r.id for r in state.list()]
+    assert s_kb.get("k1") == kb.get("k1")
+
+def test_reopen_loads_embeddings_without_reembedding(tmp_path):
+    path = str(tmp_path / "mem.sqlite")
+    _, kb, _ = open_sqlite_stores(path, vector_dim=64)
+    for i, text in enumerate(TEXTS):
+        kb.add(KnowledgeRecord(id=f"k{i}", timestamp="ts", topic=[], content=text, source="s", agent="a", confidence=0.5))
+    kb.remove("k0")
+    kb.db.close()
+    _, reopened, _ = open_sqlite_stores(path, vector_dim=64)
+    assert len(reopened.records) == 3 and reopened.vs.ids == ["k1", "k2", "k3"]
+    assert reopened.search_vector("Adam optimizer", top_k=1)[0][0].id == "k2"
+
+def test_coordinator_with_sqlite_backend(tmp_path):
+    cfg = {"memory_backend": "sqlite", "memory_db": str(tmp_path / "mem.sqlite")}
+    co = Coordinator(cfg=cfg, log_dir=str(tmp_path))
+    co.handle("What are the main types of neural networks?")
+    assert "memory" in co.handle("What did we discuss about neural networks earlier?").lower()
+    co.close()
+    again = Coordinator(cfg=cfg, log_dir=str(tmp_path))
+    assert len(again.kb.records) == 1 and len(again.convo.history()) == 4
+    again.close()
+
+def test_batch_rolls_back_and_other_threads_wait(tmp_path):
+    import threading, pytest
+    convo, _, _ = open_sqlite_stores(str(tmp_path / "mem.sqlite"), vector_dim=64)
+    with pytest.raises(RuntimeError):
+        with convo.batch():
+            convo.add(ConversationTurn(id="a", timestamp="ts", role="user", content="half a turn"))
+            raise RuntimeError("boom")
+    assert convo.history() == []
+    with convo.batch():
+        convo.add(ConversationTurn(id="b", timestamp="ts", role="user", content="kept"))
+        try:
+            with convo.batch():
+                convo.add(ConversationTurn(id="c", timestamp="ts", role="user", content="nested, rolled back"))
+                raise ValueError
+        except ValueError:
+            pass
+        # another thread's write cannot join this transaction; it lands after the commit
+        other = threading.Thread(target=convo.add, args=(ConversationTurn(id="d", timestamp="ts", role="user", content="other"),))
+        other.start()
+        other.join(0.2)
+        assert other.is_alive()
+    other.join()
+    assert [t.id for t in convo.history()] == ["b", "d"]
+
+def test_short_queries_match_topics_not_their_json(tmp_path):
+    _, kb, _ = _memory_stores()
+    _, s_kb, _ = migrate_to_sqlite(str(tmp_path / "mem.sqlite"), *_memory_stores())
+    for q in ['"', ", ", "g2", "[", "to"]:
+        assert [r.id for r in s_kb.search_keyword(q)] == [r.id for r in kb.search_keyword(q)], q
+    assert s_kb.search_keyword('"') == []
+
+def test_save_exports_the_directory_format(tmp_path):
+    _, s_kb, _ = migrate_to_sqlite(str(tmp_path / "mem.sqlite"), *_memory_stores())
+    s_kb.save(str(tmp_path / "kb"))
+    exported = KnowledgeBase.open(str(tmp_path / "kb"))
+    assert [r.id for r in exported.records.values()] == ["k0", "k1", "k2", "k3"] and exported.get("k2") == s_kb.get("k2")
+    s_kb.db.close()
+    from src.memory.sqlite_stores import SqliteKnowledgeBase
+    assert SqliteKnowledgeBase.exists(str(tmp_path / "mem.sqlite"))
+    reopened = SqliteKnowledgeBase.open(str(tmp_path / "mem.sqlite"), vector_dim=64)
+    assert len(reopened.records) == 4 and reopened.search_keyword("adam")[0].id == "k2"
@@ -0,0 +1,92 @@
+import random
+from src.memory.text_index import InvertedIndex
+from src.memory.stores import ConversationMemory, ConversationTurn, DEFAULT_SESSION
+
+WORDS = ["neural", "networks", "transformer", "trade-offs", "Adam", "optimizer", "RL", "world", "attention", "self-attention"]
+
+def _scan(docs, query, top_k=None):
+    q = query.lower()
+    out = [k for k, fields in docs.items() if any(q in f.lower() for f in fields)]
+    return out if top_k is None else out[:top_k]
+
+def test_matches_linear_substring_scan():
+    rng = random.Random(3)
+    idx, docs = InvertedIndex(), {}
+    for i in range(300):
+        fields = (" ".join(rng.choice(WORDS) for _ in range(6)), rng.choice(WORDS))
+        docs[f"d{i}"] = fields
+        idx.add(f"d{i}", fields)
+    for i in range(0, 300, 7):
+        idx.remove(f"d{i}")
+        del docs[f"d{i}"]
+    queries = ["neural", "eura", "rl", "works tra", "l networks", "-offs", "attention adam", "", "  ", "self-att", "missing"]
+    for q in queries:
+        assert idx.search(q) == _scan(docs, q), q
+        assert idx.search(q, top_k=3) == _scan(docs, q, top_k=3), q
+
+def test_conversation_memory_search_uses_index():
+    convo = ConversationMemory()
+    for i, text in enumerate(["Tell me about Transformers", "Neural networks please", "More on transformer trade-offs"]):
+        convo.add(ConversationTurn(id=f"t{i}", timestamp="", role="user", content=text))
+    assert [t.id for t in convo.search("transformer")] == ["t0", "t2"]
+    assert [t.id for t in convo.search("TRANSFORMER", top_k=1)] == ["t0"]
+
+def test_sessions_are_isolated_and_bounded():
+    convo = ConversationMemory(max_turns=4, summary_turns=2, max_summaries=2, summary_chars=120)
+    for i in range(50):
+        convo.add(ConversationTurn(id=f"a{i}", timestamp=str(i), role="user", content=f"alpha topic {i}"), session_id="a")
+    convo.add(ConversationTurn(id="b0", timestamp="0", role="user", content="beta topic"), session_id="b")
+    assert [t.id for t in convo.history("a")] == ["a46", "a47", "a48", "a49"]
+    assert len(convo.summaries("a")) == 2
+    assert len(convo.sessions["a"].items) == 6 and len(convo.sessions["a"].text) == 6
+    assert [t.id for t in convo.search("beta")] == ["b0"]
+    assert convo.search("beta", session_id="a") == []
+    hits = convo.search("alpha topic 1", session_id="a")
+    assert hits and hits[0].role == "summary"
+    assert sum(s.metadata["turns"] for s in convo.summaries("a")) + len(convo.sessions["a"].pending) == 46
+
+def test_unknown_sessions_are_not_created_and_sessions_are_bounded():
+    convo = ConversationMemory(max_sessions=2)
+    assert list(convo.history("ghost")) == [] and convo.summaries("ghost") == [] and convo.search("x", session_id="ghost") == []
+    assert "ghost" not in convo.sessions
+    for sid in ("a", "b", "a", "c"):
+        convo.add(ConversationTurn(id=sid, timestamp="", role="user", content=f"turn {sid}"), session_id=sid)
+    # "b" was written least recently when "c" opened
+    assert list(convo.sessions) == ["a", "c"] and len(convo.history("b")) == 0
+    idle = ConversationMemory(session_ttl=60)
+    idle.add(ConversationTurn(id="old", timestamp="", role="user", content="old"), session_id="old")
+    idle.sessions["old"].written -= 120
+    idle.add(ConversationTurn(id="new", timestamp="", role="user", content="new"), session_id="new")
+    assert list(idle.sessions) == ["new"]
+
+def test_turns_awaiting_a_summary_stay_searchable():
+    convo = ConversationMemory(max_turns=3, summary_turns=5)
+    for i, text in enumerate(["zebra stripes", "lion mane", "tiger claws", "owl eyes"]):
+        convo.add(ConversationTurn(id=f"t{i}", timestamp="", role="user", content=text))
+    assert len(convo.sessions[DEFAULT_SESSION].pending) == 1
+    assert [t.id for t in convo.search("zebra")] == ["t0"]
+    for i in range(4, 8):
+        convo.add(ConversationTurn(id=f"t{i}", timestamp="", role="user", content=f"filler {i}"))
+    # summarized now: found through the summary, not twice
+    hits = convo.search("zebra")
+    assert len(hits) == 1 and hits[0].role == "summary"
+
+def test_concurrent_writers_and_readers():
+    import threading
+    convo = ConversationMemory(max_turns=4, summary_turns=2, max_summaries=2, max_sessions=3)
+    errors = []
+    def run(n):
+        try:
+            for i in range(300):
+                sid = f"s{n}" if n % 2 else "shared"
+                convo.add(ConversationTurn(id=f"{n}-{i}", timestamp="", role="user", content=f"topic {i} from {n}"), session_id=sid)
+                convo.search("topic", top_k=3, session_id=sid)
+                list(convo.history(sid))
+        except Exception as exc:  # surfaced below; a thread's exception is otherwise lost
+            errors.append(exc)
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(convo.sessions) <= 3
@@ -0,0 +1,92 @@
+import gzip, json, os
+from src.core.trace import TraceWriter
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_buffers_until_threshold_and_flushes_on_close(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_records=3, flush_interval=3600, background=False)
+    w.write("intent", {"intent": "simple_query"})
+    w.write("plan", {"steps": []})
+    assert not os.path.exists(path)
+    w.write("research.result", {"num_results": 3})
+    assert [r["event"] for r in _lines(path)] == ["intent", "plan", "research.result"]
+    w.write("error", {"error": "boom"})
+    w.close()
+    assert _lines(path)[-1]["payload"] == {"error": "boom"}
+
+def test_drop_and_sample(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, drop=["llm.intent"], sample={"analysis.result": 0.0})
+    w.write("llm.intent", {})
+    w.write("analysis.result", {"table": []})
+    w.write("intent", {})
+    w.close()
+    assert [r["event"] for r in _lines(path)] == ["intent"]
+    assert w.dropped == 2
+
+def test_rotates_and_compresses(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_records=1, max_bytes=200, backups=2, compress=True, background=False)
+    for i in range(20):
+        w.write("intent", {"i": i, "pad": "x" * 50})
+    w.close()
+    assert os.path.exists(path + ".1.gz") and os.path.exists(path + ".2.gz")
+    assert not os.path.exists(path + ".3.gz")
+    with gzip.open(path + ".1.gz", "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["event"] == "intent"
+
+def test_background_thread_flushes(tmp_path):
+    import time
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_interval=0.01, background=True)
+    w.write("intent", {})
+    deadline = time.time() + 2
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+    w.close()
+    assert len(_lines(path)) == 1
+
+def test_background_flushes_off_the_writing_thread(tmp_path, monkeypatch):
+    import threading, time
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_records=2, flush_interval=3600)
+    flushed_by = []
+    flush = w.flush
+    monkeypatch.setattr(w, "flush", lambda: (flushed_by.append(threading.current_thread()), flush()))
+    w.write("intent", {})
+    w.write("plan", {})
+    deadline = time.time() + 2
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(_lines(path)) == 2 and threading.current_thread() not in flushed_by
+    w.close()
+
+def test_dropped_writers_are_flushed_and_released(tmp_path):
+    import gc
+    from src.core import trace
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_interval=3600)
+    w.write("intent", {})
+    assert w in trace._open_writers
+    del w
+    gc.collect()
+    assert len(_lines(path)) == 1 and not any(x.path == path for x in trace._open_writers)
+
+def test_write_does_not_wait_for_rotation(tmp_path, monkeypatch):
+    import threading, time
+    path = str(tmp_path / "trace.jsonl")
+    w = TraceWriter(path, flush_records=1, flush_interval=3600, max_bytes=1)
+    rotating, release = threading.Event(), threading.Event()
+    rotate = w._rotate
+    monkeypatch.setattr(w, "_rotate", lambda: (rotating.set(), release.wait(5), rotate()))
+    w.write("intent", {})
+    assert rotating.wait(2)
+    start = time.monotonic()
+    w.write("plan", {})
+    assert time.monotonic() - start < 1
+    release.set()
+    w.close()
+    assert [r["event"] for n in (2, 1) for r in _lines(f"{path}.{n}")] == ["intent", "plan"]
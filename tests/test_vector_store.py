@@ -0,0 +1,113 @@
+import os
+import pytest
+from src.memory.vector_store import SimpleVectorStore, np
+
+DOCS = [
+    "Feedforward neural networks for tabular data",
+    "Convolutional neural networks for images",
+    "Transformers use self-attention",
+    "Adam optimizer with momentum",
+    "neural networks neural networks",
+    "",
+]
+
+def _fill(vs):
+    for i, text in enumerate(DOCS):
+        vs.add(f"doc{i}", text)
+    return vs
+
+@pytest.mark.skipif(np is None, reason="numpy backend not installed")
+def test_numpy_backend_matches_python_scores():
+    fast = _fill(SimpleVectorStore(dim=64))
+    slow = _fill(SimpleVectorStore(dim=64, use_numpy=False))
+    for q in ["neural networks", "attention", "nothing in common"]:
+        a, b = fast.search(q, top_k=4), slow.search(q, top_k=4)
+        assert [k for k, _ in a] == [k for k, _ in b]
+        assert [round(s, 5) for _, s in a] == [round(s, 5) for _, s in b]
+
+def test_search_many_matches_search():
+    vs = _fill(SimpleVectorStore(dim=64))
+    queries = ["neural networks", "optimizer", "images and data"]
+    assert vs.search_many(queries, top_k=3) == [vs.search(q, top_k=3) for q in queries]
+
+def test_add_grows_and_overwrites():
+    vs = SimpleVectorStore(dim=32)
+    for i in range(SimpleVectorStore.INITIAL_CAPACITY * 3):
+        vs.add(f"k{i}", f"token{i} shared")
+    vs.add("k0", "replaced text")
+    assert len(vs) == SimpleVectorStore.INITIAL_CAPACITY * 3
+    assert vs.search("replaced text", top_k=1)[0][0] == "k0"
+
+def test_embeddings_are_stable_across_processes():
+    import subprocess, sys, json
+    code = "import json; from src.memory.vector_store import SimpleVectorStore as S; print(json.dumps(S(dim=64).embed('stable hashing works')))"
+    outs = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env={"PYTHONHASHSEED": str(seed)}).stdout for seed in (1, 2)}
+    assert len(outs) == 1
+    assert json.loads(outs.pop()) == SimpleVectorStore(dim=64).embed("stable hashing works")
+
+def test_save_and_open_memory_mapped(tmp_path):
+    vs = _fill(SimpleVectorStore(dim=64))
+    vs.save(str(tmp_path))
+    opened = SimpleVectorStore.open(str(tmp_path))
+    assert opened.ids == vs.ids and opened.texts == vs.texts
+    assert opened.search("neural networks", top_k=3) == vs.search("neural networks", top_k=3)
+    opened.add("new", "fresh record about attention")
+    opened.remove("doc0")
+    assert opened.search("fresh record", top_k=1)[0][0] == "new"
+    assert SimpleVectorStore.open(str(tmp_path)).ids == vs.ids
+
+def test_knowledge_base_round_trip(tmp_path):
+    from src.memory.stores import KnowledgeBase, KnowledgeRecord
+    kb = KnowledgeBase(vector_dim=64)
+    for i, text in enumerate(DOCS):
+        kb.add(KnowledgeRecord(id=f"k{i}", timestamp="t", topic=["demo"], content=text, source="s", agent="a", confidence=0.5))
+    kb.save(str(tmp_path))
+    reopened = KnowledgeBase.open(str(tmp_path))
+    assert reopened.records == kb.records
+    assert [(r.id, s) for r, s in reopened.search_vector("images", top_k=2)] == [(r.id, s) for r, s in kb.search_vector("images", top_k=2)]
+
+def test_coordinator_saves_kb_dir_on_close(tmp_path):
+    from src.agents.coordinator import Coordinator
+    cfg = {"memory_backend": "memory", "kb_dir": str(tmp_path / "kb"), "llm_intent": False}
+    co = Coordinator(cfg=cfg, log_dir=str(tmp_path / "logs"))
+    co.handle("What are the main types of neural networks?")
+    ids = sorted(co.kb.records)
+    co.close()
+    again = Coordinator(cfg=cfg, log_dir=str(tmp_path / "logs"))
+    assert sorted(again.kb.records) == ids and len(ids) == 1
+    assert again.kb.vs.texts == co.kb.vs.texts
+    again.close()
+    assert sorted(os.listdir(tmp_path / "kb")) == ["index.json", "records.jsonl", "vectors.f32"]
+
+def test_pooled_batch_workers_leave_kb_dir_alone(tmp_path, monkeypatch):
+    import io
+    from src.core.config import Config
+    from src.services.batch import run_batch
+    monkeypatch.setattr(Config, "KB_DIR", str(tmp_path / "kb"))
+    run_batch(io.StringIO("What are the main types of neural networks?\n" * 4), io.StringIO(), workers=2, chunk_size=1,
+              log_dir=str(tmp_path / "logs"))
+    assert not os.path.exists(tmp_path / "kb")
+
+def test_concurrent_saves_to_one_directory(tmp_path):
+    import threading
+    from src.memory.stores import KnowledgeBase
+    from src.memory.schema import KnowledgeRecord
+    kbs = []
+    for n in range(4):
+        kb = KnowledgeBase(vector_dim=64)
+        kb.add(KnowledgeRecord(id=f"k{n}", timestamp="t", topic=["demo"], content=DOCS[n], source="s", agent="a", confidence=0.5))
+        kbs.append(kb)
+    errors = []
+    def save(kb):
+        try:
+            for _ in range(20):
+                kb.save(str(tmp_path))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=save, args=(kb,)) for kb in kbs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+    assert len(KnowledgeBase.open(str(tmp_path)).records) == 1